@@ -1,5 +1,6 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 
@@ -9,6 +10,94 @@ class Settings(BaseSettings):
     supabase_service_key: str
     cors_origins: str = "http://localhost:3000,http://localhost:5173"
     
+    # Async PostgREST connection pool
+    db_pool_max_connections: int = 100
+    db_pool_max_keepalive: int = 20
+    db_timeout_seconds: float = 10.0
+    
+    # Repository backend: "postgrest" (Supabase REST API) or "asyncpg" (direct Postgres)
+    db_backend: str = "postgrest"
+    database_url: Optional[str] = None
+    pg_pool_min_size: int = 1
+    pg_pool_max_size: int = 10
+    
+    # Cache backend for the user, tenant, role and list caches: "local" (per-process LRU)
+    # or "redis" (shared by all workers, invalidations broadcast over pub/sub)
+    cache_backend: str = "local"
+    redis_url: Optional[str] = None
+    cache_serializer: str = "orjson"  # orjson, msgpack or json (redis backend only)
+    cache_local_ttl_seconds: float = 5.0
+    cache_local_max_size: int = 10000
+    
+    # User profile cache used by get_current_user (keyed by JWT sub)
+    user_cache_ttl_seconds: float = 60.0
+    user_cache_negative_ttl_seconds: float = 5.0
+    user_cache_max_size: int = 10000
+    
+    # Compiled tenant role permissions (dropped on role changes; the TTL bounds staleness across workers)
+    role_cache_ttl_seconds: float = 300.0
+    role_cache_max_size: int = 10000
+    
+    # Per-tenant cache of asset/employee/assignment list results (max_size 0 disables it)
+    list_cache_ttl_seconds: float = 30.0
+    list_cache_max_size: int = 5000
+    list_cache_max_bytes: int = 64 * 1024 * 1024
+    
+    # Tenant rows served by the tenant detail endpoints
+    tenant_cache_ttl_seconds: float = 60.0
+    tenant_cache_max_size: int = 1000
+    
+    # Bulk create endpoints: items accepted per request and rows per multi-row INSERT
+    bulk_max_items: int = 1000
+    bulk_chunk_size: int = 200
+    
+    # Spreadsheet imports: uploads are staged and per-row error reports kept in IMPORT_DIR
+    # (job progress is shared through the cache backend, the files are local to the worker)
+    import_dir: str = "imports"
+    import_batch_size: int = 500
+    import_max_upload_bytes: int = 200 * 1024 * 1024
+    import_job_ttl_hours: float = 24.0
+    
+    # /metrics is served to super admins, or to scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+    metrics_token: Optional[str] = None
+    
+    # Opt-in: verify tokens locally and read tenant_id/role from app_metadata claims
+    jwt_claims_auth: bool = False
+    supabase_jwt_secret: Optional[str] = None
+    jwt_algorithm: str = "HS256"
+    verified_token_cache_max_size: int = 10000
+    
+    # Background audit-log writer (entries are queued and inserted in batches)
+    audit_queue_max_size: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval_seconds: float = 1.0
+    audit_write_timeout_seconds: float = 5.0
+    
+    # Local spool for audit batches the database could not take ("" disables spooling)
+    audit_spool_dir: str = "audit_spool"
+    audit_spool_segment_max_bytes: int = 16 * 1024 * 1024
+    audit_spool_replay_interval_seconds: float = 30.0
+    
+    # Audit policy: mutations are always logged, reads are sampled. AUDIT_SAMPLE_RATES is a
+    # JSON object keyed by route template or resource type, e.g. {"audit_logs": 1.0}
+    audit_read_sample_rate: float = 0.1
+    audit_sample_rates: Dict[str, float] = {}
+    audit_exclude_paths: str = "/,/health,/metrics,/docs,/openapi.json,/redoc,/api/auth/*"
+    
+    # Monthly audit_logs partitions; months older than the retention window are exported
+    # to Parquet files in AUDIT_ARCHIVE_DIR and dropped ("" disables archiving)
+    audit_archive_dir: str = ""
+    audit_retention_months: int = 12
+    audit_partitions_ahead: int = 3
+    audit_maintenance_interval_hours: float = 24.0
+    
+    @model_validator(mode="after")
+    def check_jwt_claims_auth(self) -> "Settings":
+        # Claims are only trusted once the signature is verified, which needs the secret
+        if self.jwt_claims_auth and not self.supabase_jwt_secret:
+            raise ValueError("SUPABASE_JWT_SECRET must be set when JWT_CLAIMS_AUTH is enabled")
+        return self
+    
     @property
     def cors_origins_list(self) -> List[str]:
         origins = [origin.strip() for origin in self.cors_origins.split(",")]
@@ -16,6 +105,10 @@ class Settings(BaseSettings):
         # For now, let's keep it strict but log what we're allowing
         return origins
     
+    @property
+    def audit_exclude_paths_list(self) -> List[str]:
+        return [path.strip() for path in self.audit_exclude_paths.split(",") if path.strip()]
+    
     class Config:
         env_file = ".env"
 
@@ -1,5 +1,8 @@
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from httpx import AsyncClient, Limits
 from app.config import settings
+import json
 
 # Use service role key for backend operations (bypasses RLS)
 # We've already authenticated the user in our middleware
@@ -11,3 +14,65 @@ except Exception as e:
     print(f"Error details: {str(e)}")
     raise
 
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client backed by a shared keep-alive connection pool"""
+
+    def create_session(self, base_url, headers, timeout) -> AsyncClient:
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=Limits(
+                max_connections=settings.db_pool_max_connections,
+                max_keepalive_connections=settings.db_pool_max_keepalive,
+            ),
+        )
+
+
+# Async client used by the routes so PostgREST round-trips don't block the event loop
+# (the sync `supabase` client is kept for auth admin calls)
+db = PooledPostgrestClient(
+    f"{settings.supabase_url}/rest/v1",
+    headers={
+        "apikey": settings.supabase_service_key,
+        "Authorization": f"Bearer {settings.supabase_service_key}",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+    },
+    timeout=settings.db_timeout_seconds,
+)
+
+
+_pg_pool = None
+
+
+async def _init_pg_connection(conn) -> None:
+    """Decode json/jsonb columns to Python objects like PostgREST does"""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def get_pg_pool():
+    """Return the shared asyncpg pool, creating it on first use (DB_BACKEND=asyncpg only)"""
+    global _pg_pool
+    if _pg_pool is None:
+        if not settings.database_url:
+            raise RuntimeError("DATABASE_URL must be set when DB_BACKEND=asyncpg")
+        import asyncpg
+        _pg_pool = await asyncpg.create_pool(
+            settings.database_url,
+            min_size=settings.pg_pool_min_size,
+            max_size=settings.pg_pool_max_size,
+            init=_init_pg_connection,
+        )
+    return _pg_pool
+
+
+async def close_db() -> None:
+    """Close pooled database connections on shutdown"""
+    global _pg_pool
+    await db.aclose()
+    if _pg_pool is not None:
+        await _pg_pool.close()
+        _pg_pool = None
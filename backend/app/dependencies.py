@@ -1,8 +1,11 @@
 from fastapi import Depends
-from app.utils.auth import get_current_user, get_current_tenant
+from app.utils.auth import get_current_user, get_current_tenant, require_permission
 from app.models.user import User
 from uuid import UUID
 
+# require_permission is re-exported so routes get all their dependencies from here
+__all__ = ["get_user", "get_tenant", "get_current_user", "get_current_tenant", "require_permission"]
+
 
 def get_user(current_user: User = Depends(get_current_user)) -> User:
     """Dependency to get current authenticated user"""
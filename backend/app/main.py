@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import close_db
 from app.routes import (
     assets, employees, assignments, test,
     auth_routes, tenants, users, roles, subscriptions, audit
 )
-from app.utils.middleware import AuditLogMiddleware, TenantContextMiddleware
+from app.utils.middleware import AuditLogMiddleware
+from app.utils.auth import user_cache, verified_token_cache, role_cache, get_request_user
+from app.utils.audit_writer import audit_writer
+from app.utils.cache import list_cache, start_caches, close_caches, cache_backend_stats
+from app.routes.tenants import tenant_cache
+from app.utils.audit_archive import audit_archive
+from app.utils.imports import import_manager
+from app.utils.pagination import NEXT_CURSOR_HEADER
+import secrets
 import sys
 
 # Validate configuration on startup
@@ -33,6 +42,23 @@ app = FastAPI(
     version="2.0.0"
 )
 
+@app.on_event("startup")
+async def startup():
+    await start_caches()
+    audit_writer.start()
+    audit_archive.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Drain queued audit entries before the database clients close
+    await import_manager.stop()
+    await audit_writer.stop()
+    await audit_archive.stop()
+    await close_caches()
+    await close_db()
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -40,13 +66,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # Add custom middleware
-# Note: Middleware executes in reverse order (last added = first executed)
-# So AuditLogMiddleware runs first, then TenantContextMiddleware
+# The user (and the tenant context on request.state) is resolved lazily, by the audit
+# middleware for sampled requests and by the route dependencies, at most once per request
 app.add_middleware(AuditLogMiddleware)
-app.add_middleware(TenantContextMiddleware)
 
 # Include routers
 # Authentication routes (public)
@@ -77,3 +103,30 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+async def require_metrics_access(request: Request) -> None:
+    """Let through METRICS_TOKEN bearers (scrapers) and super admins"""
+    authorization = request.headers.get("Authorization", "")
+    token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else ""
+    if settings.metrics_token and secrets.compare_digest(token.encode(), settings.metrics_token.encode()):
+        return
+    user = await get_request_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if user.role != "super_admin":
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """In-process cache and background worker counters"""
+    return {
+        "user_cache": user_cache.stats(),
+        "verified_token_cache": verified_token_cache.stats(),
+        "role_cache": role_cache.stats(),
+        "list_cache": list_cache.stats(),
+        "tenant_cache": tenant_cache.stats(),
+        "cache_backend": cache_backend_stats(),
+        "audit_writer": audit_writer.stats(),
+        "audit_archive": audit_archive.stats()
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import date
 from uuid import UUID
 
@@ -21,6 +21,11 @@ class AssetCreate(AssetBase):
     pass
 
 
+class AssetImport(AssetBase):
+    # Assignments own the assigned status, so imported rows can't set it
+    status: Literal["available", "maintenance", "retired"] = "available"
+
+
 class AssetUpdate(BaseModel):
     asset_tag: Optional[str] = None
     name: Optional[str] = None
@@ -34,6 +39,11 @@ class AssetUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class AssetBulkStatus(BaseModel):
+    asset_ids: List[UUID] = Field(..., min_length=1)
+    status: Literal["available", "maintenance", "retired"]
+
+
 class Asset(AssetBase):
     id: UUID
     tenant_id: UUID
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -37,4 +37,50 @@ class AuditLogQuery(BaseModel):
     end_date: Optional[datetime] = None
     skip: int = 0
     limit: int = 100
+    cursor: Optional[str] = None
 
+
+
+class AuditLogExportQuery(BaseModel):
+    tenant_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    action: Optional[str] = None
+    resource_type: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    format: Literal["ndjson", "csv"] = "ndjson"
+    compress: bool = True
+
+
+class AuditLogStatsQuery(BaseModel):
+    tenant_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    action: Optional[str] = None
+    resource_type: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    group_by: str = "action"
+    bucket: Optional[Literal["hour", "day", "week", "month"]] = None
+    limit: int = Field(default=1000, ge=1, le=10000)
+
+
+class AuditLogStatsGroup(BaseModel):
+    bucket: Optional[datetime] = None
+    user_id: Optional[UUID] = None
+    action: Optional[str] = None
+    resource_type: Optional[str] = None
+    requests: int
+    estimated_requests: float
+    avg_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+
+
+class AuditLogStats(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    group_by: List[str]
+    bucket: Optional[str] = None
+    groups: List[AuditLogStatsGroup]
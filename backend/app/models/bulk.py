@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str = "created"  # created, updated or failed
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+    failed: int
+    results: List[BulkItemResult]
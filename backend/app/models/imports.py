@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class ImportJob(BaseModel):
+    id: UUID
+    tenant_id: UUID
+    resource: str  # assets or employees
+    filename: str
+    format: Literal["csv", "xlsx"]
+    status: Literal["pending", "running", "completed", "failed"] = "pending"
+    rows_processed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    progress: float = 0.0  # share of the file read so far (0-1)
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
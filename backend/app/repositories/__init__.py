@@ -0,0 +1,61 @@
+from app.config import settings
+from app.repositories.base import (
+    AssetRepo, EmployeeRepo, AssignmentRepo, AuditRepo, TenantRepo, UserRepo, RoleRepo, SubscriptionRepo,
+    RepositoryError, UniqueViolation, ForeignKeyViolation
+)
+
+
+class Repositories:
+    """Container for the repositories of the configured database backend"""
+
+    def __init__(
+        self,
+        assets: AssetRepo,
+        employees: EmployeeRepo,
+        assignments: AssignmentRepo,
+        audit: AuditRepo,
+        tenants: TenantRepo,
+        users: UserRepo,
+        roles: RoleRepo,
+        subscriptions: SubscriptionRepo
+    ):
+        self.assets = assets
+        self.employees = employees
+        self.assignments = assignments
+        self.audit = audit
+        self.tenants = tenants
+        self.users = users
+        self.roles = roles
+        self.subscriptions = subscriptions
+
+
+def build_repositories(backend: str) -> Repositories:
+    """Build repositories for the "postgrest" or "asyncpg" backend"""
+    if backend == "asyncpg":
+        from app.repositories import postgres
+        return Repositories(
+            assets=postgres.PostgresAssetRepo(),
+            employees=postgres.PostgresEmployeeRepo(),
+            assignments=postgres.PostgresAssignmentRepo(),
+            audit=postgres.PostgresAuditRepo(),
+            tenants=postgres.PostgresTenantRepo(),
+            users=postgres.PostgresUserRepo(),
+            roles=postgres.PostgresRoleRepo(),
+            subscriptions=postgres.PostgresSubscriptionRepo(),
+        )
+    if backend == "postgrest":
+        from app.repositories import postgrest
+        return Repositories(
+            assets=postgrest.PostgrestAssetRepo(),
+            employees=postgrest.PostgrestEmployeeRepo(),
+            assignments=postgrest.PostgrestAssignmentRepo(),
+            audit=postgrest.PostgrestAuditRepo(),
+            tenants=postgrest.PostgrestTenantRepo(),
+            users=postgrest.PostgrestUserRepo(),
+            roles=postgrest.PostgrestRoleRepo(),
+            subscriptions=postgrest.PostgrestSubscriptionRepo(),
+        )
+    raise ValueError(f"Unknown DB_BACKEND: {backend}")
+
+
+repos = build_repositories(settings.db_backend)
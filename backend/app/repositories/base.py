@@ -0,0 +1,440 @@
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Set
+from uuid import UUID
+from app.utils.pagination import Cursor
+
+Row = Dict[str, Any]
+
+
+class RepositoryError(Exception):
+    """Raised when a stored procedure rejects an operation (code is the RAISE message)"""
+
+    def __init__(self, code: str, detail: Optional[str] = None):
+        self.code = code
+        self.detail = detail
+        super().__init__(code if detail is None else f"{code}: {detail}")
+
+
+class UniqueViolation(RepositoryError):
+    """Raised when a write hits a unique constraint (detail is the constraint name)"""
+
+    def __init__(self, detail: Optional[str] = None):
+        super().__init__("unique_violation", detail)
+
+
+class ForeignKeyViolation(RepositoryError):
+    """Raised when a write or delete is blocked by a foreign key (detail is the constraint name)"""
+
+    def __init__(self, detail: Optional[str] = None):
+        super().__init__("foreign_key_violation", detail)
+
+
+class AssetRepo(ABC):
+    """Tenant-scoped access to the assets table"""
+
+    @abstractmethod
+    async def list(
+        self,
+        tenant_id: UUID,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Row]:
+        """Newest first by (created_at, id); when after is given it pages by keyset and skip is ignored"""
+        ...
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID, asset_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        """Insert an asset; raises UniqueViolation if the tag is taken in the tenant"""
+        ...
+
+    @abstractmethod
+    async def create_many(self, rows: Sequence[Row]) -> List[Row]:
+        """Insert assets with one multi-row INSERT ... RETURNING; a UniqueViolation rejects the whole batch"""
+        ...
+
+    @abstractmethod
+    async def existing_tags(self, tenant_id: UUID, tags: Sequence[str]) -> Set[str]:
+        """The subset of tags already used by assets in the tenant"""
+        ...
+
+    @abstractmethod
+    async def upsert_many(self, tenant_id: UUID, rows: Sequence[Row]) -> List[Row]:
+        """
+        Insert or update assets by (tenant_id, asset_tag) in one statement (see import_assets).
+
+        rows are JSON-ready and have unique tags; returns {id, asset_tag, inserted} per row.
+        """
+        ...
+
+    @abstractmethod
+    async def set_status_many(self, tenant_id: UUID, asset_ids: Sequence[UUID], status: str) -> List[Row]:
+        """
+        Set the status of many assets in one statement (see bulk_set_asset_status).
+
+        Assets with an active assignment are skipped; returns {asset_id, error_code} per
+        distinct id, error_code being None, asset_not_found or asset_assigned.
+        """
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, asset_id: UUID, data: Row) -> Optional[Row]:
+        """Tenant-filtered UPDATE ... RETURNING; None if no such asset, UniqueViolation on tag clash"""
+        ...
+
+    @abstractmethod
+    async def delete(self, tenant_id: UUID, asset_id: UUID) -> Optional[Row]:
+        """Tenant-filtered DELETE ... RETURNING; ForeignKeyViolation if assignments reference it"""
+        ...
+
+
+class EmployeeRepo(ABC):
+    """Tenant-scoped access to the employees table"""
+
+    @abstractmethod
+    async def list(
+        self,
+        tenant_id: UUID,
+        department: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Row]:
+        """Newest first by (created_at, id); when after is given it pages by keyset and skip is ignored"""
+        ...
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID, employee_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        """Insert an employee; raises UniqueViolation if the email is taken in the tenant"""
+        ...
+
+    @abstractmethod
+    async def create_many(self, rows: Sequence[Row]) -> List[Row]:
+        """Insert employees with one multi-row INSERT ... RETURNING; a UniqueViolation rejects the whole batch"""
+        ...
+
+    @abstractmethod
+    async def existing_emails(self, tenant_id: UUID, emails: Sequence[str]) -> Set[str]:
+        """The subset of emails already used by employees in the tenant"""
+        ...
+
+    @abstractmethod
+    async def upsert_many(self, tenant_id: UUID, rows: Sequence[Row]) -> List[Row]:
+        """
+        Insert or update employees by (tenant_id, email) in one statement (see import_employees).
+
+        rows are JSON-ready and have unique emails; returns {id, email, inserted} per row.
+        """
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, employee_id: UUID, data: Row) -> Optional[Row]:
+        """Tenant-filtered UPDATE ... RETURNING; None if no such employee, UniqueViolation on email clash"""
+        ...
+
+    @abstractmethod
+    async def delete(self, tenant_id: UUID, employee_id: UUID) -> Optional[Row]:
+        """Tenant-filtered DELETE ... RETURNING; ForeignKeyViolation if assignments reference it"""
+        ...
+
+
+class AssignmentRepo(ABC):
+    """Tenant-scoped access to assignments, joined with asset and employee names"""
+
+    @abstractmethod
+    async def list(
+        self,
+        tenant_id: UUID,
+        status: Optional[str] = None,
+        asset_id: Optional[UUID] = None,
+        employee_id: Optional[UUID] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Row]:
+        """Newest first by (created_at, id); when after is given it pages by keyset and skip is ignored"""
+        ...
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID, assignment_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def has_active(self, asset_id: Optional[UUID] = None, employee_id: Optional[UUID] = None) -> bool:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def assign(
+        self,
+        tenant_id: UUID,
+        asset_id: UUID,
+        employee_id: UUID,
+        assigned_by: UUID,
+        assigned_date: date,
+        notes: Optional[str] = None
+    ) -> Row:
+        """
+        Validate, insert the assignment and mark the asset assigned in one transaction.
+        
+        Raises RepositoryError with asset_not_found, asset_unavailable,
+        employee_not_found or asset_already_assigned.
+        """
+        ...
+
+    @abstractmethod
+    async def assign_many(self, tenant_id: UUID, assigned_by: UUID, items: Sequence[Row]) -> List[Row]:
+        """
+        Validate and create many assignments in one transaction (see bulk_create_assignments).
+
+        items are JSON-ready {idx, asset_id, employee_id, assigned_date, notes} with distinct
+        asset_ids; returns {item_index, assignment_id, error_code, error_detail} per item,
+        with the same error codes as assign.
+        """
+        ...
+
+    @abstractmethod
+    async def return_assignment(
+        self,
+        tenant_id: UUID,
+        assignment_id: UUID,
+        returned_date: date,
+        notes: Optional[str] = None
+    ) -> Row:
+        """
+        Close an active assignment and free its asset in one transaction.
+        
+        Raises RepositoryError with assignment_not_found or assignment_not_active.
+        """
+        ...
+
+    @abstractmethod
+    async def return_all_for_employee(
+        self,
+        tenant_id: UUID,
+        employee_id: UUID,
+        returned_date: date,
+        notes: Optional[str] = None
+    ) -> List[Row]:
+        """
+        Close all active assignments of an employee and free their assets.
+        
+        Raises RepositoryError with employee_not_found.
+        """
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, assignment_id: UUID, data: Row) -> Optional[Row]:
+        ...
+
+
+class AuditRepo(ABC):
+    """Access to the audit_logs table"""
+
+    @abstractmethod
+    async def insert(self, entry: Row) -> None:
+        ...
+
+    @abstractmethod
+    async def insert_many(self, entries: List[Row]) -> None:
+        """
+        Insert a batch of entries with a single multi-row INSERT (all entries share the same keys).
+
+        Entries carry client-generated ids and ones already stored are skipped, so
+        replaying a batch is idempotent.
+        """
+        ...
+
+    @abstractmethod
+    async def list(
+        self,
+        tenant_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        action: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Row]:
+        """Newest first by (created_at, id); when after is given it pages by keyset and skip is ignored"""
+        ...
+
+    @abstractmethod
+    async def count(
+        self,
+        tenant_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        action: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def get(self, log_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def ensure_partitions(self, months_ahead: int = 3) -> int:
+        """Create missing monthly partitions up to months_ahead; returns how many were created"""
+        ...
+
+    @abstractmethod
+    async def list_partitions(self) -> List[Row]:
+        """Monthly partitions as {partition_name, month} rows, oldest first"""
+        ...
+
+    @abstractmethod
+    async def drop_partition(self, month: date) -> bool:
+        """Detach and drop the partition holding month; False if there was none"""
+        ...
+
+    @abstractmethod
+    async def stats(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        tenant_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        action: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        group_by: Sequence[str] = ("action",),
+        bucket: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Row]:
+        """
+        Request counts and duration_ms percentiles per group (see audit_log_stats).
+
+        Columns not in group_by, and bucket when no bucket unit is given, come back as None.
+        """
+        ...
+
+
+class TenantRepo(ABC):
+    """Access to the tenants table"""
+
+    @abstractmethod
+    async def list(self, skip: int = 0, limit: int = 100) -> List[Row]:
+        ...
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def signup(
+        self,
+        user_id: UUID,
+        email: str,
+        name: str,
+        organization_name: str,
+        slug: Optional[str] = None
+    ) -> Row:
+        """Provision tenant, admin user, subscription and default roles in one transaction"""
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, data: Row) -> Optional[Row]:
+        ...
+
+
+class UserRepo(ABC):
+    """Access to the users table"""
+
+    @abstractmethod
+    async def list(
+        self,
+        tenant_id: Optional[UUID] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Row]:
+        """Oldest first by (created_at, id); when after is given it pages by keyset and skip is ignored"""
+        ...
+
+    @abstractmethod
+    async def get(self, user_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def get_profile(self, user_id: UUID) -> Optional[Row]:
+        """Return only the columns needed for authentication (id, email, tenant_id, role, status)"""
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def update(self, user_id: UUID, data: Row) -> Optional[Row]:
+        ...
+
+
+class RoleRepo(ABC):
+    """Tenant-scoped access to the roles table"""
+
+    @abstractmethod
+    async def list(self, tenant_id: UUID) -> List[Row]:
+        ...
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID, role_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        """Insert a role; raises UniqueViolation if the name is taken in the tenant"""
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, role_id: UUID, data: Row) -> Optional[Row]:
+        """Tenant-filtered UPDATE ... RETURNING; None if no such role, UniqueViolation on name clash"""
+        ...
+
+    @abstractmethod
+    async def delete(self, tenant_id: UUID, role_id: UUID) -> Optional[Row]:
+        """Tenant-filtered DELETE ... RETURNING; None if no such role"""
+        ...
+
+
+class SubscriptionRepo(ABC):
+    """Tenant-scoped access to the subscriptions (one per tenant) and invoices tables"""
+
+    @abstractmethod
+    async def get(self, tenant_id: UUID) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def create(self, data: Row) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def update(self, tenant_id: UUID, data: Row) -> Optional[Row]:
+        """Tenant-filtered UPDATE ... RETURNING; None if the tenant has no subscription"""
+        ...
+
+    @abstractmethod
+    async def list_invoices(self, tenant_id: UUID, skip: int = 0, limit: int = 100) -> List[Row]:
+        """Newest first"""
+        ...
@@ -0,0 +1,470 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+from app.database import get_pg_pool
+from app.utils.pagination import Cursor
+from app.repositories.base import (
+    Row, AssetRepo, EmployeeRepo, AssignmentRepo, AuditRepo, TenantRepo, UserRepo, RoleRepo, SubscriptionRepo,
+    RepositoryError, UniqueViolation, ForeignKeyViolation
+)
+
+ASSIGNMENT_DETAIL_SELECT = """
+    SELECT a.*, s.name AS asset_name, s.asset_tag AS asset_tag, e.name AS employee_name
+    FROM assignments a
+    LEFT JOIN assets s ON s.id = a.asset_id
+    LEFT JOIN employees e ON e.id = a.employee_id
+"""
+
+
+def _ident(name: str) -> str:
+    """Quote a column or table name taken from a model dump"""
+    if not name.isidentifier():
+        raise ValueError(f"Invalid identifier: {name}")
+    return f'"{name}"'
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert asyncpg values to the JSON shapes PostgREST returns"""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _row(record) -> Optional[Row]:
+    if record is None:
+        return None
+    return {key: _jsonable(value) for key, value in record.items()}
+
+
+def _where(filters: Iterable[Tuple[str, Any]], args: List[Any]) -> str:
+    """
+    Build a WHERE clause from (sql, value) pairs, skipping None values.
+
+    Each sql fragment uses {} as the placeholder for its bind parameter; a tuple
+    value binds one parameter per {} (used for row comparisons).
+    """
+    clauses = []
+    for sql, value in filters:
+        if value is None:
+            continue
+        placeholders = []
+        for item in (value if isinstance(value, tuple) else (value,)):
+            args.append(item)
+            placeholders.append(f"${len(args)}")
+        clauses.append(sql.format(*placeholders))
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _after(after: Optional[Cursor], prefix: str = "", desc: bool = True) -> Tuple[str, Optional[Cursor]]:
+    """Keyset filter for _where: rows strictly past the cursor in (created_at, id) order"""
+    return f"({prefix}created_at, {prefix}id) {'<' if desc else '>'} ({{}}, {{}})", after
+
+
+def _page(args: List[Any], skip: int, limit: int, after: Optional[Cursor], prefix: str = "", desc: bool = True) -> str:
+    """
+    ORDER BY (created_at, id) plus OFFSET/LIMIT for the page.
+
+    With a keyset cursor the position is already in the WHERE clause (see _after),
+    so the offset is dropped and the index scan starts right at the cursor.
+    """
+    direction = "DESC" if desc else "ASC"
+    args += [0 if after else skip, limit]
+    return (
+        f"ORDER BY {prefix}created_at {direction}, {prefix}id {direction} "
+        f"OFFSET ${len(args) - 1} LIMIT ${len(args)}"
+    )
+
+
+class PostgresRepo:
+    """Base class for repositories backed by the pooled asyncpg connection"""
+
+    table: str
+
+    async def _fetch(self, sql: str, *args) -> List[Row]:
+        pool = await get_pg_pool()
+        records = await pool.fetch(sql, *args)
+        return [_row(record) for record in records]
+
+    async def _fetchrow(self, sql: str, *args) -> Optional[Row]:
+        pool = await get_pg_pool()
+        return _row(await pool.fetchrow(sql, *args))
+
+    async def _fetchval(self, sql: str, *args) -> Any:
+        pool = await get_pg_pool()
+        return await pool.fetchval(sql, *args)
+
+    async def _call(self, function: str, *args) -> List[Row]:
+        """Call a set-returning stored procedure, translating RAISE EXCEPTION errors to RepositoryError"""
+        import asyncpg
+        placeholders = ", ".join(f"${i}" for i in range(1, len(args) + 1))
+        try:
+            return await self._fetch(f"SELECT * FROM {_ident(function)}({placeholders})", *args)
+        except asyncpg.exceptions.RaiseError as e:
+            raise RepositoryError(e.message, e.detail)
+
+    async def _write_all(self, sql: str, *args) -> List[Row]:
+        """Run an INSERT/UPDATE/DELETE ... RETURNING, translating constraint errors for the routes"""
+        import asyncpg
+        try:
+            return await self._fetch(sql, *args)
+        except asyncpg.exceptions.UniqueViolationError as e:
+            raise UniqueViolation(e.constraint_name)
+        except asyncpg.exceptions.ForeignKeyViolationError as e:
+            raise ForeignKeyViolation(e.constraint_name)
+
+    async def _write(self, sql: str, *args) -> Optional[Row]:
+        rows = await self._write_all(sql, *args)
+        return rows[0] if rows else None
+
+    async def _insert(self, data: Row) -> Optional[Row]:
+        columns = list(data.keys())
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        sql = (
+            f"INSERT INTO {self.table} ({', '.join(_ident(c) for c in columns)}) "
+            f"VALUES ({placeholders}) RETURNING *"
+        )
+        return await self._write(sql, *data.values())
+
+    def _insert_rows_sql(self, rows: Sequence[Row], args: List[Any]) -> str:
+        """Multi-row INSERT for rows (all rows share the first row's keys), binding values into args"""
+        columns = list(rows[0].keys())
+        values = []
+        for row in rows:
+            start = len(args)
+            args += [row.get(c) for c in columns]
+            values.append(f"({', '.join(f'${i}' for i in range(start + 1, len(args) + 1))})")
+        return f"INSERT INTO {self.table} ({', '.join(_ident(c) for c in columns)}) VALUES {', '.join(values)}"
+
+    async def _insert_many(self, rows: Sequence[Row], on_conflict: str = "") -> None:
+        if not rows:
+            return
+        args: List[Any] = []
+        sql = f"{self._insert_rows_sql(rows, args)} {on_conflict}"
+        pool = await get_pg_pool()
+        await pool.execute(sql, *args)
+
+    async def _create_many(self, rows: Sequence[Row]) -> List[Row]:
+        if not rows:
+            return []
+        args: List[Any] = []
+        return await self._write_all(f"{self._insert_rows_sql(rows, args)} RETURNING *", *args)
+
+    async def _update(self, data: Row, filters: Sequence[Tuple[str, Any]]) -> Optional[Row]:
+        if not data:
+            return None
+        args = list(data.values())
+        assignments = ", ".join(f"{_ident(c)} = ${i}" for i, c in enumerate(data.keys(), start=1))
+        where = _where(filters, args)
+        return await self._write(f"UPDATE {self.table} SET {assignments} {where} RETURNING *", *args)
+
+    async def _delete(self, filters: Sequence[Tuple[str, Any]]) -> Optional[Row]:
+        args: List[Any] = []
+        where = _where(filters, args)
+        return await self._write(f"DELETE FROM {self.table} {where} RETURNING *", *args)
+
+
+class PostgresAssetRepo(PostgresRepo, AssetRepo):
+    table = "assets"
+
+    async def list(self, tenant_id, status=None, category=None, skip=0, limit=100, after=None) -> List[Row]:
+        args: List[Any] = []
+        where = _where([
+            ("tenant_id = {}", tenant_id),
+            ("status = {}", status),
+            ("category = {}", category),
+            _after(after),
+        ], args)
+        return await self._fetch(f"SELECT * FROM assets {where} {_page(args, skip, limit, after)}", *args)
+
+    async def get(self, tenant_id, asset_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM assets WHERE id = $1 AND tenant_id = $2", asset_id, tenant_id)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def create_many(self, rows) -> List[Row]:
+        return await self._create_many(rows)
+
+    async def existing_tags(self, tenant_id, tags) -> Set[str]:
+        rows = await self._fetch(
+            "SELECT asset_tag FROM assets WHERE tenant_id = $1 AND asset_tag = ANY($2)", tenant_id, list(tags)
+        )
+        return {row["asset_tag"] for row in rows}
+
+    async def upsert_many(self, tenant_id, rows) -> List[Row]:
+        return await self._call("import_assets", tenant_id, list(rows))
+
+    async def set_status_many(self, tenant_id, asset_ids, status) -> List[Row]:
+        return await self._call("bulk_set_asset_status", tenant_id, list(asset_ids), status)
+
+    async def update(self, tenant_id, asset_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", asset_id), ("tenant_id = {}", tenant_id)])
+
+    async def delete(self, tenant_id, asset_id) -> Optional[Row]:
+        return await self._delete([("id = {}", asset_id), ("tenant_id = {}", tenant_id)])
+
+
+class PostgresEmployeeRepo(PostgresRepo, EmployeeRepo):
+    table = "employees"
+
+    async def list(self, tenant_id, department=None, skip=0, limit=100, after=None) -> List[Row]:
+        args: List[Any] = []
+        where = _where([
+            ("tenant_id = {}", tenant_id),
+            ("department = {}", department),
+            _after(after),
+        ], args)
+        return await self._fetch(f"SELECT * FROM employees {where} {_page(args, skip, limit, after)}", *args)
+
+    async def get(self, tenant_id, employee_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM employees WHERE id = $1 AND tenant_id = $2", employee_id, tenant_id)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def create_many(self, rows) -> List[Row]:
+        return await self._create_many(rows)
+
+    async def existing_emails(self, tenant_id, emails) -> Set[str]:
+        rows = await self._fetch(
+            "SELECT email FROM employees WHERE tenant_id = $1 AND email = ANY($2)", tenant_id, list(emails)
+        )
+        return {row["email"] for row in rows}
+
+    async def upsert_many(self, tenant_id, rows) -> List[Row]:
+        return await self._call("import_employees", tenant_id, list(rows))
+
+    async def update(self, tenant_id, employee_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", employee_id), ("tenant_id = {}", tenant_id)])
+
+    async def delete(self, tenant_id, employee_id) -> Optional[Row]:
+        return await self._delete([("id = {}", employee_id), ("tenant_id = {}", tenant_id)])
+
+
+class PostgresAssignmentRepo(PostgresRepo, AssignmentRepo):
+    table = "assignments"
+
+    async def list(
+        self, tenant_id, status=None, asset_id=None, employee_id=None, skip=0, limit=100, after=None
+    ) -> List[Row]:
+        args: List[Any] = []
+        where = _where([
+            ("a.tenant_id = {}", tenant_id),
+            ("a.status = {}", status),
+            ("a.asset_id = {}", asset_id),
+            ("a.employee_id = {}", employee_id),
+            _after(after, prefix="a."),
+        ], args)
+        return await self._fetch(
+            f"{ASSIGNMENT_DETAIL_SELECT} {where} {_page(args, skip, limit, after, prefix='a.')}", *args
+        )
+
+    async def get(self, tenant_id, assignment_id) -> Optional[Row]:
+        return await self._fetchrow(
+            f"{ASSIGNMENT_DETAIL_SELECT} WHERE a.id = $1 AND a.tenant_id = $2", assignment_id, tenant_id
+        )
+
+    async def has_active(self, asset_id=None, employee_id=None) -> bool:
+        args: List[Any] = []
+        where = _where([
+            ("status = {}", "active"),
+            ("asset_id = {}", asset_id),
+            ("employee_id = {}", employee_id),
+        ], args)
+        return await self._fetchval(f"SELECT EXISTS (SELECT 1 FROM assignments {where})", *args)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def assign(self, tenant_id, asset_id, employee_id, assigned_by, assigned_date, notes=None) -> Row:
+        rows = await self._call(
+            "create_assignment", tenant_id, asset_id, employee_id, assigned_by, assigned_date, notes
+        )
+        return rows[0]
+
+    async def assign_many(self, tenant_id, assigned_by, items) -> List[Row]:
+        return await self._call("bulk_create_assignments", tenant_id, assigned_by, list(items))
+
+    async def return_assignment(self, tenant_id, assignment_id, returned_date, notes=None) -> Row:
+        rows = await self._call("return_assignment", tenant_id, assignment_id, returned_date, notes)
+        return rows[0]
+
+    async def return_all_for_employee(self, tenant_id, employee_id, returned_date, notes=None) -> List[Row]:
+        return await self._call("return_employee_assignments", tenant_id, employee_id, returned_date, notes)
+
+    async def update(self, tenant_id, assignment_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", assignment_id), ("tenant_id = {}", tenant_id)])
+
+
+class PostgresAuditRepo(PostgresRepo, AuditRepo):
+    table = "audit_logs"
+
+    async def insert(self, entry) -> None:
+        await self._insert(entry)
+
+    async def insert_many(self, entries) -> None:
+        await self._insert_many(entries, on_conflict="ON CONFLICT (id, created_at) DO NOTHING")
+
+    async def list(
+        self,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip=0,
+        limit=100,
+        after=None
+    ) -> List[Row]:
+        args: List[Any] = []
+        where = _where([
+            ("tenant_id = {}", tenant_id),
+            ("user_id = {}", user_id),
+            ("action = {}", action),
+            ("resource_type = {}", resource_type),
+            ("created_at >= {}", start_date),
+            ("created_at <= {}", end_date),
+            _after(after),
+        ], args)
+        return await self._fetch(f"SELECT * FROM audit_logs {where} {_page(args, skip, limit, after)}", *args)
+
+    async def count(
+        self,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        args: List[Any] = []
+        where = _where([
+            ("tenant_id = {}", tenant_id),
+            ("user_id = {}", user_id),
+            ("action = {}", action),
+            ("resource_type = {}", resource_type),
+            ("created_at >= {}", start_date),
+            ("created_at <= {}", end_date),
+        ], args)
+        return await self._fetchval(f"SELECT COUNT(*) FROM audit_logs {where}", *args)
+
+    async def get(self, log_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM audit_logs WHERE id = $1", log_id)
+
+    async def ensure_partitions(self, months_ahead=3) -> int:
+        return await self._fetchval("SELECT ensure_audit_log_partitions(p_months_ahead => $1)", months_ahead)
+
+    async def list_partitions(self) -> List[Row]:
+        return await self._fetch("SELECT * FROM audit_log_partitions()")
+
+    async def drop_partition(self, month) -> bool:
+        return await self._fetchval("SELECT drop_audit_log_partition($1)", month)
+
+    async def stats(
+        self,
+        start_date,
+        end_date,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        group_by=("action",),
+        bucket=None,
+        limit=1000
+    ) -> List[Row]:
+        return await self._fetch(
+            "SELECT * FROM audit_log_stats($1, $2, $3, $4, $5, $6, $7, $8, $9)",
+            start_date, end_date, tenant_id, user_id, action, resource_type, list(group_by), bucket, limit
+        )
+
+
+class PostgresTenantRepo(PostgresRepo, TenantRepo):
+    table = "tenants"
+
+    async def list(self, skip=0, limit=100) -> List[Row]:
+        return await self._fetch("SELECT * FROM tenants ORDER BY created_at OFFSET $1 LIMIT $2", skip, limit)
+
+    async def get(self, tenant_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM tenants WHERE id = $1", tenant_id)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def signup(self, user_id, email, name, organization_name, slug=None) -> Row:
+        rows = await self._call("signup_tenant", user_id, email, name, organization_name, slug)
+        return rows[0]
+
+    async def update(self, tenant_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", tenant_id)])
+
+
+class PostgresUserRepo(PostgresRepo, UserRepo):
+    table = "users"
+
+    async def list(self, tenant_id=None, skip=0, limit=100, after=None) -> List[Row]:
+        args: List[Any] = []
+        where = _where([
+            ("tenant_id = {}", tenant_id),
+            _after(after, desc=False),
+        ], args)
+        return await self._fetch(
+            f"SELECT * FROM users {where} {_page(args, skip, limit, after, desc=False)}", *args
+        )
+
+    async def get(self, user_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+
+    async def get_profile(self, user_id) -> Optional[Row]:
+        return await self._fetchrow(
+            "SELECT id, email, tenant_id, role, status FROM users WHERE id = $1", user_id
+        )
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def update(self, user_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", user_id)])
+
+
+class PostgresRoleRepo(PostgresRepo, RoleRepo):
+    table = "roles"
+
+    async def list(self, tenant_id) -> List[Row]:
+        return await self._fetch("SELECT * FROM roles WHERE tenant_id = $1 ORDER BY name", tenant_id)
+
+    async def get(self, tenant_id, role_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM roles WHERE id = $1 AND tenant_id = $2", role_id, tenant_id)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def update(self, tenant_id, role_id, data) -> Optional[Row]:
+        return await self._update(data, [("id = {}", role_id), ("tenant_id = {}", tenant_id)])
+
+    async def delete(self, tenant_id, role_id) -> Optional[Row]:
+        return await self._delete([("id = {}", role_id), ("tenant_id = {}", tenant_id)])
+
+
+class PostgresSubscriptionRepo(PostgresRepo, SubscriptionRepo):
+    table = "subscriptions"
+
+    async def get(self, tenant_id) -> Optional[Row]:
+        return await self._fetchrow("SELECT * FROM subscriptions WHERE tenant_id = $1", tenant_id)
+
+    async def create(self, data) -> Optional[Row]:
+        return await self._insert(data)
+
+    async def update(self, tenant_id, data) -> Optional[Row]:
+        return await self._update(data, [("tenant_id = {}", tenant_id)])
+
+    async def list_invoices(self, tenant_id, skip=0, limit=100) -> List[Row]:
+        return await self._fetch(
+            "SELECT * FROM invoices WHERE tenant_id = $1 ORDER BY created_at DESC OFFSET $2 LIMIT $3",
+            tenant_id, skip, limit
+        )
@@ -0,0 +1,437 @@
+import re
+from datetime import datetime
+from typing import List, Optional, Set
+from fastapi.encoders import jsonable_encoder
+from postgrest.exceptions import APIError
+from postgrest.types import CountMethod, ReturnMethod
+from app.database import db
+from app.utils.pagination import Cursor
+from app.repositories.base import (
+    Row, AssetRepo, EmployeeRepo, AssignmentRepo, AuditRepo, TenantRepo, UserRepo, RoleRepo, SubscriptionRepo,
+    RepositoryError, UniqueViolation, ForeignKeyViolation
+)
+
+USER_PROFILE_COLUMNS = "id, email, tenant_id, role, status"
+ASSIGNMENT_DETAIL_COLUMNS = "*, assets(name, asset_tag), employees(name)"
+
+
+async def _rpc(function: str, params: Row) -> List[Row]:
+    """Call a stored procedure, translating RAISE EXCEPTION errors to RepositoryError"""
+    try:
+        response = await db.rpc(function, jsonable_encoder(params)).execute()
+    except APIError as e:
+        if e.code == "P0001" and e.message:
+            raise RepositoryError(e.message, e.details)
+        raise
+    return response.data or []
+
+
+def _constraint_name(error: APIError) -> Optional[str]:
+    """Pull the constraint name out of a PostgreSQL error message"""
+    match = re.search(r'constraint "([^"]+)"', error.message or "")
+    return match.group(1) if match else None
+
+
+async def _write_all(query) -> List[Row]:
+    """Execute an insert/update/delete, translating constraint errors for the routes"""
+    try:
+        response = await query.execute()
+    except APIError as e:
+        if e.code == "23505":
+            raise UniqueViolation(_constraint_name(e))
+        if e.code == "23503":
+            raise ForeignKeyViolation(_constraint_name(e))
+        raise
+    return response.data or []
+
+
+async def _write(query) -> Optional[Row]:
+    rows = await _write_all(query)
+    return rows[0] if rows else None
+
+
+def _page(query, skip: int, limit: int, after: Optional[Cursor], desc: bool = True):
+    """
+    Order by (created_at, id) and select one page, by keyset cursor when given, else by offset.
+
+    PostgREST wants multi-column ordering as one comma-separated order param and
+    the row comparison spelled out as an or= filter, neither of which the query
+    builder exposes, so both are added to the params directly.
+    """
+    direction = "desc" if desc else "asc"
+    query.params = query.params.add("order", f"created_at.{direction},id.{direction}")
+    if not after:
+        # limit/offset params rather than range(), whose Range header is one row short in this client version
+        return query.limit(limit).offset(skip)
+    created_at, row_id = after
+    op = "lt" if desc else "gt"
+    timestamp = f'"{created_at.isoformat()}"'
+    query.params = query.params.add(
+        "or", f"(created_at.{op}.{timestamp},and(created_at.eq.{timestamp},id.{op}.{row_id}))"
+    )
+    return query.limit(limit)
+
+
+def _flatten_assignment(item: Row) -> Row:
+    """Flatten embedded asset/employee objects to match AssignmentWithDetails"""
+    assignment = item.copy()
+    if item.get("assets"):
+        assignment["asset_name"] = item["assets"].get("name")
+        assignment["asset_tag"] = item["assets"].get("asset_tag")
+    if item.get("employees"):
+        assignment["employee_name"] = item["employees"].get("name")
+    # Remove nested objects
+    assignment.pop("assets", None)
+    assignment.pop("employees", None)
+    return assignment
+
+
+class PostgrestAssetRepo(AssetRepo):
+    async def list(self, tenant_id, status=None, category=None, skip=0, limit=100, after=None) -> List[Row]:
+        query = db.table("assets").select("*").eq("tenant_id", str(tenant_id))
+        if status:
+            query = query.eq("status", status)
+        if category:
+            query = query.eq("category", category)
+        response = await _page(query, skip, limit, after).execute()
+        return response.data
+
+    async def get(self, tenant_id, asset_id) -> Optional[Row]:
+        response = await db.table("assets").select("*").eq("id", str(asset_id)).eq("tenant_id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        return await _write(db.table("assets").insert(jsonable_encoder(data)))
+
+    async def create_many(self, rows) -> List[Row]:
+        if not rows:
+            return []
+        return await _write_all(db.table("assets").insert(jsonable_encoder(list(rows))))
+
+    async def existing_tags(self, tenant_id, tags) -> Set[str]:
+        if not tags:
+            return set()
+        response = await db.table("assets").select("asset_tag").eq("tenant_id", str(tenant_id)).in_("asset_tag", list(tags)).execute()
+        return {row["asset_tag"] for row in response.data}
+
+    async def upsert_many(self, tenant_id, rows) -> List[Row]:
+        return await _rpc("import_assets", {"p_tenant_id": tenant_id, "p_rows": list(rows)})
+
+    async def set_status_many(self, tenant_id, asset_ids, status) -> List[Row]:
+        return await _rpc("bulk_set_asset_status", {
+            "p_tenant_id": tenant_id,
+            "p_asset_ids": list(asset_ids),
+            "p_status": status,
+        })
+
+    async def update(self, tenant_id, asset_id, data) -> Optional[Row]:
+        return await _write(
+            db.table("assets").update(jsonable_encoder(data)).eq("id", str(asset_id)).eq("tenant_id", str(tenant_id))
+        )
+
+    async def delete(self, tenant_id, asset_id) -> Optional[Row]:
+        return await _write(db.table("assets").delete().eq("id", str(asset_id)).eq("tenant_id", str(tenant_id)))
+
+
+class PostgrestEmployeeRepo(EmployeeRepo):
+    async def list(self, tenant_id, department=None, skip=0, limit=100, after=None) -> List[Row]:
+        query = db.table("employees").select("*").eq("tenant_id", str(tenant_id))
+        if department:
+            query = query.eq("department", department)
+        response = await _page(query, skip, limit, after).execute()
+        return response.data
+
+    async def get(self, tenant_id, employee_id) -> Optional[Row]:
+        response = await db.table("employees").select("*").eq("id", str(employee_id)).eq("tenant_id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        return await _write(db.table("employees").insert(jsonable_encoder(data)))
+
+    async def create_many(self, rows) -> List[Row]:
+        if not rows:
+            return []
+        return await _write_all(db.table("employees").insert(jsonable_encoder(list(rows))))
+
+    async def existing_emails(self, tenant_id, emails) -> Set[str]:
+        if not emails:
+            return set()
+        response = await db.table("employees").select("email").eq("tenant_id", str(tenant_id)).in_("email", list(emails)).execute()
+        return {row["email"] for row in response.data}
+
+    async def upsert_many(self, tenant_id, rows) -> List[Row]:
+        return await _rpc("import_employees", {"p_tenant_id": tenant_id, "p_rows": list(rows)})
+
+    async def update(self, tenant_id, employee_id, data) -> Optional[Row]:
+        return await _write(
+            db.table("employees").update(jsonable_encoder(data)).eq("id", str(employee_id)).eq("tenant_id", str(tenant_id))
+        )
+
+    async def delete(self, tenant_id, employee_id) -> Optional[Row]:
+        return await _write(db.table("employees").delete().eq("id", str(employee_id)).eq("tenant_id", str(tenant_id)))
+
+
+class PostgrestAssignmentRepo(AssignmentRepo):
+    async def list(
+        self, tenant_id, status=None, asset_id=None, employee_id=None, skip=0, limit=100, after=None
+    ) -> List[Row]:
+        query = db.table("assignments").select(ASSIGNMENT_DETAIL_COLUMNS).eq("tenant_id", str(tenant_id))
+        if status:
+            query = query.eq("status", status)
+        if asset_id:
+            query = query.eq("asset_id", str(asset_id))
+        if employee_id:
+            query = query.eq("employee_id", str(employee_id))
+        response = await _page(query, skip, limit, after).execute()
+        return [_flatten_assignment(item) for item in response.data]
+
+    async def get(self, tenant_id, assignment_id) -> Optional[Row]:
+        response = await db.table("assignments").select(
+            ASSIGNMENT_DETAIL_COLUMNS
+        ).eq("id", str(assignment_id)).eq("tenant_id", str(tenant_id)).execute()
+        return _flatten_assignment(response.data[0]) if response.data else None
+
+    async def has_active(self, asset_id=None, employee_id=None) -> bool:
+        query = db.table("assignments").select("id").eq("status", "active")
+        if asset_id:
+            query = query.eq("asset_id", str(asset_id))
+        if employee_id:
+            query = query.eq("employee_id", str(employee_id))
+        response = await query.limit(1).execute()
+        return bool(response.data)
+
+    async def create(self, data) -> Optional[Row]:
+        response = await db.table("assignments").insert(jsonable_encoder(data)).execute()
+        return response.data[0] if response.data else None
+
+    async def assign(self, tenant_id, asset_id, employee_id, assigned_by, assigned_date, notes=None) -> Row:
+        rows = await _rpc("create_assignment", {
+            "p_tenant_id": tenant_id,
+            "p_asset_id": asset_id,
+            "p_employee_id": employee_id,
+            "p_assigned_by": assigned_by,
+            "p_assigned_date": assigned_date,
+            "p_notes": notes,
+        })
+        return rows[0]
+
+    async def assign_many(self, tenant_id, assigned_by, items) -> List[Row]:
+        return await _rpc("bulk_create_assignments", {
+            "p_tenant_id": tenant_id,
+            "p_assigned_by": assigned_by,
+            "p_items": list(items),
+        })
+
+    async def return_assignment(self, tenant_id, assignment_id, returned_date, notes=None) -> Row:
+        rows = await _rpc("return_assignment", {
+            "p_tenant_id": tenant_id,
+            "p_assignment_id": assignment_id,
+            "p_returned_date": returned_date,
+            "p_notes": notes,
+        })
+        return rows[0]
+
+    async def return_all_for_employee(self, tenant_id, employee_id, returned_date, notes=None) -> List[Row]:
+        return await _rpc("return_employee_assignments", {
+            "p_tenant_id": tenant_id,
+            "p_employee_id": employee_id,
+            "p_returned_date": returned_date,
+            "p_notes": notes,
+        })
+
+    async def update(self, tenant_id, assignment_id, data) -> Optional[Row]:
+        response = await db.table("assignments").update(jsonable_encoder(data)).eq("id", str(assignment_id)).eq("tenant_id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+
+class PostgrestAuditRepo(AuditRepo):
+    async def insert(self, entry) -> None:
+        await db.table("audit_logs").insert(jsonable_encoder(entry)).execute()
+
+    async def insert_many(self, entries) -> None:
+        if entries:
+            await db.table("audit_logs").upsert(
+                jsonable_encoder(entries), ignore_duplicates=True, on_conflict="id,created_at", returning=ReturnMethod.minimal
+            ).execute()
+
+    async def list(
+        self,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip=0,
+        limit=100,
+        after=None
+    ) -> List[Row]:
+        query = self._filter(
+            db.table("audit_logs").select("*"), tenant_id, user_id, action, resource_type, start_date, end_date
+        )
+        response = await _page(query, skip, limit, after).execute()
+        return response.data
+
+    async def count(
+        self,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        query = self._filter(
+            db.table("audit_logs").select("id", count=CountMethod.exact),
+            tenant_id, user_id, action, resource_type, start_date, end_date
+        )
+        response = await query.limit(1).execute()
+        return response.count or 0
+
+    @staticmethod
+    def _filter(query, tenant_id, user_id, action, resource_type, start_date, end_date):
+        if tenant_id:
+            query = query.eq("tenant_id", str(tenant_id))
+        if user_id:
+            query = query.eq("user_id", str(user_id))
+        if action:
+            query = query.eq("action", action)
+        if resource_type:
+            query = query.eq("resource_type", resource_type)
+        if start_date:
+            query = query.gte("created_at", start_date.isoformat())
+        if end_date:
+            query = query.lte("created_at", end_date.isoformat())
+        return query
+
+    async def get(self, log_id) -> Optional[Row]:
+        response = await db.table("audit_logs").select("*").eq("id", str(log_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def ensure_partitions(self, months_ahead=3) -> int:
+        response = await db.rpc("ensure_audit_log_partitions", {"p_months_ahead": months_ahead}).execute()
+        return response.data or 0
+
+    async def list_partitions(self) -> List[Row]:
+        return await _rpc("audit_log_partitions", {})
+
+    async def drop_partition(self, month) -> bool:
+        response = await db.rpc("drop_audit_log_partition", {"p_month": month.isoformat()}).execute()
+        return bool(response.data)
+
+    async def stats(
+        self,
+        start_date,
+        end_date,
+        tenant_id=None,
+        user_id=None,
+        action=None,
+        resource_type=None,
+        group_by=("action",),
+        bucket=None,
+        limit=1000
+    ) -> List[Row]:
+        return await _rpc("audit_log_stats", {
+            "p_start": start_date,
+            "p_end": end_date,
+            "p_tenant_id": tenant_id,
+            "p_user_id": user_id,
+            "p_action": action,
+            "p_resource_type": resource_type,
+            "p_group_by": list(group_by),
+            "p_bucket": bucket,
+            "p_limit": limit,
+        })
+
+
+class PostgrestTenantRepo(TenantRepo):
+    async def list(self, skip=0, limit=100) -> List[Row]:
+        # limit/offset params rather than range() (see _page)
+        response = await db.table("tenants").select("*").order("created_at").limit(limit).offset(skip).execute()
+        return response.data
+
+    async def get(self, tenant_id) -> Optional[Row]:
+        response = await db.table("tenants").select("*").eq("id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        response = await db.table("tenants").insert(jsonable_encoder(data)).execute()
+        return response.data[0] if response.data else None
+
+    async def signup(self, user_id, email, name, organization_name, slug=None) -> Row:
+        rows = await _rpc("signup_tenant", {
+            "p_user_id": user_id,
+            "p_email": email,
+            "p_name": name,
+            "p_organization_name": organization_name,
+            "p_slug": slug,
+        })
+        return rows[0]
+
+    async def update(self, tenant_id, data) -> Optional[Row]:
+        response = await db.table("tenants").update(jsonable_encoder(data)).eq("id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+
+class PostgrestUserRepo(UserRepo):
+    async def list(self, tenant_id=None, skip=0, limit=100, after=None) -> List[Row]:
+        query = db.table("users").select("*")
+        if tenant_id:
+            query = query.eq("tenant_id", str(tenant_id))
+        response = await _page(query, skip, limit, after, desc=False).execute()
+        return response.data
+
+    async def get(self, user_id) -> Optional[Row]:
+        response = await db.table("users").select("*").eq("id", str(user_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def get_profile(self, user_id) -> Optional[Row]:
+        response = await db.table("users").select(USER_PROFILE_COLUMNS).eq("id", str(user_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        response = await db.table("users").insert(jsonable_encoder(data)).execute()
+        return response.data[0] if response.data else None
+
+    async def update(self, user_id, data) -> Optional[Row]:
+        response = await db.table("users").update(jsonable_encoder(data)).eq("id", str(user_id)).execute()
+        return response.data[0] if response.data else None
+
+
+class PostgrestRoleRepo(RoleRepo):
+    async def list(self, tenant_id) -> List[Row]:
+        response = await db.table("roles").select("*").eq("tenant_id", str(tenant_id)).order("name").execute()
+        return response.data
+
+    async def get(self, tenant_id, role_id) -> Optional[Row]:
+        response = await db.table("roles").select("*").eq("id", str(role_id)).eq("tenant_id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        return await _write(db.table("roles").insert(jsonable_encoder(data)))
+
+    async def update(self, tenant_id, role_id, data) -> Optional[Row]:
+        return await _write(
+            db.table("roles").update(jsonable_encoder(data)).eq("id", str(role_id)).eq("tenant_id", str(tenant_id))
+        )
+
+    async def delete(self, tenant_id, role_id) -> Optional[Row]:
+        return await _write(db.table("roles").delete().eq("id", str(role_id)).eq("tenant_id", str(tenant_id)))
+
+
+class PostgrestSubscriptionRepo(SubscriptionRepo):
+    async def get(self, tenant_id) -> Optional[Row]:
+        response = await db.table("subscriptions").select("*").eq("tenant_id", str(tenant_id)).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, data) -> Optional[Row]:
+        return await _write(db.table("subscriptions").insert(jsonable_encoder(data)))
+
+    async def update(self, tenant_id, data) -> Optional[Row]:
+        return await _write(db.table("subscriptions").update(jsonable_encoder(data)).eq("tenant_id", str(tenant_id)))
+
+    async def list_invoices(self, tenant_id, skip=0, limit=100) -> List[Row]:
+        query = db.table("invoices").select("*").eq("tenant_id", str(tenant_id)).order("created_at", desc=True)
+        # limit/offset params rather than range() (see _page)
+        response = await query.limit(limit).offset(skip).execute()
+        return response.data
@@ -1,155 +1,310 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from typing import Any, List, Literal, Optional
 from uuid import UUID
-from app.database import supabase
-from app.models.asset import Asset, AssetCreate, AssetUpdate
-from app.dependencies import get_user, get_tenant
+from datetime import datetime, timezone
+from app.repositories import repos, UniqueViolation, ForeignKeyViolation
+from app.config import settings
+from app.models.asset import Asset, AssetBulkStatus, AssetCreate, AssetImport, AssetUpdate
+from app.models.bulk import BulkCreateResult, BulkItemResult, BulkUpdateResult
+from app.models.imports import ImportJob
+from app.dependencies import get_tenant, require_permission
 from app.models.user import User
-from app.utils.permissions import Resource, Action, has_permission
+from app.utils.permissions import Resource, Action
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.utils.cache import list_cache
+from app.utils.etag import not_modified
+from app.utils.export import export_response, paged_rows
+from app.utils.bulk import bulk_create
+from app.utils.imports import import_manager, IMPORT_REQUEST_BODY
 
 router = APIRouter(prefix="/assets", tags=["assets"])
 
+# Export columns with their Parquet (DuckDB) types
+EXPORT_COLUMNS = {
+    "id": "VARCHAR",
+    "tenant_id": "VARCHAR",
+    "asset_tag": "VARCHAR",
+    "name": "VARCHAR",
+    "category": "VARCHAR",
+    "brand": "VARCHAR",
+    "model": "VARCHAR",
+    "serial_number": "VARCHAR",
+    "purchase_date": "DATE",
+    "purchase_price": "DECIMAL(10, 2)",
+    "status": "VARCHAR",
+    "notes": "VARCHAR",
+    "created_at": "TIMESTAMPTZ",
+    "updated_at": "TIMESTAMPTZ",
+}
+
+# bulk_set_asset_status error codes -> per-item error
+BULK_STATUS_ERRORS = {
+    "asset_not_found": "Asset not found",
+    "asset_assigned": "Asset has an active assignment",
+}
+
 
 @router.get("", response_model=List[Asset])
 async def get_assets(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: str = None,
     category: str = None,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.READ))
 ):
-    """Get all assets with optional filtering (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSETS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    """Get all assets with optional filtering (tenant-scoped), paged by skip or by cursor"""
+    after = decode_cursor(cursor)
+    params = {"status": status, "category": category, "skip": skip, "limit": limit, "cursor": cursor}
+    # Answer polls with 304 straight from the tenant version, before any query runs
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "assets", params))
+    if unchanged:
+        return unchanged
     
-    query = supabase.table("assets").select("*").eq("tenant_id", str(tenant_id))
-    
-    if status:
-        query = query.eq("status", status)
-    if category:
-        query = query.eq("category", category)
+    assets = await list_cache.get_or_load(
+        tenant_id,
+        "assets",
+        params,
+        lambda: repos.assets.list(tenant_id, status=status, category=category, skip=skip, limit=limit, after=after)
+    )
+    set_next_cursor(response, assets, limit)
+    return assets
+
+
+@router.get("/export")
+async def export_assets(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    compress: bool = True,
+    status: str = None,
+    category: str = None,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.READ))
+):
+    """Stream every matching asset as a CSV or NDJSON (gzipped by default) or Parquet download"""
+    async def fetch_page(after, limit):
+        return await repos.assets.list(tenant_id, status=status, category=category, limit=limit, after=after)
     
-    query = query.order("created_at", desc=True).range(skip, skip + limit - 1)
-    response = query.execute()
+    try:
+        # Pages through the assets by cursor while the response streams, so memory stays flat
+        rows = await paged_rows(fetch_page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export assets: {str(e)}")
     
-    return response.data
+    filename = f"assets-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+    return export_response(
+        rows, format, list(EXPORT_COLUMNS), filename, compress=compress, column_types=EXPORT_COLUMNS
+    )
 
 
 @router.get("/{asset_id}", response_model=Asset)
 async def get_asset(
     asset_id: UUID,
+    request: Request,
+    response: Response,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.READ))
 ):
     """Get a specific asset by ID (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSETS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "asset", {"id": asset_id}))
+    if unchanged:
+        return unchanged
     
-    response = supabase.table("assets").select("*").eq("id", str(asset_id)).eq("tenant_id", str(tenant_id)).execute()
+    asset = await repos.assets.get(tenant_id, asset_id)
     
-    if not response.data:
+    if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    return response.data[0]
+    return asset
 
 
 @router.post("", response_model=Asset, status_code=201)
 async def create_asset(
     asset: AssetCreate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.CREATE))
 ):
     """Create a new asset (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSETS, Action.CREATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
-        # Check if asset_tag already exists in this tenant
-        existing = supabase.table("assets").select("id").eq("asset_tag", asset.asset_tag).eq("tenant_id", str(tenant_id)).execute()
-        if existing.data:
-            raise HTTPException(status_code=400, detail="Asset tag already exists")
-        
         asset_dict = asset.model_dump()
-        asset_dict["tenant_id"] = str(tenant_id)  # Auto-inject tenant_id
-        # Convert date objects to strings for Supabase
-        if asset_dict.get("purchase_date") and hasattr(asset_dict["purchase_date"], "isoformat"):
-            asset_dict["purchase_date"] = asset_dict["purchase_date"].isoformat()
+        asset_dict["tenant_id"] = tenant_id  # Auto-inject tenant_id
         
-        response = supabase.table("assets").insert(asset_dict).execute()
+        # The (tenant_id, asset_tag) unique index rejects duplicate tags
+        try:
+            created = await repos.assets.create(asset_dict)
+        except UniqueViolation:
+            raise HTTPException(status_code=400, detail="Asset tag already exists")
+        await list_cache.bump(tenant_id)
         
-        if not response.data:
-            error_msg = "Failed to create asset"
-            if hasattr(response, 'error') and response.error:
-                error_msg = f"Failed to create asset: {response.error}"
-            raise HTTPException(status_code=400, detail=error_msg)
+        if not created:
+            raise HTTPException(status_code=400, detail="Failed to create asset")
         
-        return response.data[0]
+        return created
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create asset: {str(e)}")
 
 
+@router.post("/bulk", response_model=BulkCreateResult)
+async def bulk_create_assets(
+    items: List[Any] = Body(...),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.CREATE))
+):
+    """Create many assets at once; each item is validated and created or rejected on its own"""
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per request")
+    
+    result = await bulk_create(
+        tenant_id,
+        items,
+        AssetCreate,
+        key="asset_tag",
+        existing=repos.assets.existing_tags,
+        create_many=repos.assets.create_many,
+        create=repos.assets.create,
+        duplicate_error="Asset tag already exists",
+        chunk_size=settings.bulk_chunk_size
+    )
+    if result.created:
+        await list_cache.bump(tenant_id)
+    
+    return result
+
+
+@router.patch("/bulk-status", response_model=BulkUpdateResult)
+async def bulk_update_asset_status(
+    update: AssetBulkStatus,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.UPDATE))
+):
+    """Move many assets to a new status in one statement, refusing assets with an active assignment"""
+    if len(update.asset_ids) > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per request")
+    
+    asset_ids = list(dict.fromkeys(update.asset_ids))
+    try:
+        rows = await repos.assets.set_status_many(tenant_id, asset_ids, update.status)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to update assets: {str(e)}")
+    
+    errors = {UUID(str(row["asset_id"])): row["error_code"] for row in rows}
+    results = []
+    seen = set()
+    for i, asset_id in enumerate(update.asset_ids):
+        code = errors.get(asset_id, "asset_not_found")
+        if asset_id in seen:
+            results.append(BulkItemResult(index=i, status="failed", id=asset_id, error="Duplicate asset_id in request"))
+        elif code:
+            error = BULK_STATUS_ERRORS.get(code, code)
+            results.append(BulkItemResult(index=i, status="failed", id=asset_id, error=error))
+        else:
+            results.append(BulkItemResult(index=i, status="updated", id=asset_id))
+        seen.add(asset_id)
+    
+    updated = sum(1 for r in results if r.status == "updated")
+    if updated:
+        await list_cache.bump(tenant_id)
+    
+    return BulkUpdateResult(updated=updated, failed=len(results) - updated, results=results)
+
+
+@router.post(
+    "/import",
+    response_model=ImportJob,
+    status_code=202,
+    dependencies=[Depends(require_permission(Resource.ASSETS, Action.UPDATE))],
+    openapi_extra=IMPORT_REQUEST_BODY
+)
+async def import_assets(
+    request: Request,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.CREATE))
+):
+    """Import assets from an uploaded CSV or XLSX file (field "file"), upserting by asset_tag"""
+    return await import_manager.start_import(
+        request, tenant_id, "assets", AssetImport, "asset_tag", repos.assets.upsert_many
+    )
+
+
+@router.get("/imports/{job_id}", response_model=ImportJob)
+async def get_asset_import(
+    job_id: UUID,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.READ))
+):
+    """Progress and counts of an asset import"""
+    job = await import_manager.get(tenant_id, "assets", job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+
+@router.get("/imports/{job_id}/errors")
+async def get_asset_import_errors(
+    job_id: UUID,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.READ))
+):
+    """CSV report of the rows an asset import rejected (row number, key, error), written as the import runs"""
+    job = await import_manager.get(tenant_id, "assets", job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    
+    path = import_manager.error_report_path(job)
+    if not path.exists():
+        # Reports are kept on the worker that ran the import
+        raise HTTPException(status_code=404, detail="Error report not available")
+    
+    return FileResponse(path, media_type="text/csv", filename=f"asset-import-{job_id}-errors.csv")
+
+
 @router.put("/{asset_id}", response_model=Asset)
 async def update_asset(
     asset_id: UUID,
     asset_update: AssetUpdate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.UPDATE))
 ):
     """Update an existing asset (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSETS, Action.UPDATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Check if asset exists and belongs to tenant
-    existing = supabase.table("assets").select("*").eq("id", str(asset_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not existing.data:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    # Check if asset_tag is being updated and if it already exists in this tenant
     update_dict = asset_update.model_dump(exclude_unset=True)
-    if "asset_tag" in update_dict:
-        tag_check = supabase.table("assets").select("id").eq("asset_tag", update_dict["asset_tag"]).eq("tenant_id", str(tenant_id)).neq("id", str(asset_id)).execute()
-        if tag_check.data:
+    if not update_dict:
+        updated = await repos.assets.get(tenant_id, asset_id)
+    else:
+        # Tenant-filtered UPDATE ... RETURNING: no row means the asset is not in this tenant
+        try:
+            updated = await repos.assets.update(tenant_id, asset_id, update_dict)
+        except UniqueViolation:
             raise HTTPException(status_code=400, detail="Asset tag already exists")
+        await list_cache.bump(tenant_id)
     
-    response = supabase.table("assets").update(update_dict).eq("id", str(asset_id)).execute()
-    
-    if not response.data:
-        raise HTTPException(status_code=400, detail="Failed to update asset")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Asset not found")
     
-    return response.data[0]
+    return updated
 
 
 @router.delete("/{asset_id}", status_code=204)
 async def delete_asset(
     asset_id: UUID,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSETS, Action.DELETE))
 ):
     """Delete an asset (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSETS, Action.DELETE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Verify asset belongs to tenant
-    asset_check = supabase.table("assets").select("id").eq("id", str(asset_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not asset_check.data:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    # Check if asset has active assignments
-    active_assignments = supabase.table("assignments").select("id").eq("asset_id", str(asset_id)).eq("status", "active").execute()
-    if active_assignments.data:
-        raise HTTPException(status_code=400, detail="Cannot delete asset with active assignments")
-    
-    response = supabase.table("assets").delete().eq("id", str(asset_id)).execute()
+    # Assignments reference assets ON DELETE RESTRICT, so the delete itself refuses assigned assets
+    try:
+        deleted = await repos.assets.delete(tenant_id, asset_id)
+    except ForeignKeyViolation:
+        if await repos.assignments.has_active(asset_id=asset_id):
+            raise HTTPException(status_code=400, detail="Cannot delete asset with active assignments")
+        raise HTTPException(status_code=400, detail="Cannot delete asset with assignment history")
+    await list_cache.bump(tenant_id)
     
-    if not response.data:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Asset not found")
     
     return None
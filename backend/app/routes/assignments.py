@@ -1,90 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from typing import Any, List, Literal, Optional
 from uuid import UUID
-from datetime import date
-from app.database import supabase
+from datetime import date, datetime, timezone
+from app.repositories import repos, RepositoryError
 from app.models.assignment import Assignment, AssignmentCreate, AssignmentReturn, AssignmentWithDetails
-from app.dependencies import get_user, get_tenant
+from app.models.bulk import BulkCreateResult, BulkItemResult
+from app.config import settings
+from app.dependencies import get_tenant, require_permission
 from app.models.user import User
-from app.utils.permissions import Resource, Action, has_permission
+from app.utils.permissions import Resource, Action
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.utils.cache import list_cache
+from app.utils.etag import not_modified
+from app.utils.export import export_response, paged_rows
+from app.utils.bulk import created_result, validate_items
 
 router = APIRouter(prefix="/assignments", tags=["assignments"])
 
+# Export columns with their Parquet (DuckDB) types
+EXPORT_COLUMNS = {
+    "id": "VARCHAR",
+    "tenant_id": "VARCHAR",
+    "asset_id": "VARCHAR",
+    "asset_tag": "VARCHAR",
+    "asset_name": "VARCHAR",
+    "employee_id": "VARCHAR",
+    "employee_name": "VARCHAR",
+    "assigned_by": "VARCHAR",
+    "assigned_date": "DATE",
+    "returned_date": "DATE",
+    "status": "VARCHAR",
+    "notes": "VARCHAR",
+    "created_at": "TIMESTAMPTZ",
+    "updated_at": "TIMESTAMPTZ",
+}
+
+# Stored procedure error codes -> (status code, detail)
+ASSIGNMENT_ERRORS = {
+    "asset_not_found": (404, "Asset not found"),
+    "employee_not_found": (404, "Employee not found"),
+    "asset_already_assigned": (400, "Asset already has an active assignment"),
+    "assignment_not_found": (404, "Assignment not found"),
+    "assignment_not_active": (400, "Assignment is not active"),
+}
+
+
+def assignment_error(error: RepositoryError, fallback: str = "Failed to create assignment") -> HTTPException:
+    """Map a stored procedure error to the matching HTTP response"""
+    if error.code == "asset_unavailable":
+        return HTTPException(status_code=400, detail=f"Cannot assign asset with status: {error.detail}")
+    status_code, detail = ASSIGNMENT_ERRORS.get(error.code, (400, f"{fallback}: {error}"))
+    return HTTPException(status_code=status_code, detail=detail)
+
 
 @router.get("", response_model=List[AssignmentWithDetails])
 async def get_assignments(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: str = None,
     asset_id: UUID = None,
     employee_id: UUID = None,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.READ))
 ):
-    """Get all assignments with optional filtering (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSIGNMENTS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    query = supabase.table("assignments").select(
-        "*, assets(name, asset_tag), employees(name)"
-    ).eq("tenant_id", str(tenant_id))
-    
-    if status:
-        query = query.eq("status", status)
-    if asset_id:
-        query = query.eq("asset_id", str(asset_id))
-    if employee_id:
-        query = query.eq("employee_id", str(employee_id))
-    
-    query = query.order("created_at", desc=True).range(skip, skip + limit - 1)
-    response = query.execute()
+    """Get all assignments with optional filtering (tenant-scoped), paged by skip or by cursor"""
+    after = decode_cursor(cursor)
+    params = {
+        "status": status,
+        "asset_id": asset_id,
+        "employee_id": employee_id,
+        "skip": skip,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    # Answer polls with 304 straight from the tenant version, before any query runs
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "assignments", params))
+    if unchanged:
+        return unchanged
+    
+    assignments = await list_cache.get_or_load(
+        tenant_id,
+        "assignments",
+        params,
+        lambda: repos.assignments.list(
+            tenant_id,
+            status=status,
+            asset_id=asset_id,
+            employee_id=employee_id,
+            skip=skip,
+            limit=limit,
+            after=after
+        )
+    )
+    set_next_cursor(response, assignments, limit)
+    return assignments
+
+
+@router.get("/export")
+async def export_assignments(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    compress: bool = True,
+    status: str = None,
+    asset_id: UUID = None,
+    employee_id: UUID = None,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.READ))
+):
+    """Stream every matching assignment as a CSV or NDJSON (gzipped by default) or Parquet download"""
+    async def fetch_page(after, limit):
+        return await repos.assignments.list(tenant_id, status=status, asset_id=asset_id, employee_id=employee_id, limit=limit, after=after)
     
-    # Transform the response to match AssignmentWithDetails model
-    assignments = []
-    for item in response.data:
-        assignment = item.copy()
-        if item.get("assets"):
-            assignment["asset_name"] = item["assets"].get("name")
-            assignment["asset_tag"] = item["assets"].get("asset_tag")
-        if item.get("employees"):
-            assignment["employee_name"] = item["employees"].get("name")
-        # Remove nested objects
-        assignment.pop("assets", None)
-        assignment.pop("employees", None)
-        assignments.append(assignment)
+    try:
+        # Pages through the assignments by cursor while the response streams, so memory stays flat
+        rows = await paged_rows(fetch_page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export assignments: {str(e)}")
     
-    return assignments
+    filename = f"assignments-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+    return export_response(
+        rows, format, list(EXPORT_COLUMNS), filename, compress=compress, column_types=EXPORT_COLUMNS
+    )
 
 
 @router.get("/{assignment_id}", response_model=AssignmentWithDetails)
 async def get_assignment(
     assignment_id: UUID,
+    request: Request,
+    response: Response,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.READ))
 ):
     """Get a specific assignment by ID (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSIGNMENTS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "assignment", {"id": assignment_id}))
+    if unchanged:
+        return unchanged
     
-    response = supabase.table("assignments").select(
-        "*, assets(name, asset_tag), employees(name)"
-    ).eq("id", str(assignment_id)).eq("tenant_id", str(tenant_id)).execute()
+    assignment = await repos.assignments.get(tenant_id, assignment_id)
     
-    if not response.data:
+    if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     
-    item = response.data[0]
-    assignment = item.copy()
-    if item.get("assets"):
-        assignment["asset_name"] = item["assets"].get("name")
-        assignment["asset_tag"] = item["assets"].get("asset_tag")
-    if item.get("employees"):
-        assignment["employee_name"] = item["employees"].get("name")
-    assignment.pop("assets", None)
-    assignment.pop("employees", None)
-    
     return assignment
 
 
@@ -92,105 +150,83 @@ async def get_assignment(
 async def create_assignment(
     assignment: AssignmentCreate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.CREATE))
 ):
     """Assign an asset to an employee (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSIGNMENTS, Action.CREATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Check if asset exists and belongs to tenant
-    asset_response = supabase.table("assets").select("*").eq("id", str(assignment.asset_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not asset_response.data:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    asset = asset_response.data[0]
-    if asset["status"] not in ["available", "assigned"]:
-        raise HTTPException(status_code=400, detail=f"Cannot assign asset with status: {asset['status']}")
-    
-    # Check if employee exists and belongs to tenant
-    employee_response = supabase.table("employees").select("id").eq("id", str(assignment.employee_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not employee_response.data:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Check for active assignments for this asset
-    active_assignments = supabase.table("assignments").select("id").eq("asset_id", str(assignment.asset_id)).eq("status", "active").execute()
-    if active_assignments.data:
-        raise HTTPException(status_code=400, detail="Asset already has an active assignment")
-    
-    assignment_dict = assignment.model_dump()
-    assignment_dict["assigned_by"] = str(current_user.id)
-    assignment_dict["tenant_id"] = str(tenant_id)  # Auto-inject tenant_id
-    assignment_dict["status"] = "active"
-    
-    # Convert UUIDs to strings for Supabase
-    assignment_dict["asset_id"] = str(assignment_dict["asset_id"])
-    assignment_dict["employee_id"] = str(assignment_dict["employee_id"])
-    
-    # Convert date to string for Supabase
-    if assignment_dict.get("assigned_date") and hasattr(assignment_dict["assigned_date"], "isoformat"):
-        assignment_dict["assigned_date"] = assignment_dict["assigned_date"].isoformat()
-    
     try:
-        # Create assignment
-        response = supabase.table("assignments").insert(assignment_dict).execute()
-        
-        # Check for errors in the response
-        if hasattr(response, 'error') and response.error:
-            error_msg = str(response.error)
-            raise HTTPException(status_code=400, detail=f"Failed to create assignment: {error_msg}")
-        
-        if not response.data:
-            raise HTTPException(status_code=400, detail="Failed to create assignment - no data returned")
-        
-        # Update asset status
-        supabase.table("assets").update({"status": "assigned"}).eq("id", str(assignment.asset_id)).execute()
-        
-        return response.data[0]
-    except HTTPException:
-        raise
+        # Validate, insert and flip the asset status in one transaction
+        created = await repos.assignments.assign(
+            tenant_id,
+            assignment.asset_id,
+            assignment.employee_id,
+            assigned_by=current_user.id,
+            assigned_date=assignment.assigned_date,
+            notes=assignment.notes
+        )
+        await list_cache.bump(tenant_id)
+        return created
+    except RepositoryError as e:
+        raise assignment_error(e)
     except Exception as e:
         error_msg = str(e)
         raise HTTPException(status_code=400, detail=f"Failed to create assignment: {error_msg}")
 
 
+@router.post("/bulk", response_model=BulkCreateResult)
+async def bulk_create_assignments(
+    items: List[Any] = Body(...),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.CREATE))
+):
+    """Assign many assets at once; the valid items are created together and the rest rejected per item"""
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per request")
+    
+    results, pending = validate_items(items, AssignmentCreate, key="asset_id", mode="json")
+    if pending:
+        try:
+            # Check every item, insert the assignments and flip the asset statuses in one transaction
+            rows = await repos.assignments.assign_many(
+                tenant_id, current_user.id, [{"idx": i, **row} for i, row in pending]
+            )
+        except RepositoryError as e:
+            raise assignment_error(e, "Failed to create assignments")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to create assignments: {str(e)}")
+        
+        for row in rows:
+            i = row["item_index"]
+            if row["error_code"]:
+                error = assignment_error(RepositoryError(row["error_code"], row["error_detail"]))
+                results[i] = BulkItemResult(index=i, status="failed", error=error.detail)
+            else:
+                results[i] = BulkItemResult(index=i, id=row["assignment_id"])
+    
+    result = created_result(results)
+    if result.created:
+        await list_cache.bump(tenant_id)
+    
+    return result
+
+
 @router.put("/{assignment_id}/return", response_model=Assignment)
 async def return_assignment(
     assignment_id: UUID,
     return_data: AssignmentReturn,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.UPDATE))
 ):
     """Return an assigned asset (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.ASSIGNMENTS, Action.UPDATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Get assignment and verify it belongs to tenant
-    assignment_response = supabase.table("assignments").select("*").eq("id", str(assignment_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not assignment_response.data:
-        raise HTTPException(status_code=404, detail="Assignment not found")
-    
-    assignment = assignment_response.data[0]
-    if assignment["status"] != "active":
-        raise HTTPException(status_code=400, detail="Assignment is not active")
-    
-    # Update assignment
-    return_date = return_data.returned_date or date.today()
-    update_dict = {
-        "status": "returned",
-        "returned_date": return_date.isoformat()
-    }
-    if return_data.notes:
-        update_dict["notes"] = return_data.notes
-    
-    response = supabase.table("assignments").update(update_dict).eq("id", str(assignment_id)).execute()
-    
-    if not response.data:
-        raise HTTPException(status_code=400, detail="Failed to return assignment")
-    
-    # Update asset status to available
-    supabase.table("assets").update({"status": "available"}).eq("id", assignment["asset_id"]).execute()
-    
-    return response.data[0]
+    try:
+        # Close the assignment and free the asset in one transaction
+        returned = await repos.assignments.return_assignment(
+            tenant_id,
+            assignment_id,
+            returned_date=return_data.returned_date or date.today(),
+            notes=return_data.notes or None
+        )
+        await list_cache.bump(tenant_id)
+        return returned
+    except RepositoryError as e:
+        raise assignment_error(e, "Failed to return assignment")
 
@@ -1,80 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
-from app.models.audit import AuditLog, AuditLogQuery
-from app.dependencies import get_user, get_tenant
+from datetime import datetime, timedelta, timezone
+from app.models.audit import AuditLog, AuditLogQuery, AuditLogExportQuery, AuditLogStats, AuditLogStatsQuery
+from app.dependencies import get_tenant, require_permission
 from app.models.user import User
-from app.database import supabase
-from app.utils.permissions import Resource, Action, has_permission
+from app.repositories import repos
+from app.utils.audit_archive import audit_archive, list_audit_logs
+from app.utils.permissions import Resource, Action
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.utils.export import export_response, paged_rows
 
 router = APIRouter(prefix="/audit-logs", tags=["audit"])
 
+STATS_GROUP_COLUMNS = {"user_id", "action", "resource_type"}
+STATS_DEFAULT_DAYS = 30
+
+EXPORT_COLUMNS = [
+    "id", "tenant_id", "user_id", "action", "resource_type", "resource_id",
+    "details", "ip_address", "user_agent", "created_at",
+]
+
 
 @router.get("", response_model=List[AuditLog])
 async def get_audit_logs(
+    response: Response,
     query: AuditLogQuery = Depends(),
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.AUDIT_LOGS, Action.READ))
 ):
     """
-    Query audit logs (tenant_admin+)
+    Query audit logs (tenant_admin+), paged by skip or by cursor
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.AUDIT_LOGS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
+    after = decode_cursor(query.cursor)
     try:
-        # Build query
-        db_query = supabase.table("audit_logs").select("*")
-        
         # Super admin can see all logs, others only their tenant
         if current_user.role != "super_admin":
-            db_query = db_query.eq("tenant_id", str(tenant_id))
-        elif query.tenant_id:
-            db_query = db_query.eq("tenant_id", str(query.tenant_id))
-        
-        if query.user_id:
-            db_query = db_query.eq("user_id", str(query.user_id))
-        
-        if query.action:
-            db_query = db_query.eq("action", query.action)
-        
-        if query.resource_type:
-            db_query = db_query.eq("resource_type", query.resource_type)
-        
-        if query.start_date:
-            db_query = db_query.gte("created_at", query.start_date.isoformat())
-        
-        if query.end_date:
-            db_query = db_query.lte("created_at", query.end_date.isoformat())
+            scope_tenant_id = tenant_id
+        else:
+            scope_tenant_id = query.tenant_id
         
-        # Order by created_at descending and apply pagination
-        response = db_query.order("created_at", desc=True).range(query.skip, query.skip + query.limit - 1).execute()
-        return response.data
+        # Reads through to the Parquet archive when start_date is older than the retained partitions
+        logs = await list_audit_logs(
+            tenant_id=scope_tenant_id,
+            user_id=query.user_id,
+            action=query.action,
+            resource_type=query.resource_type,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            skip=query.skip,
+            limit=query.limit,
+            after=after
+        )
+        set_next_cursor(response, logs, query.limit)
+        return logs
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch audit logs: {str(e)}")
 
 
+@router.get("/export")
+async def export_audit_logs(
+    query: AuditLogExportQuery = Depends(),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.AUDIT_LOGS, Action.READ))
+):
+    """
+    Stream every matching audit log as an NDJSON or CSV download, gzipped by default (tenant_admin+)
+    """
+    # Super admin can export all logs, others only their tenant
+    if current_user.role != "super_admin":
+        scope_tenant_id = tenant_id
+    else:
+        scope_tenant_id = query.tenant_id
+    
+    async def fetch_page(after, limit):
+        return await list_audit_logs(
+            tenant_id=scope_tenant_id,
+            user_id=query.user_id,
+            action=query.action,
+            resource_type=query.resource_type,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            limit=limit,
+            after=after
+        )
+    
+    try:
+        # Pages through the logs by cursor while the response streams, so memory stays flat
+        rows = await paged_rows(fetch_page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export audit logs: {str(e)}")
+    
+    filename = f"audit-logs-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+    return export_response(rows, query.format, EXPORT_COLUMNS, filename, compress=query.compress)
+
+
+@router.get("/stats", response_model=AuditLogStats)
+async def get_audit_log_stats(
+    query: AuditLogStatsQuery = Depends(),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.AUDIT_LOGS, Action.READ))
+):
+    """
+    Request counts and duration percentiles grouped by any of user_id, action and
+    resource_type, optionally per time bucket (tenant_admin+). Defaults to the last 30 days.
+    """
+    group_by = [c.strip() for c in query.group_by.split(",") if c.strip()]
+    if not set(group_by) <= STATS_GROUP_COLUMNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be a comma-separated list of {', '.join(sorted(STATS_GROUP_COLUMNS))}"
+        )
+    
+    end_date = query.end_date or datetime.now(timezone.utc)
+    start_date = query.start_date or end_date - timedelta(days=STATS_DEFAULT_DAYS)
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    
+    # Archived months are no longer in the database; the returned start_date shows the range covered
+    boundary = audit_archive.boundary() if audit_archive.enabled else None
+    if boundary is not None and start_date < boundary:
+        start_date = min(boundary, end_date)
+    
+    try:
+        # Super admin can see all tenants, others only their own
+        if current_user.role != "super_admin":
+            scope_tenant_id = tenant_id
+        else:
+            scope_tenant_id = query.tenant_id
+        
+        groups = await repos.audit.stats(
+            start_date=start_date,
+            end_date=end_date,
+            tenant_id=scope_tenant_id,
+            user_id=query.user_id,
+            action=query.action,
+            resource_type=query.resource_type,
+            group_by=group_by,
+            bucket=query.bucket,
+            limit=query.limit
+        )
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "group_by": group_by,
+            "bucket": query.bucket,
+            "groups": groups,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute audit log stats: {str(e)}")
+
+
 @router.get("/{log_id}", response_model=AuditLog)
 async def get_audit_log(
     log_id: UUID,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.AUDIT_LOGS, Action.READ))
 ):
     """
     Get specific audit log entry
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.AUDIT_LOGS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
-        response = supabase.table("audit_logs").select("*").eq("id", str(log_id)).execute()
-        if not response.data:
+        log_data = await repos.audit.get(log_id)
+        if not log_data:
             raise HTTPException(status_code=404, detail="Audit log not found")
         
-        log_data = response.data[0]
         # Check tenant access (super admin can access any, others only their tenant)
         if current_user.role != "super_admin":
             if log_data.get("tenant_id") and UUID(log_data["tenant_id"]) != tenant_id:
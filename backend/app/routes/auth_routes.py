@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from app.database import supabase
+from app.repositories import repos, RepositoryError
 from app.models.tenant import TenantCreate
 from app.models.user_management import UserCreate
 from app.utils.auth import get_current_user
 from app.models.user import User
-from uuid import uuid4
-import re
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -27,30 +27,24 @@ class SignupResponse(BaseModel):
     message: str
 
 
-def generate_slug(name: str) -> str:
-    """Generate URL-friendly slug from organization name"""
-    slug = re.sub(r'[^a-z0-9]+', '-', name.lower())
-    slug = re.sub(r'^-+|-+$', '', slug)
-    return slug[:50]  # Limit length
+SIGNUP_ERRORS = {
+    "user_exists": (400, "User with this email already exists"),
+    "slug_unavailable": (409, "Organization slug is not available"),
+}
 
 
 @router.post("/signup", response_model=SignupResponse)
 async def signup(request: SignupRequest):
     """
     Public signup endpoint - creates tenant and user
+    
+    Everything after the auth user is created (tenant, user record, trial
+    subscription and default roles) is provisioned by one database function in
+    a single transaction, so a failed signup never leaves a partial tenant.
     """
     try:
-        # Generate slug if not provided
-        slug = request.organization_slug or generate_slug(request.organization_name)
-        
-        # Check if slug already exists
-        existing_tenant = supabase.table("tenants").select("id").eq("slug", slug).execute()
-        if existing_tenant.data:
-            # Append random suffix if slug exists
-            slug = f"{slug}-{uuid4().hex[:8]}"
-        
         # Create Supabase auth user
-        auth_response = supabase.auth.sign_up({
+        auth_response = await run_in_threadpool(supabase.auth.sign_up, {
             "email": request.email,
             "password": request.password,
             "options": {
@@ -66,123 +60,23 @@ async def signup(request: SignupRequest):
         
         user_id = auth_response.user.id
         
-        # Create tenant
-        tenant_data = {
-            "name": request.organization_name,
-            "slug": slug,
-            "status": "active",
-            "subscription_plan": "trial",
-            "subscription_status": "active"
-        }
-        tenant_response = supabase.table("tenants").insert(tenant_data).execute()
-        
-        if not tenant_response.data:
-            # Rollback: delete auth user if tenant creation fails
-            # Note: Admin API might not be available, so we'll just raise the error
-            raise HTTPException(status_code=500, detail="Failed to create tenant")
-        
-        tenant_id = tenant_response.data[0]["id"]
-        
-        # Create user record
-        user_data = {
-            "id": user_id,
-            "tenant_id": tenant_id,
-            "name": request.name,
-            "email": request.email,
-            "role": "tenant_admin",
-            "status": "active"
-        }
-        user_response = supabase.table("users").insert(user_data).execute()
-        
-        if not user_response.data:
-            # Rollback: delete tenant if user creation fails
-            try:
-                supabase.table("tenants").delete().eq("id", tenant_id).execute()
-            except:
-                pass
-            raise HTTPException(status_code=500, detail="Failed to create user record")
-        
-        # Create default subscription
-        from datetime import datetime, timedelta
-        subscription_data = {
-            "tenant_id": tenant_id,
-            "plan": "trial",
-            "status": "active",
-            "current_period_start": datetime.utcnow().isoformat(),
-            "current_period_end": (datetime.utcnow() + timedelta(days=14)).isoformat()
-        }
-        try:
-            supabase.table("subscriptions").insert(subscription_data).execute()
-        except:
-            # Subscription creation is not critical
-            pass
-        
-        # Create default roles for tenant
-        default_roles = [
-            {
-                "tenant_id": tenant_id,
-                "name": "Tenant Admin",
-                "permissions": {
-                    "assets": ["create", "read", "update", "delete", "manage"],
-                    "employees": ["create", "read", "update", "delete", "manage"],
-                    "assignments": ["create", "read", "update", "delete", "manage"],
-                    "users": ["create", "read", "update", "delete", "manage"],
-                    "roles": ["create", "read", "update", "delete"],
-                    "settings": ["read", "update"],
-                    "audit_logs": ["read"]
-                },
-                "is_system_role": True
-            },
-            {
-                "tenant_id": tenant_id,
-                "name": "Manager",
-                "permissions": {
-                    "assets": ["create", "read", "update", "delete"],
-                    "employees": ["create", "read", "update"],
-                    "assignments": ["create", "read", "update", "delete"],
-                    "users": ["read"],
-                    "roles": ["read"],
-                    "settings": ["read"],
-                    "audit_logs": ["read"]
-                },
-                "is_system_role": True
-            },
-            {
-                "tenant_id": tenant_id,
-                "name": "Staff",
-                "permissions": {
-                    "assets": ["read", "update"],
-                    "employees": ["read"],
-                    "assignments": ["create", "read", "update"],
-                    "users": ["read"],
-                    "roles": ["read"],
-                    "settings": ["read"]
-                },
-                "is_system_role": True
-            },
-            {
-                "tenant_id": tenant_id,
-                "name": "Viewer",
-                "permissions": {
-                    "assets": ["read"],
-                    "employees": ["read"],
-                    "assignments": ["read"],
-                    "users": ["read"],
-                    "roles": ["read"],
-                    "settings": ["read"]
-                },
-                "is_system_role": True
-            }
-        ]
+        # The slug is derived from the organization name (or the requested slug)
+        # and de-duplicated by the database
         try:
-            supabase.table("roles").insert(default_roles).execute()
-        except:
-            # Role creation is not critical for signup
-            pass
+            tenant = await repos.tenants.signup(
+                user_id,
+                request.email,
+                request.name,
+                request.organization_name,
+                request.organization_slug
+            )
+        except RepositoryError as e:
+            status_code, detail = SIGNUP_ERRORS.get(e.code, (500, f"Failed to create tenant: {str(e)}"))
+            raise HTTPException(status_code=status_code, detail=detail)
         
         return SignupResponse(
             user_id=user_id,
-            tenant_id=tenant_id,
+            tenant_id=str(tenant["id"]),
             email=request.email,
             message="Signup successful! Please check your email to verify your account."
         )
@@ -198,9 +92,8 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user information"""
     # Fetch full user details from database to get name and role
     try:
-        user_response = supabase.table("users").select("*").eq("id", str(current_user.id)).execute()
-        if user_response.data and len(user_response.data) > 0:
-            user_data = user_response.data[0]
+        user_data = await repos.users.get(current_user.id)
+        if user_data:
             # Always use role from database as source of truth
             db_role = user_data.get("role")
             db_tenant_id = user_data.get("tenant_id")
@@ -1,82 +1,211 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from typing import Any, List, Literal, Optional
 from uuid import UUID
-from app.database import supabase
+from datetime import date, datetime, timezone
+from app.repositories import repos, RepositoryError, UniqueViolation, ForeignKeyViolation
+from app.config import settings
 from app.models.employee import Employee, EmployeeCreate, EmployeeUpdate
-from app.dependencies import get_user, get_tenant
+from app.models.bulk import BulkCreateResult
+from app.models.imports import ImportJob
+from app.models.assignment import Assignment, AssignmentReturn
+from app.dependencies import get_tenant, require_permission
 from app.models.user import User
-from app.utils.permissions import Resource, Action, has_permission
+from app.utils.permissions import Resource, Action
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.utils.cache import list_cache
+from app.utils.etag import not_modified
+from app.utils.export import export_response, paged_rows
+from app.utils.bulk import bulk_create
+from app.utils.imports import import_manager, IMPORT_REQUEST_BODY
 
 router = APIRouter(prefix="/employees", tags=["employees"])
 
+# Export columns with their Parquet (DuckDB) types
+EXPORT_COLUMNS = {
+    "id": "VARCHAR",
+    "tenant_id": "VARCHAR",
+    "name": "VARCHAR",
+    "email": "VARCHAR",
+    "department": "VARCHAR",
+    "position": "VARCHAR",
+    "created_at": "TIMESTAMPTZ",
+    "updated_at": "TIMESTAMPTZ",
+}
+
 
 @router.get("", response_model=List[Employee])
 async def get_employees(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     department: str = None,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.READ))
 ):
-    """Get all employees with optional filtering (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.EMPLOYEES, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    query = supabase.table("employees").select("*").eq("tenant_id", str(tenant_id))
+    """Get all employees with optional filtering (tenant-scoped), paged by skip or by cursor"""
+    after = decode_cursor(cursor)
+    params = {"department": department, "skip": skip, "limit": limit, "cursor": cursor}
+    # Answer polls with 304 straight from the tenant version, before any query runs
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "employees", params))
+    if unchanged:
+        return unchanged
     
-    if department:
-        query = query.eq("department", department)
+    employees = await list_cache.get_or_load(
+        tenant_id,
+        "employees",
+        params,
+        lambda: repos.employees.list(tenant_id, department=department, skip=skip, limit=limit, after=after)
+    )
+    set_next_cursor(response, employees, limit)
+    return employees
+
+
+@router.get("/export")
+async def export_employees(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    compress: bool = True,
+    department: str = None,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.READ))
+):
+    """Stream every matching employee as a CSV or NDJSON (gzipped by default) or Parquet download"""
+    async def fetch_page(after, limit):
+        return await repos.employees.list(tenant_id, department=department, limit=limit, after=after)
     
-    query = query.order("created_at", desc=True).range(skip, skip + limit - 1)
-    response = query.execute()
+    try:
+        # Pages through the employees by cursor while the response streams, so memory stays flat
+        rows = await paged_rows(fetch_page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export employees: {str(e)}")
     
-    return response.data
+    filename = f"employees-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}"
+    return export_response(
+        rows, format, list(EXPORT_COLUMNS), filename, compress=compress, column_types=EXPORT_COLUMNS
+    )
 
 
 @router.get("/{employee_id}", response_model=Employee)
 async def get_employee(
     employee_id: UUID,
+    request: Request,
+    response: Response,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.READ))
 ):
     """Get a specific employee by ID (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.EMPLOYEES, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    unchanged = not_modified(request, response, await list_cache.etag(tenant_id, "employee", {"id": employee_id}))
+    if unchanged:
+        return unchanged
     
-    response = supabase.table("employees").select("*").eq("id", str(employee_id)).eq("tenant_id", str(tenant_id)).execute()
+    employee = await repos.employees.get(tenant_id, employee_id)
     
-    if not response.data:
+    if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    return response.data[0]
+    return employee
 
 
 @router.post("", response_model=Employee, status_code=201)
 async def create_employee(
     employee: EmployeeCreate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.CREATE))
 ):
     """Create a new employee (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.EMPLOYEES, Action.CREATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    employee_dict = employee.model_dump()
+    employee_dict["tenant_id"] = tenant_id  # Auto-inject tenant_id
     
-    # Check if email already exists in this tenant
-    existing = supabase.table("employees").select("id").eq("email", employee.email).eq("tenant_id", str(tenant_id)).execute()
-    if existing.data:
+    # The (tenant_id, email) unique index rejects duplicate emails
+    try:
+        created = await repos.employees.create(employee_dict)
+    except UniqueViolation:
         raise HTTPException(status_code=400, detail="Employee with this email already exists")
+    await list_cache.bump(tenant_id)
     
-    employee_dict = employee.model_dump()
-    employee_dict["tenant_id"] = str(tenant_id)  # Auto-inject tenant_id
-    response = supabase.table("employees").insert(employee_dict).execute()
-    
-    if not response.data:
+    if not created:
         raise HTTPException(status_code=400, detail="Failed to create employee")
     
-    return response.data[0]
+    return created
+
+
+@router.post("/bulk", response_model=BulkCreateResult)
+async def bulk_create_employees(
+    items: List[Any] = Body(...),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.CREATE))
+):
+    """Create many employees at once; each item is validated and created or rejected on its own"""
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.bulk_max_items} items per request")
+    
+    result = await bulk_create(
+        tenant_id,
+        items,
+        EmployeeCreate,
+        key="email",
+        existing=repos.employees.existing_emails,
+        create_many=repos.employees.create_many,
+        create=repos.employees.create,
+        duplicate_error="Employee with this email already exists",
+        chunk_size=settings.bulk_chunk_size
+    )
+    if result.created:
+        await list_cache.bump(tenant_id)
+    
+    return result
+
+
+@router.post(
+    "/import",
+    response_model=ImportJob,
+    status_code=202,
+    dependencies=[Depends(require_permission(Resource.EMPLOYEES, Action.UPDATE))],
+    openapi_extra=IMPORT_REQUEST_BODY
+)
+async def import_employees(
+    request: Request,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.CREATE))
+):
+    """Import employees from an uploaded CSV or XLSX file (field "file"), upserting by email"""
+    return await import_manager.start_import(
+        request, tenant_id, "employees", EmployeeCreate, "email", repos.employees.upsert_many
+    )
+
+
+@router.get("/imports/{job_id}", response_model=ImportJob)
+async def get_employee_import(
+    job_id: UUID,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.READ))
+):
+    """Progress and counts of an employee import"""
+    job = await import_manager.get(tenant_id, "employees", job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+
+@router.get("/imports/{job_id}/errors")
+async def get_employee_import_errors(
+    job_id: UUID,
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.READ))
+):
+    """CSV report of the rows an employee import rejected (row number, key, error), written as the import runs"""
+    job = await import_manager.get(tenant_id, "employees", job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    
+    path = import_manager.error_report_path(job)
+    if not path.exists():
+        # Reports are kept on the worker that ran the import
+        raise HTTPException(status_code=404, detail="Error report not available")
+    
+    return FileResponse(path, media_type="text/csv", filename=f"employee-import-{job_id}-errors.csv")
 
 
 @router.put("/{employee_id}", response_model=Employee)
@@ -84,58 +213,66 @@ async def update_employee(
     employee_id: UUID,
     employee_update: EmployeeUpdate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.UPDATE))
 ):
     """Update an existing employee (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.EMPLOYEES, Action.UPDATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Check if employee exists and belongs to tenant
-    existing = supabase.table("employees").select("*").eq("id", str(employee_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not existing.data:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Check if email is being updated and if it already exists in this tenant
     update_dict = employee_update.model_dump(exclude_unset=True)
-    if "email" in update_dict:
-        email_check = supabase.table("employees").select("id").eq("email", update_dict["email"]).eq("tenant_id", str(tenant_id)).neq("id", str(employee_id)).execute()
-        if email_check.data:
+    if not update_dict:
+        updated = await repos.employees.get(tenant_id, employee_id)
+    else:
+        # Tenant-filtered UPDATE ... RETURNING: no row means the employee is not in this tenant
+        try:
+            updated = await repos.employees.update(tenant_id, employee_id, update_dict)
+        except UniqueViolation:
             raise HTTPException(status_code=400, detail="Employee with this email already exists")
+        await list_cache.bump(tenant_id)
     
-    response = supabase.table("employees").update(update_dict).eq("id", str(employee_id)).execute()
-    
-    if not response.data:
-        raise HTTPException(status_code=400, detail="Failed to update employee")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Employee not found")
     
-    return response.data[0]
+    return updated
 
 
 @router.delete("/{employee_id}", status_code=204)
 async def delete_employee(
     employee_id: UUID,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: User = Depends(get_user)
+    current_user: User = Depends(require_permission(Resource.EMPLOYEES, Action.DELETE))
 ):
     """Delete an employee (tenant-scoped)"""
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.EMPLOYEES, Action.DELETE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
-    # Verify employee belongs to tenant
-    employee_check = supabase.table("employees").select("id").eq("id", str(employee_id)).eq("tenant_id", str(tenant_id)).execute()
-    if not employee_check.data:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Check if employee has active assignments
-    active_assignments = supabase.table("assignments").select("id").eq("employee_id", str(employee_id)).eq("status", "active").execute()
-    if active_assignments.data:
-        raise HTTPException(status_code=400, detail="Cannot delete employee with active assignments")
+    # Assignments reference employees ON DELETE RESTRICT, so the delete itself refuses assigned employees
+    try:
+        deleted = await repos.employees.delete(tenant_id, employee_id)
+    except ForeignKeyViolation:
+        if await repos.assignments.has_active(employee_id=employee_id):
+            raise HTTPException(status_code=400, detail="Cannot delete employee with active assignments")
+        raise HTTPException(status_code=400, detail="Cannot delete employee with assignment history")
+    await list_cache.bump(tenant_id)
     
-    response = supabase.table("employees").delete().eq("id", str(employee_id)).execute()
-    
-    if not response.data:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     return None
 
+
+@router.post("/{employee_id}/return-all", response_model=List[Assignment])
+async def return_all_assignments(
+    employee_id: UUID,
+    return_data: AssignmentReturn = AssignmentReturn(),
+    tenant_id: UUID = Depends(get_tenant),
+    current_user: User = Depends(require_permission(Resource.ASSIGNMENTS, Action.UPDATE))
+):
+    """Return every active assignment of an employee, e.g. when offboarding (tenant-scoped)"""
+    try:
+        returned = await repos.assignments.return_all_for_employee(
+            tenant_id,
+            employee_id,
+            returned_date=return_data.returned_date or date.today(),
+            notes=return_data.notes or None
+        )
+        await list_cache.bump(tenant_id)
+        return returned
+    except RepositoryError as e:
+        if e.code == "employee_not_found":
+            raise HTTPException(status_code=404, detail="Employee not found")
+        raise HTTPException(status_code=400, detail=f"Failed to return assignments: {str(e)}")
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from app.models.subscription import Subscription, SubscriptionUpdate, Invoice
 from app.dependencies import get_user, get_tenant
 from app.models.user import User
-from app.database import supabase
+from app.repositories import repos
 
 router = APIRouter(prefix="/subscription", tags=["subscriptions"])
 
@@ -19,19 +19,18 @@ async def get_current_subscription(
     Get current subscription for tenant
     """
     try:
-        response = supabase.table("subscriptions").select("*").eq("tenant_id", str(tenant_id)).execute()
-        if not response.data:
+        subscription = await repos.subscriptions.get(tenant_id)
+        if not subscription:
             # Create default free subscription if none exists
-            subscription_data = {
-                "tenant_id": str(tenant_id),
+            now = datetime.now(timezone.utc)
+            subscription = await repos.subscriptions.create({
+                "tenant_id": tenant_id,
                 "plan": "free",
                 "status": "active",
-                "current_period_start": datetime.utcnow().isoformat(),
-                "current_period_end": (datetime.utcnow() + timedelta(days=365)).isoformat()
-            }
-            create_response = supabase.table("subscriptions").insert(subscription_data).execute()
-            return create_response.data[0]
-        return response.data[0]
+                "current_period_start": now,
+                "current_period_end": now + timedelta(days=365)
+            })
+        return subscription
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch subscription: {str(e)}")
 
@@ -53,32 +52,27 @@ async def upgrade_subscription(
         raise HTTPException(status_code=400, detail=f"Invalid plan. Must be one of: {', '.join(valid_plans)}")
     
     try:
-        # Get current subscription
-        sub_response = supabase.table("subscriptions").select("*").eq("tenant_id", str(tenant_id)).execute()
-        
+        now = datetime.now(timezone.utc)
         update_data = {
             "plan": plan,
             "status": "active",
-            "current_period_start": datetime.utcnow().isoformat(),
-            "current_period_end": (datetime.utcnow() + timedelta(days=30)).isoformat(),
+            "current_period_start": now,
+            "current_period_end": now + timedelta(days=30),
             "cancel_at_period_end": False
         }
         
-        if sub_response.data:
-            # Update existing subscription
-            response = supabase.table("subscriptions").update(update_data).eq("tenant_id", str(tenant_id)).execute()
-        else:
-            # Create new subscription
-            update_data["tenant_id"] = str(tenant_id)
-            response = supabase.table("subscriptions").insert(update_data).execute()
+        # Update the existing subscription, or create one if the tenant has none
+        subscription = await repos.subscriptions.update(tenant_id, update_data)
+        if not subscription:
+            subscription = await repos.subscriptions.create({**update_data, "tenant_id": tenant_id})
         
         # Update tenant subscription info
-        supabase.table("tenants").update({
+        await repos.tenants.update(tenant_id, {
             "subscription_plan": plan,
             "subscription_status": "active"
-        }).eq("id", str(tenant_id)).execute()
+        })
         
-        return {"message": "Subscription upgraded successfully", "subscription": response.data[0]}
+        return {"message": "Subscription upgraded successfully", "subscription": subscription}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upgrade subscription: {str(e)}")
 
@@ -99,9 +93,9 @@ async def cancel_subscription(
             "cancel_at_period_end": True,
             "status": "active"  # Keep active until period ends
         }
-        response = supabase.table("subscriptions").update(update_data).eq("tenant_id", str(tenant_id)).execute()
+        subscription = await repos.subscriptions.update(tenant_id, update_data)
         
-        if not response.data:
+        if not subscription:
             raise HTTPException(status_code=404, detail="Subscription not found")
         
         return {"message": "Subscription will be cancelled at the end of the current period"}
@@ -125,8 +119,7 @@ async def list_invoices(
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     try:
-        response = supabase.table("invoices").select("*").eq("tenant_id", str(tenant_id)).order("created_at", desc=True).range(skip, skip + limit - 1).execute()
-        return response.data
+        return await repos.subscriptions.list_invoices(tenant_id, skip=skip, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch invoices: {str(e)}")
 
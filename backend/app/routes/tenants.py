@@ -1,14 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from app.models.tenant import Tenant, TenantCreate, TenantUpdate
 from app.dependencies import get_user
 from app.models.user import User
-from app.database import supabase
+from app.repositories import repos
+from app.config import settings
+from app.utils.cache import create_cache
 from app.utils.permissions import Resource, Action, has_permission
 
 router = APIRouter(prefix="/tenants", tags=["tenants"])
 
+# Tenant rows keyed by tenant id (the current tenant is fetched on most page loads)
+tenant_cache = create_cache("tenant", ttl=settings.tenant_cache_ttl_seconds, max_size=settings.tenant_cache_max_size)
+
+
+async def load_tenant(tenant_id: UUID) -> Optional[Dict[str, Any]]:
+    """Fetch a tenant row, served from the tenant cache when possible"""
+    tenant = await tenant_cache.get(str(tenant_id))
+    if tenant is None:
+        tenant = await repos.tenants.get(tenant_id)
+        if tenant:
+            await tenant_cache.set(str(tenant_id), tenant)
+    return tenant
+
 
 @router.get("", response_model=List[Tenant])
 async def list_tenants(
@@ -23,8 +38,7 @@ async def list_tenants(
         raise HTTPException(status_code=403, detail="Only super admins can list all tenants")
     
     try:
-        response = supabase.table("tenants").select("*").range(skip, skip + limit - 1).execute()
-        return response.data
+        return await repos.tenants.list(skip=skip, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch tenants: {str(e)}")
 
@@ -43,10 +57,10 @@ async def get_tenant(
             raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        response = supabase.table("tenants").select("*").eq("id", str(tenant_id)).execute()
-        if not response.data:
+        tenant = await load_tenant(tenant_id)
+        if not tenant:
             raise HTTPException(status_code=404, detail="Tenant not found")
-        return response.data[0]
+        return tenant
     except HTTPException:
         raise
     except Exception as e:
@@ -66,10 +80,10 @@ async def create_tenant(
     
     try:
         tenant_data = tenant.model_dump(exclude_unset=True)
-        response = supabase.table("tenants").insert(tenant_data).execute()
-        if not response.data:
+        created = await repos.tenants.create(tenant_data)
+        if not created:
             raise HTTPException(status_code=500, detail="Failed to create tenant")
-        return response.data[0]
+        return created
     except HTTPException:
         raise
     except Exception as e:
@@ -94,10 +108,11 @@ async def update_tenant(
     
     try:
         update_data = tenant_update.model_dump(exclude_unset=True)
-        response = supabase.table("tenants").update(update_data).eq("id", str(tenant_id)).execute()
-        if not response.data:
+        updated = await repos.tenants.update(tenant_id, update_data)
+        await tenant_cache.invalidate(str(tenant_id))
+        if not updated:
             raise HTTPException(status_code=404, detail="Tenant not found")
-        return response.data[0]
+        return updated
     except HTTPException:
         raise
     except Exception as e:
@@ -117,8 +132,9 @@ async def delete_tenant(
     
     try:
         # Soft delete - update status to deleted
-        response = supabase.table("tenants").update({"status": "deleted"}).eq("id", str(tenant_id)).execute()
-        if not response.data:
+        deleted = await repos.tenants.update(tenant_id, {"status": "deleted"})
+        await tenant_cache.invalidate(str(tenant_id))
+        if not deleted:
             raise HTTPException(status_code=404, detail="Tenant not found")
         return {"message": "Tenant deleted successfully"}
     except HTTPException:
@@ -136,10 +152,10 @@ async def get_current_tenant_info(current_user: User = Depends(get_user)):
         raise HTTPException(status_code=404, detail="User is not associated with a tenant")
     
     try:
-        response = supabase.table("tenants").select("*").eq("id", str(current_user.tenant_id)).execute()
-        if not response.data:
+        tenant = await load_tenant(current_user.tenant_id)
+        if not tenant:
             raise HTTPException(status_code=404, detail="Tenant not found")
-        return response.data[0]
+        return tenant
     except HTTPException:
         raise
     except Exception as e:
@@ -1,36 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 from uuid import UUID
 from app.models.user_management import User, UserCreate, UserUpdate
-from app.dependencies import get_user, get_tenant
+from app.dependencies import get_tenant, require_permission
 from app.models.user import User as AuthUser
 from app.database import supabase
-from app.utils.permissions import Resource, Action, has_permission
+from app.repositories import repos
+from app.utils.auth import invalidate_user_profile
+from app.utils.permissions import Resource, Action
+from app.utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("", response_model=List[User])
 async def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.READ))
 ):
     """
-    List users in tenant (RBAC controlled)
+    List users in tenant (RBAC controlled), paged by skip or by cursor
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
+    after = decode_cursor(cursor)
     try:
         # Super admin can view all users, others only their tenant
-        if current_user.role == "super_admin":
-            response = supabase.table("users").select("*").range(skip, skip + limit - 1).execute()
-        else:
-            response = supabase.table("users").select("*").eq("tenant_id", str(tenant_id)).range(skip, skip + limit - 1).execute()
-        return response.data
+        scope_tenant_id = None if current_user.role == "super_admin" else tenant_id
+        users = await repos.users.list(tenant_id=scope_tenant_id, skip=skip, limit=limit, after=after)
+        set_next_cursor(response, users, limit)
+        return users
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
 
@@ -39,21 +41,16 @@ async def list_users(
 async def get_user(
     user_id: UUID,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.READ))
 ):
     """
     Get user by ID
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.READ):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
-        response = supabase.table("users").select("*").eq("id", str(user_id)).execute()
-        if not response.data:
+        user_data = await repos.users.get(user_id)
+        if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user_data = response.data[0]
         # Check tenant access (super admin can access any, others only their tenant)
         if current_user.role != "super_admin":
             if UUID(user_data["tenant_id"]) != tenant_id:
@@ -70,15 +67,11 @@ async def get_user(
 async def create_user(
     user: UserCreate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.CREATE))
 ):
     """
     Create new user (tenant_admin+)
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.CREATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     # Ensure user is created in current tenant (unless super admin)
     if current_user.role != "super_admin":
         user.tenant_id = tenant_id
@@ -88,7 +81,7 @@ async def create_user(
         
         # Create Supabase auth user if password provided
         if user.password:
-            auth_response = supabase.auth.sign_up({
+            auth_response = await run_in_threadpool(supabase.auth.sign_up, {
                 "email": user.email,
                 "password": user.password,
                 "options": {
@@ -105,10 +98,11 @@ async def create_user(
             from uuid import uuid4
             user_data["id"] = str(uuid4())
         
-        response = supabase.table("users").insert(user_data).execute()
-        if not response.data:
+        created = await repos.users.create(user_data)
+        if not created:
             raise HTTPException(status_code=500, detail="Failed to create user")
-        return response.data[0]
+        await invalidate_user_profile(created["id"])
+        return created
     except HTTPException:
         raise
     except Exception as e:
@@ -120,30 +114,27 @@ async def update_user(
     user_id: UUID,
     user_update: UserUpdate,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.UPDATE))
 ):
     """
     Update user (tenant_admin+)
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.UPDATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
         # Verify user exists and belongs to tenant (unless super admin)
-        user_response = supabase.table("users").select("tenant_id").eq("id", str(user_id)).execute()
-        if not user_response.data:
+        existing = await repos.users.get_profile(user_id)
+        if not existing:
             raise HTTPException(status_code=404, detail="User not found")
         
         if current_user.role != "super_admin":
-            if UUID(user_response.data[0]["tenant_id"]) != tenant_id:
+            if UUID(existing["tenant_id"]) != tenant_id:
                 raise HTTPException(status_code=403, detail="Access denied")
         
         update_data = user_update.model_dump(exclude_unset=True)
-        response = supabase.table("users").update(update_data).eq("id", str(user_id)).execute()
-        if not response.data:
+        updated = await repos.users.update(user_id, update_data)
+        await invalidate_user_profile(user_id)
+        if not updated:
             raise HTTPException(status_code=404, detail="User not found")
-        return response.data[0]
+        return updated
     except HTTPException:
         raise
     except Exception as e:
@@ -154,28 +145,25 @@ async def update_user(
 async def delete_user(
     user_id: UUID,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.DELETE))
 ):
     """
     Deactivate user (tenant_admin+)
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.DELETE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
         # Verify user exists and belongs to tenant (unless super admin)
-        user_response = supabase.table("users").select("tenant_id").eq("id", str(user_id)).execute()
-        if not user_response.data:
+        existing = await repos.users.get_profile(user_id)
+        if not existing:
             raise HTTPException(status_code=404, detail="User not found")
         
         if current_user.role != "super_admin":
-            if UUID(user_response.data[0]["tenant_id"]) != tenant_id:
+            if UUID(existing["tenant_id"]) != tenant_id:
                 raise HTTPException(status_code=403, detail="Access denied")
         
         # Soft delete - update status to inactive
-        response = supabase.table("users").update({"status": "inactive"}).eq("id", str(user_id)).execute()
-        if not response.data:
+        updated = await repos.users.update(user_id, {"status": "inactive"})
+        await invalidate_user_profile(user_id)
+        if not updated:
             raise HTTPException(status_code=404, detail="User not found")
         return {"message": "User deactivated successfully"}
     except HTTPException:
@@ -189,16 +177,12 @@ async def change_user_role(
     user_id: UUID,
     new_role: str,
     tenant_id: UUID = Depends(get_tenant),
-    current_user: AuthUser = Depends(get_user)
+    current_user: AuthUser = Depends(require_permission(Resource.USERS, Action.UPDATE))
 ):
     """
     Change user role (tenant_admin+)
     Accepts new_role as query parameter
     """
-    # Check permission
-    if not has_permission(current_user.role or "viewer", Resource.USERS, Action.UPDATE):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     # Validate role
     valid_roles = ["super_admin", "tenant_admin", "manager", "staff", "viewer"]
     if new_role not in valid_roles:
@@ -210,18 +194,19 @@ async def change_user_role(
     
     try:
         # Verify user exists and belongs to tenant (unless super admin)
-        user_response = supabase.table("users").select("tenant_id").eq("id", str(user_id)).execute()
-        if not user_response.data:
+        existing = await repos.users.get_profile(user_id)
+        if not existing:
             raise HTTPException(status_code=404, detail="User not found")
         
         if current_user.role != "super_admin":
-            if UUID(user_response.data[0]["tenant_id"]) != tenant_id:
+            if UUID(existing["tenant_id"]) != tenant_id:
                 raise HTTPException(status_code=403, detail="Access denied")
         
-        response = supabase.table("users").update({"role": new_role}).eq("id", str(user_id)).execute()
-        if not response.data:
+        updated = await repos.users.update(user_id, {"role": new_role})
+        await invalidate_user_profile(user_id)
+        if not updated:
             raise HTTPException(status_code=404, detail="User not found")
-        return {"message": "User role updated successfully", "user": response.data[0]}
+        return {"message": "User role updated successfully", "user": updated}
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,338 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+from app.config import settings
+from app.repositories import repos
+from app.utils.pagination import Cursor, row_cursor
+from app.utils.export import duckdb_literal, duckdb_columns
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Column types for the archived Parquet files (details is kept as JSON text,
+# created_at as a plain TIMESTAMP in UTC)
+ARCHIVE_COLUMNS = {
+    "id": "VARCHAR",
+    "tenant_id": "VARCHAR",
+    "user_id": "VARCHAR",
+    "action": "VARCHAR",
+    "resource_type": "VARCHAR",
+    "resource_id": "VARCHAR",
+    "details": "VARCHAR",
+    "ip_address": "VARCHAR",
+    "user_agent": "VARCHAR",
+    "created_at": "TIMESTAMP",
+}
+
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Delay before retrying a failed maintenance run
+RETRY_SECONDS = 300.0
+
+
+def _utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with partition boundaries"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """UTC wall-clock time without tzinfo, as stored in the archive files"""
+    return _utc(value).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _month_start(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+class AuditArchive:
+    """
+    Tiered storage for audit logs: recent months in monthly audit_logs partitions,
+    older months as zstd-compressed Parquet files (audit_logs_YYYY_MM.parquet).
+
+    A maintenance task keeps partitions created ahead of time and, when an archive
+    directory is configured, exports partitions older than the retention window
+    and drops them. Archived months are queried in place with DuckDB.
+    """
+
+    def __init__(
+        self,
+        directory: str = "",
+        retention_months: int = 12,
+        partitions_ahead: int = 3,
+        interval_hours: float = 24.0,
+        export_page_size: int = 5000
+    ):
+        self.directory = Path(directory) if directory else None
+        self.retention_months = retention_months
+        self.partitions_ahead = partitions_ahead
+        self.interval_hours = interval_hours
+        self.export_page_size = export_page_size
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def path_for(self, month: date) -> Path:
+        return self.directory / f"audit_logs_{month.year:04d}_{month.month:02d}.parquet"
+
+    def archived_months(self) -> List[date]:
+        if not self.enabled or not self.directory.exists():
+            return []
+        months = []
+        for path in self.directory.glob("audit_logs_*.parquet"):
+            try:
+                year, month = path.stem.split("_")[-2:]
+                months.append(date(int(year), int(month), 1))
+            except ValueError:
+                continue
+        return sorted(months)
+
+    def boundary(self) -> Optional[datetime]:
+        """Everything before this instant lives in the archive (None if nothing is archived)"""
+        months = self.archived_months()
+        return _month_start(_next_month(months[-1])) if months else None
+
+    def start(self) -> None:
+        """Start the daily partition/retention task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        # Runs at startup and then daily; a failed run (e.g. the database is not up
+        # yet) is retried within minutes so upcoming partitions are not left missing
+        while True:
+            delay = self.interval_hours * 3600
+            try:
+                await self.run_maintenance()
+            except Exception as e:
+                # Only the exception type is reported by stats(); the message can name hosts or SQL
+                self.last_error = type(e).__name__
+                logger.warning("Audit archive maintenance failed: %s", e)
+                delay = min(delay, RETRY_SECONDS)
+            await asyncio.sleep(delay)
+
+    async def run_maintenance(self) -> List[date]:
+        """Create upcoming partitions, then archive and drop expired ones; returns the months archived"""
+        await repos.audit.ensure_partitions(self.partitions_ahead)
+        archived = []
+        if self.enabled and self.retention_months > 0:
+            today = datetime.now(timezone.utc).date()
+            cutoff_index = today.year * 12 + today.month - 1 - self.retention_months
+            cutoff = date(cutoff_index // 12, cutoff_index % 12 + 1, 1)
+            for partition in await repos.audit.list_partitions():
+                month = date.fromisoformat(str(partition["month"])[:10])
+                if month >= cutoff:
+                    continue
+                await self.export_month(month)
+                await repos.audit.drop_partition(month)
+                archived.append(month)
+        self.last_run = datetime.now(timezone.utc)
+        return archived
+
+    async def export_month(self, month: date) -> int:
+        """Write one month of audit_logs to its Parquet file; returns the number of rows exported"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path_for(month)
+        staging = target.with_name(f".{target.stem}.ndjson")
+        start = _month_start(month)
+        end = _month_start(_next_month(month)) - ONE_MICROSECOND
+
+        # Stream the month out page by page (keyset cursor) into a staging file
+        exported = 0
+        after: Optional[Cursor] = None
+        with open(staging, "w", encoding="utf-8") as f:
+            while True:
+                rows = await repos.audit.list(
+                    start_date=start, end_date=end, limit=self.export_page_size, after=after
+                )
+                for row in rows:
+                    record = {column: row.get(column) for column in ARCHIVE_COLUMNS}
+                    record["details"] = json.dumps(row.get("details") or {})
+                    record["created_at"] = _naive_utc(datetime.fromisoformat(str(row["created_at"]))).isoformat()
+                    f.write(json.dumps(record, default=str) + "\n")
+                exported += len(rows)
+                if len(rows) < self.export_page_size:
+                    break
+                after = row_cursor(rows[-1])
+
+        try:
+            await asyncio.to_thread(self._write_parquet, staging, target, exported)
+        finally:
+            staging.unlink(missing_ok=True)
+        return exported
+
+    def _write_parquet(self, staging: Path, target: Path, expected: int) -> None:
+        import duckdb
+        partial = target.with_name(f".{target.name}.partial")
+        con = duckdb.connect()
+        try:
+            con.execute(
+                f"COPY (SELECT * FROM read_json({duckdb_literal(staging)}, format = 'newline_delimited', "
+                f"columns = {duckdb_columns(ARCHIVE_COLUMNS)})) "
+                f"TO {duckdb_literal(partial)} (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+            written = con.execute(f"SELECT COUNT(*) FROM read_parquet({duckdb_literal(partial)})").fetchone()[0]
+        finally:
+            con.close()
+        if written != expected:
+            partial.unlink(missing_ok=True)
+            raise RuntimeError(f"Archive file {target.name} has {written} rows, expected {expected}")
+        # Swap the finished file in atomically so readers never see a partial archive
+        os.replace(partial, target)
+
+    async def query(
+        self,
+        tenant_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        action: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Cursor] = None
+    ) -> List[Dict[str, Any]]:
+        """Archived audit logs, newest first, with the same filters and paging as AuditRepo.list"""
+        start_date = _utc(start_date) if start_date else None
+        end_date = _utc(end_date) if end_date else None
+        files = [
+            self.path_for(month) for month in self.archived_months()
+            if (not start_date or _month_start(_next_month(month)) > start_date)
+            and (not end_date or _month_start(month) <= end_date)
+        ]
+        if not files or limit <= 0:
+            return []
+
+        clauses, params = [], []
+        for sql, value in [
+            ("tenant_id = ?", str(tenant_id) if tenant_id else None),
+            ("user_id = ?", str(user_id) if user_id else None),
+            ("action = ?", action),
+            ("resource_type = ?", resource_type),
+            ("created_at >= ?", _naive_utc(start_date) if start_date else None),
+            ("created_at <= ?", _naive_utc(end_date) if end_date else None),
+        ]:
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+        if after:
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params += [_naive_utc(after[0]), _naive_utc(after[0]), str(after[1])]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT * FROM read_parquet([{', '.join(duckdb_literal(f) for f in files)}]) {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        )
+        return await asyncio.to_thread(self._fetch, sql, [*params, limit, 0 if after else skip])
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        import duckdb
+        con = duckdb.connect()
+        try:
+            cursor = con.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            rows = []
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                row["created_at"] = row["created_at"].replace(tzinfo=timezone.utc).isoformat()
+                row["details"] = json.loads(row["details"]) if row.get("details") else {}
+                rows.append(row)
+            return rows
+        finally:
+            con.close()
+
+    def stats(self) -> Dict[str, Any]:
+        months = self.archived_months()
+        return {
+            "enabled": self.enabled,
+            "archived_months": len(months),
+            "oldest_month": months[0].isoformat() if months else None,
+            "boundary": self.boundary().isoformat() if months else None,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_error": self.last_error,
+        }
+
+
+async def list_audit_logs(
+    tenant_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = None
+) -> List[Dict[str, Any]]:
+    """
+    List audit logs from the database and, when start_date reaches before the
+    archive boundary, continue into the archived months.
+
+    Results stay in one (created_at, id) DESC order across both tiers, so skip
+    and cursor paging work unchanged; the archive is only read once the database
+    part of the range has been paged through.
+    """
+    filters = dict(tenant_id=tenant_id, user_id=user_id, action=action, resource_type=resource_type)
+    boundary = audit_archive.boundary() if audit_archive.enabled else None
+    if boundary is None or start_date is None or _utc(start_date) >= boundary:
+        return await repos.audit.list(
+            **filters, start_date=start_date, end_date=end_date, skip=skip, limit=limit, after=after
+        )
+
+    archive_after = after if after and _utc(after[0]) < boundary else None
+    rows: List[Dict[str, Any]] = []
+    if archive_after is None and (end_date is None or _utc(end_date) >= boundary):
+        rows = await repos.audit.list(
+            **filters, start_date=boundary, end_date=end_date, skip=skip, limit=limit, after=after
+        )
+        if len(rows) >= limit:
+            return rows
+
+    # Offset paging that ran past the database rows continues at the matching archive offset
+    archive_skip = 0
+    if not after and not rows and skip:
+        in_database = 0
+        if end_date is None or _utc(end_date) >= boundary:
+            in_database = await repos.audit.count(**filters, start_date=boundary, end_date=end_date)
+        archive_skip = max(skip - in_database, 0)
+
+    archive_end = boundary - ONE_MICROSECOND
+    if end_date is not None:
+        archive_end = min(_utc(end_date), archive_end)
+    archived = await audit_archive.query(
+        **filters,
+        start_date=start_date,
+        end_date=archive_end,
+        skip=archive_skip,
+        limit=limit - len(rows),
+        after=archive_after
+    )
+    return rows + archived
+
+
+audit_archive = AuditArchive(
+    directory=settings.audit_archive_dir,
+    retention_months=settings.audit_retention_months,
+    partitions_ahead=settings.audit_partitions_ahead,
+    interval_hours=settings.audit_maintenance_interval_hours
+)
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from starlette.routing import BaseRoute, Match
+from starlette.types import Scope
+from app.config import settings
+import random
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def match_route(routes: List[BaseRoute], scope: Scope) -> Tuple[Optional[BaseRoute], Dict[str, Any]]:
+    """Find the route that will handle the request, with its path parameters"""
+    for route in routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route, child_scope.get("path_params", {})
+    return None, {}
+
+
+def route_resource(route_path: str) -> Optional[str]:
+    """Resource type from a route template, e.g. /api/audit-logs/{log_id} -> audit_logs"""
+    parts = [p for p in route_path.split("/") if p and p != "api"]
+    if not parts or parts[0].startswith("{"):
+        return None
+    return parts[0].replace("-", "_")
+
+
+def route_resource_id(path_params: Dict[str, Any]) -> Optional[str]:
+    """The first UUID-valued path parameter, e.g. asset_id in /api/assets/{asset_id}"""
+    for value in path_params.values():
+        try:
+            return str(UUID(str(value)))
+        except ValueError:
+            continue
+    return None
+
+
+class AuditPolicy:
+    """
+    Decides which requests get an audit_logs row.
+
+    Mutations are always logged. Reads are sampled at default_read_rate unless a
+    rate is configured for the route template (e.g. "/api/assets/{asset_id}") or
+    for the resource type (e.g. "assets"); the route wins over the resource.
+    Excluded paths are never logged; a trailing "*" makes an entry a prefix.
+    """
+
+    def __init__(self, default_read_rate: float, sample_rates: Dict[str, float], exclude_paths: List[str]):
+        self.default_read_rate = default_read_rate
+        self.sample_rates = sample_rates
+        self.exact_excludes = {p for p in exclude_paths if not p.endswith("*")}
+        self.prefix_excludes = tuple(p[:-1] for p in exclude_paths if p.endswith("*"))
+
+    def is_excluded(self, path: str) -> bool:
+        return path in self.exact_excludes or path.startswith(self.prefix_excludes)
+
+    def sample_rate(self, method: str, route_path: Optional[str], resource_type: Optional[str]) -> float:
+        if method.upper() in MUTATING_METHODS:
+            return 1.0
+        if route_path in self.sample_rates:
+            return self.sample_rates[route_path]
+        if resource_type in self.sample_rates:
+            return self.sample_rates[resource_type]
+        return self.default_read_rate
+
+    def sampled(self, rate: float) -> bool:
+        return rate >= 1.0 or random.random() < rate
+
+
+audit_policy = AuditPolicy(
+    default_read_rate=settings.audit_read_sample_rate,
+    sample_rates=settings.audit_sample_rates,
+    exclude_paths=settings.audit_exclude_paths_list
+)
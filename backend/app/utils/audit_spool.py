@@ -0,0 +1,99 @@
+from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+import json
+import os
+import threading
+import time
+
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class AuditSpool:
+    """
+    Local append-only spool for audit entries the database could not take.
+
+    Entries are appended as JSON lines to the active segment file and fsynced
+    once per append call (i.e. once per batch). The active segment is rotated
+    when it reaches max_segment_bytes; sealed segments are read back by the
+    replayer and deleted once their entries are in audit_logs.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 16 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.spooled = 0
+        self.replayed = 0
+        self._active: Optional[Path] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Append entries to the active segment and fsync them (blocking; run off the event loop)"""
+        lines = "".join(json.dumps(jsonable_encoder(entry), separators=(",", ":")) + "\n" for entry in entries)
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(lines.encode("utf-8"))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.spooled += lines.count("\n")
+            if self._file.tell() >= self.max_segment_bytes:
+                self._close_segment()
+
+    def rotate(self) -> None:
+        """Seal the active segment so the replayer can pick it up"""
+        with self._lock:
+            self._close_segment()
+
+    def sealed_segments(self) -> List[Path]:
+        """Segments that are no longer being written, oldest first"""
+        if not self.directory.exists():
+            return []
+        with self._lock:
+            return sorted(p for p in self.directory.glob(f"*{SEGMENT_SUFFIX}") if p != self._active)
+
+    def read_segment(self, path: Path) -> List[Dict[str, Any]]:
+        """Load a segment's entries, skipping a torn trailing line from a crash mid-write"""
+        entries = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("created_at"):
+                    entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                entries.append(entry)
+        return entries
+
+    def remove(self, path: Path, count: int = 0) -> None:
+        """Delete a segment once it has been replayed"""
+        path.unlink(missing_ok=True)
+        self.replayed += count
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.sealed_segments()
+        with self._lock:
+            active_bytes = self._file.tell() if self._file is not None else 0
+        return {
+            "pending_segments": len(segments) + (1 if active_bytes else 0),
+            "pending_bytes": sum(p.stat().st_size for p in segments) + active_bytes,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+        }
+
+    def _open_segment(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Time-ordered names so segments replay oldest first
+        self._active = self.directory / f"audit-{time.time_ns():020d}{SEGMENT_SUFFIX}"
+        self._file = open(self._active, "ab")
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._active = None
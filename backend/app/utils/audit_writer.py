@@ -0,0 +1,223 @@
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+from app.config import settings
+from app.repositories import repos
+from app.utils.audit_spool import AuditSpool
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Background writer that batches audit-log entries off the request path.
+
+    Requests enqueue entries without waiting on the database; a single task
+    drains the bounded queue and writes multi-row inserts whenever a batch
+    fills up or the flush interval passes. When the queue is full new entries
+    are dropped (and counted) rather than slowing requests down.
+
+    If a batch insert fails or times out, the batch goes to the local spool
+    instead and the writer keeps spooling until the replayer has loaded the
+    backlog back into audit_logs. Entries get their id here, so a batch that
+    was both written and spooled is deduplicated on replay.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        write_timeout: float = 5.0,
+        spool: Optional[AuditSpool] = None,
+        replay_interval: float = 30.0
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_timeout = write_timeout
+        self.spool = spool
+        self.replay_interval = replay_interval
+        self.degraded = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_error: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._replay_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self) -> None:
+        """Start the flush task on the running event loop"""
+        if self._task is not None:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+        if self.spool is not None:
+            self._replay_task = asyncio.create_task(self._replay_loop())
+
+    async def stop(self) -> None:
+        """Stop accepting entries and flush everything still queued"""
+        self._closed = True
+        if self._task is None:
+            return
+        # The sentinel queues behind pending entries, so they are all written first
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            try:
+                await self._replay_task
+            except asyncio.CancelledError:
+                pass
+            self._replay_task = None
+        if self.spool is not None:
+            # Anything still spooled is replayed on the next start
+            self.spool.rotate()
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Queue an entry for writing; returns False if it was dropped"""
+        if self._closed:
+            self.dropped += 1
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        entry.setdefault("id", str(uuid4()))
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        if self.degraded:
+            # Database known to be unavailable: go straight to disk until the replayer catches up
+            await self._spool(batch)
+        else:
+            try:
+                await asyncio.wait_for(repos.audit.insert_many(batch), self.write_timeout)
+                self.written += len(batch)
+            except Exception as e:
+                self._error(e)
+                if self.spool is not None:
+                    self.degraded = True
+                await self._spool(batch)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    async def _spool(self, batch: List[Dict[str, Any]]) -> None:
+        if self.spool is None:
+            # Audit logging must never take the API down; count the loss and move on
+            self.failed += len(batch)
+            return
+        try:
+            await asyncio.to_thread(self.spool.append, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            self._error(e)
+
+    async def _replay_loop(self) -> None:
+        while True:
+            try:
+                await self.replay()
+            except Exception as e:
+                self._error(e)
+            await asyncio.sleep(self.replay_interval)
+
+    async def replay(self) -> bool:
+        """
+        Bulk-load spooled segments into audit_logs, oldest first.
+
+        Stops at the first failed insert (the database is still unhealthy) and
+        returns False; returns True once the spool is empty.
+        """
+        await asyncio.to_thread(self.spool.rotate)
+        for segment in await asyncio.to_thread(self.spool.sealed_segments):
+            entries = await asyncio.to_thread(self.spool.read_segment, segment)
+            try:
+                for i in range(0, len(entries), self.batch_size):
+                    await asyncio.wait_for(
+                        repos.audit.insert_many(entries[i:i + self.batch_size]), self.write_timeout
+                    )
+            except Exception as e:
+                self._error(e)
+                return False
+            await asyncio.to_thread(self.spool.remove, segment, len(entries))
+        self.degraded = False
+        return True
+
+    def _error(self, error: Exception) -> None:
+        # Only the exception type is reported by stats(); the message can name hosts or SQL
+        self.last_error = type(error).__name__
+        logger.warning("Audit writer error: %s", error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throughput and flush latency counters"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "last_error": self.last_error,
+            "degraded": self.degraded,
+            "spool": self.spool.stats() if self.spool is not None else None,
+        }
+
+
+audit_writer = AuditLogWriter(
+    max_queue_size=settings.audit_queue_max_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    write_timeout=settings.audit_write_timeout_seconds,
+    spool=AuditSpool(
+        settings.audit_spool_dir, max_segment_bytes=settings.audit_spool_segment_max_bytes
+    ) if settings.audit_spool_dir else None,
+    replay_interval=settings.audit_spool_replay_interval_seconds
+)
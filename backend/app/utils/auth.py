@@ -1,50 +1,155 @@
-from fastapi import HTTPException, Security, Depends
+from fastapi import HTTPException, Security, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from typing import Dict, Any, Optional
 from uuid import UUID
 from app.models.user import User
 from app.models.user_management import User as UserManagement
-from app.database import supabase
+from app.config import settings
+from app.repositories import repos
+from app.utils.cache import MISSING, TTLCache, create_cache
+from app.utils.permissions import Resource, Action, compile_tenant_roles, permission_bit, role_mask
+import hashlib
 import json
 import base64
+import time
 
 security = HTTPBearer()
 
+# Profile rows (or None for unknown users) keyed by user id
+user_cache = create_cache("user", ttl=settings.user_cache_ttl_seconds, max_size=settings.user_cache_max_size)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> User:
-    """Verify JWT token and return user info with tenant and role"""
-    token = credentials.credentials
+# Verified JWT claims keyed by token hash, each entry expiring with its token
+verified_token_cache = TTLCache(max_size=settings.verified_token_cache_max_size)
+
+# Compiled permission masks of each tenant's roles, keyed by tenant id
+role_cache = create_cache("roles", ttl=settings.role_cache_ttl_seconds, max_size=settings.role_cache_max_size)
+
+
+async def load_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch the users row for user_id, served from the profile cache when possible"""
+    cached = await user_cache.get(user_id, MISSING)
+    if cached is not MISSING:
+        return cached
+    
+    profile = await repos.users.get_profile(user_id)
+    if profile:
+        await user_cache.set(user_id, profile)
+        return profile
     
+    # Cache "not found" briefly so unknown users don't hit the database on every request
+    await user_cache.set(user_id, None, ttl=settings.user_cache_negative_ttl_seconds)
+    return None
+
+
+async def invalidate_user_profile(user_id: str) -> None:
+    """Drop a cached profile so role/status changes take effect immediately"""
+    await user_cache.invalidate(str(user_id))
+
+
+async def load_tenant_role_masks(tenant_id: UUID) -> Dict[str, int]:
+    """Permission masks of the tenant's roles by role code, served from the role cache when possible"""
+    masks = await role_cache.get(str(tenant_id))
+    if masks is None:
+        masks = compile_tenant_roles(await repos.roles.list(tenant_id))
+        await role_cache.set(str(tenant_id), masks)
+    return masks
+
+
+async def invalidate_tenant_roles(tenant_id: UUID) -> None:
+    """Drop a tenant's compiled roles so role changes take effect on the next request"""
+    await role_cache.invalidate(str(tenant_id))
+
+
+def decode_unverified(token: str) -> Dict[str, Any]:
+    """Decode the JWT payload without verifying the signature"""
+    # Try to decode using python-jose first
     try:
-        # Try to decode using python-jose first
-        try:
-            decoded_token: Dict[str, Any] = jwt.decode(
-                token,
-                options={
-                    "verify_signature": False,
-                    "verify_exp": False,
-                    "verify_nbf": False,
-                    "verify_iat": False,
-                    "verify_aud": False,
-                    "verify_iss": False
-                }
-            )
-        except Exception:
-            # If jwt.decode fails, manually decode the payload
-            # JWT format: header.payload.signature
-            parts = token.split('.')
-            if len(parts) != 3:
-                raise HTTPException(status_code=401, detail="Invalid token format")
-            
-            # Decode the payload (second part)
-            payload = parts[1]
-            # Add padding if needed
-            padding = 4 - len(payload) % 4
-            if padding != 4:
-                payload += '=' * padding
-            decoded_bytes = base64.urlsafe_b64decode(payload)
-            decoded_token = json.loads(decoded_bytes.decode('utf-8'))
+        return jwt.decode(
+            token,
+            options={
+                "verify_signature": False,
+                "verify_exp": False,
+                "verify_nbf": False,
+                "verify_iat": False,
+                "verify_aud": False,
+                "verify_iss": False
+            }
+        )
+    except Exception:
+        # If jwt.decode fails, manually decode the payload
+        # JWT format: header.payload.signature
+        parts = token.split('.')
+        if len(parts) != 3:
+            raise HTTPException(status_code=401, detail="Invalid token format")
+        
+        # Decode the payload (second part)
+        payload = parts[1]
+        # Add padding if needed
+        padding = 4 - len(payload) % 4
+        if padding != 4:
+            payload += '=' * padding
+        decoded_bytes = base64.urlsafe_b64decode(payload)
+        return json.loads(decoded_bytes.decode('utf-8'))
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Verify the JWT signature with the configured secret and return its claims.
+    
+    Verified claims are cached by token hash until the token expires, so a token
+    we have already seen skips the signature check.
+    """
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = verified_token_cache.get(token_hash)
+    if claims is not None:
+        return claims
+    
+    try:
+        claims = jwt.decode(
+            token,
+            settings.supabase_jwt_secret,
+            algorithms=[settings.jwt_algorithm],
+            options={"verify_aud": False}
+        )
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid authentication token: {str(e)}")
+    
+    exp = claims.get("exp")
+    if exp:
+        ttl = exp - time.time()
+        if ttl > 0:
+            verified_token_cache.set(token_hash, claims, ttl=ttl)
+    return claims
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Optional[User]:
+    """Build a User from tenant_id/role custom claims, or None if the claims are missing"""
+    app_metadata = claims.get("app_metadata") or {}
+    tenant_id = app_metadata.get("tenant_id")
+    role = app_metadata.get("role")
+    if not claims.get("sub") or not tenant_id or not role:
+        return None
+    return User(
+        id=UUID(claims["sub"]),
+        email=claims.get("email"),
+        tenant_id=UUID(tenant_id),
+        role=role,
+        status=app_metadata.get("status")
+    )
+
+
+async def authenticate_token(token: str) -> User:
+    """Verify JWT token and return user info with tenant and role"""
+    try:
+        if settings.jwt_claims_auth:
+            # Fast path: trust signed custom claims and skip the users lookup
+            decoded_token = verify_token(token)
+            claims_user = user_from_claims(decoded_token)
+            if claims_user:
+                return claims_user
+        else:
+            decoded_token = decode_unverified(token)
         
         # Extract user information from token
         user_id = decoded_token.get("sub")
@@ -55,9 +160,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
         
         # Fetch user from database to get tenant_id and role
         try:
-            user_response = supabase.table("users").select("*").eq("id", user_id).execute()
-            if user_response.data and len(user_response.data) > 0:
-                user_data = user_response.data[0]
+            user_data = await load_user_profile(user_id)
+            if user_data:
                 return User(
                     id=UUID(user_data["id"]),
                     email=user_data.get("email") or email,
@@ -78,6 +182,52 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
         raise HTTPException(status_code=401, detail=f"Authentication error: {str(e)}")
 
 
+async def resolve_request_user(request: Request, token: str) -> User:
+    """
+    Resolve the user for a bearer token once per request.
+    
+    The result (or the authentication error) is memoized on request.state so the
+    audit middleware and the route dependencies share a single JWT decode and users
+    lookup. The user's tenant_id and role are put on request.state as well.
+    """
+    if getattr(request.state, "auth_token", None) == token:
+        if request.state.auth_error is not None:
+            raise request.state.auth_error
+        return request.state.user
+    
+    request.state.auth_token = token
+    request.state.auth_error = None
+    request.state.user = None
+    try:
+        request.state.user = await authenticate_token(token)
+    except HTTPException as e:
+        request.state.auth_error = e
+        raise
+    if request.state.user.tenant_id:
+        request.state.tenant_id = request.state.user.tenant_id
+        request.state.user_role = request.state.user.role
+    return request.state.user
+
+
+async def get_request_user(request: Request) -> Optional[User]:
+    """Get the authenticated user from the Authorization header, or None if not authenticated"""
+    authorization = request.headers.get("Authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        return await resolve_request_user(request, authorization.split(" ")[1])
+    except HTTPException:
+        return None
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Security(security)
+) -> User:
+    """Dependency returning the authenticated user, reusing the per-request identity context"""
+    return await resolve_request_user(request, credentials.credentials)
+
+
 async def get_current_tenant(current_user: User = Depends(get_current_user)) -> UUID:
     """Get current user's tenant_id"""
     if not current_user.tenant_id:
@@ -97,24 +247,25 @@ def require_role(allowed_roles: list[str]):
     return role_checker
 
 
-def require_permission(resource: str, action: str):
-    """Dependency factory to require specific permission"""
-    from app.utils.permissions import Resource, Action, has_permission
+def require_permission(resource: Resource, action: Action):
+    """
+    Dependency factory requiring a permission; resolves to the current user.
+    
+    Checks the user's role against the tenant's own definition of that role
+    (roles table) when there is one, otherwise against the default matrix.
+    """
+    bit = permission_bit(resource, action)
     
     async def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not current_user.role:
-            raise HTTPException(status_code=403, detail="User role not found")
+        role = current_user.role or "viewer"
+        tenant_masks = None
+        if role != "super_admin" and current_user.tenant_id:
+            try:
+                tenant_masks = await load_tenant_role_masks(current_user.tenant_id)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to load role permissions: {str(e)}")
         
-        try:
-            resource_enum = Resource(resource)
-            action_enum = Action(action)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid resource or action: {resource}.{action}")
-        
-        if not has_permission(current_user.role, resource_enum, action_enum):
-            raise HTTPException(
-                status_code=403,
-                detail=f"Access denied. Required permission: {resource}.{action}"
-            )
+        if not role_mask(role, tenant_masks) & bit:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
         return current_user
     return permission_checker
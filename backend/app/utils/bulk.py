@@ -0,0 +1,102 @@
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Set, Tuple, Type
+from uuid import UUID
+from pydantic import BaseModel, ValidationError
+from app.models.bulk import BulkCreateResult, BulkItemResult
+from app.repositories import RepositoryError, UniqueViolation
+
+Row = Dict[str, Any]
+
+
+def validation_message(error: ValidationError) -> str:
+    """One-line summary of a pydantic error, e.g. "email: value is not a valid email address" """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def validate_items(
+    items: Sequence[Any], model: Type[BaseModel], key: str, mode: str = "python"
+) -> Tuple[List[BulkItemResult], List[Tuple[int, Row]]]:
+    """
+    Validate items with model and reject repeats of key within the request.
+
+    Returns a result per item (failed for the rejected ones) and the (index, row)
+    pairs still to be written, rows dumped in the given model_dump mode.
+    """
+    results: List[BulkItemResult] = [BulkItemResult(index=i) for i in range(len(items))]
+    pending: List[Tuple[int, Row]] = []
+    seen: Set[Any] = set()
+    for i, item in enumerate(items):
+        try:
+            row = model.model_validate(item).model_dump(mode=mode)
+        except ValidationError as e:
+            results[i] = BulkItemResult(index=i, status="failed", error=validation_message(e))
+            continue
+        if row[key] in seen:
+            results[i] = BulkItemResult(index=i, status="failed", error=f"Duplicate {key} in request")
+            continue
+        seen.add(row[key])
+        pending.append((i, row))
+    return results, pending
+
+
+def created_result(results: List[BulkItemResult]) -> BulkCreateResult:
+    failed = sum(1 for r in results if r.status == "failed")
+    return BulkCreateResult(created=len(results) - failed, failed=failed, results=results)
+
+
+async def bulk_create(
+    tenant_id: UUID,
+    items: Sequence[Any],
+    model: Type[BaseModel],
+    key: str,
+    existing: Callable[[UUID, List[str]], Awaitable[Set[str]]],
+    create_many: Callable[[List[Row]], Awaitable[List[Row]]],
+    create: Callable[[Row], Awaitable[Any]],
+    duplicate_error: str,
+    chunk_size: int = 200
+) -> BulkCreateResult:
+    """
+    Validate and insert items independently, so one bad item does not fail the rest.
+
+    Items are validated with model, duplicates of key are rejected in memory and
+    then, chunk by chunk, against the tenant with one lookup, and the remaining
+    rows go in as one multi-row insert per chunk. A chunk that still hits the
+    unique index (a concurrent insert) is retried row by row.
+    """
+    results, pending = validate_items(items, model, key)
+    for _, row in pending:
+        row["tenant_id"] = tenant_id  # Auto-inject tenant_id
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        taken = await existing(tenant_id, [row[key] for _, row in chunk])
+        for i, row in chunk:
+            if row[key] in taken:
+                results[i] = BulkItemResult(index=i, status="failed", error=duplicate_error)
+        chunk = [(i, row) for i, row in chunk if row[key] not in taken]
+        if not chunk:
+            continue
+
+        try:
+            created = await create_many([row for _, row in chunk])
+        except RepositoryError:
+            # Lost a race with another insert: fall back to one row at a time for this chunk
+            for i, row in chunk:
+                try:
+                    results[i] = BulkItemResult(index=i, id=(await create(row))["id"])
+                except UniqueViolation:
+                    results[i] = BulkItemResult(index=i, status="failed", error=duplicate_error)
+                except RepositoryError as e:
+                    results[i] = BulkItemResult(index=i, status="failed", error=str(e))
+            continue
+        except Exception as e:
+            for i, _ in chunk:
+                results[i] = BulkItemResult(index=i, status="failed", error=f"Insert failed: {e}")
+            continue
+
+        created_ids = {row[key]: row["id"] for row in created}
+        for i, row in chunk:
+            results[i] = BulkItemResult(index=i, id=created_ids.get(row[key]))
+
+    return created_result(results)
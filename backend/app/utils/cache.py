@@ -0,0 +1,488 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from app.config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry and hit/miss counters.
+
+    Besides the entry count, the cache can be capped by max_bytes (0 = no cap),
+    counted from the size callers pass to set.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, max_bytes: int = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 0) -> None:
+        """Store value under key, evicting the least recently used entries when full"""
+        if self.max_size <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_size or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return size and hit/miss counters"""
+        with self._lock:
+            stats = {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+            if self.max_bytes:
+                stats["bytes"] = self._bytes
+                stats["max_bytes"] = self.max_bytes
+            return stats
+
+
+def _serializer(name: str) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """(dumps, loads) for the CACHE_SERIALIZER setting; values are JSON-compatible rows"""
+    if name == "orjson":
+        import orjson
+        return (lambda value: orjson.dumps(value, default=str)), orjson.loads
+    if name == "msgpack":
+        import msgpack
+        return (
+            (lambda value: msgpack.packb(value, use_bin_type=True, default=str)),
+            (lambda data: msgpack.unpackb(data, raw=False))
+        )
+    if name == "json":
+        return (lambda value: json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")), json.loads
+    raise ValueError(f"Unknown CACHE_SERIALIZER: {name}")
+
+
+class CacheBackend(ABC):
+    """Key-value store behind the caches"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        """Stored value, or MISSING"""
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key everywhere it is cached, including other workers' local copies"""
+        ...
+
+    @abstractmethod
+    async def version(self, key: str) -> Optional[int]:
+        """Current value of a version counter, or None if it cannot be read"""
+        ...
+
+    @abstractmethod
+    async def bump(self, key: str) -> None:
+        """Advance a version counter"""
+        ...
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process LRU backend; each worker has its own entries and counters"""
+
+    def __init__(self, max_size: int = 1024, max_bytes: int = 0):
+        self._entries = TTLCache(max_size=max_size, max_bytes=max_bytes)
+        # Counters are never evicted: a counter that reset could resurrect old entries
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Any:
+        return self._entries.get(key, MISSING)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        size = len(json.dumps(value, default=str)) if self._entries.max_bytes else 0
+        self._entries.set(key, value, ttl=ttl, size=size)
+
+    async def delete(self, key: str) -> None:
+        self._entries.invalidate(key)
+
+    async def version(self, key: str) -> Optional[int]:
+        return self._versions.get(key, 0)
+
+    async def bump(self, key: str) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", **self._entries.stats(), "versions": len(self._versions)}
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared backend on a Redis server, so all workers and pods see the same entries.
+
+    Values read from Redis are also kept in a small local LRU for local_ttl
+    seconds. Deletes are broadcast on a pub/sub channel and every worker drops
+    the key from its local copy. Redis errors are counted and treated as
+    misses, so an unavailable Redis slows requests down but never fails them.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        serializer: str = "orjson",
+        prefix: str = "asset-mgmt:",
+        local_max_size: int = 10000,
+        local_ttl: float = 5.0
+    ):
+        self.url = url
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidate"
+        self.local_ttl = local_ttl
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._dumps, self._loads = _serializer(serializer)
+        self._local = TTLCache(max_size=local_max_size, ttl=local_ttl)
+        self._client = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(self.url)
+        return self._client
+
+    async def get(self, key: str) -> Any:
+        value = self._local.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        try:
+            data = await self.client.get(self.prefix + key)
+        except Exception as e:
+            self._error(e)
+            return MISSING
+        if data is None:
+            return MISSING
+        value = self._loads(data)
+        self._local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            await self.client.set(self.prefix + key, self._dumps(value), px=max(int(ttl * 1000), 1))
+        except Exception as e:
+            self._error(e)
+            return
+        self._local.set(key, value, ttl=min(ttl, self.local_ttl))
+
+    async def delete(self, key: str) -> None:
+        self._local.invalidate(key)
+        try:
+            await self.client.delete(self.prefix + key)
+            await self.client.publish(self.channel, key)
+        except Exception as e:
+            self._error(e)
+
+    async def version(self, key: str) -> Optional[int]:
+        try:
+            _, value = await self._seeded(key, "get")
+            return int(value)
+        except Exception as e:
+            self._error(e)
+            return None
+
+    async def bump(self, key: str) -> None:
+        try:
+            await self._seeded(key, "incr")
+        except Exception as e:
+            self._error(e)
+
+    async def _seeded(self, key: str, command: str) -> list:
+        """
+        Run command on a version counter in one MULTI/EXEC with SET NX seeding it.
+
+        Missing counters start at the clock, so a counter lost to eviction never goes
+        backwards, whether it is next read or bumped (a bare INCR would restart it at 1).
+        """
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self.prefix + key, time.time_ns(), nx=True)
+            getattr(pipe, command)(self.prefix + key)
+            return await pipe.execute()
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _listen(self) -> None:
+        """Drop local copies of keys deleted by any worker"""
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Deletes may have been missed while unsubscribed
+                self._local.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        key = message["data"]
+                        self._local.invalidate(key.decode("utf-8") if isinstance(key, bytes) else key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error(e)
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def _error(self, error: Exception) -> None:
+        self.errors += 1
+        # Only the exception type is reported by stats(); the message can name the Redis host.
+        # An outage fails every call, so log when the kind of error changes rather than each time
+        if type(error).__name__ != self.last_error:
+            logger.warning("Redis cache error: %s", error)
+        self.last_error = type(error).__name__
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "local": self._local.stats(),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "subscribed": self._listener is not None and not self._listener.done(),
+        }
+
+
+class Cache:
+    """A named region of a cache backend with its own TTL and hit/miss counters"""
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float = 60.0):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: Any) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: Any, default: Any = None) -> Any:
+        value = await self.backend.get(self._key(key))
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    async def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        await self.backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    async def invalidate(self, key: Any) -> None:
+        await self.backend.delete(self._key(key))
+
+    async def version(self, key: Any) -> Optional[int]:
+        return await self.backend.version(self._key(f"version:{key}"))
+
+    async def bump(self, key: Any) -> None:
+        await self.backend.bump(self._key(f"version:{key}"))
+
+    def stats(self) -> Dict[str, Any]:
+        # A local backend belongs to this cache alone; the shared one is reported on its own
+        stats = self.backend.stats() if isinstance(self.backend, LocalCacheBackend) else {}
+        return {**stats, "hits": self.hits, "misses": self.misses}
+
+
+_redis_backend: Optional[RedisCacheBackend] = None
+
+
+def shared_backend() -> Optional[RedisCacheBackend]:
+    """The Redis backend shared by all caches, or None when CACHE_BACKEND is local"""
+    global _redis_backend
+    if settings.cache_backend == "local":
+        return None
+    if settings.cache_backend != "redis":
+        raise ValueError(f"Unknown CACHE_BACKEND: {settings.cache_backend}")
+    if _redis_backend is None:
+        _redis_backend = RedisCacheBackend(
+            settings.redis_url or "redis://localhost:6379/0",
+            serializer=settings.cache_serializer,
+            local_max_size=settings.cache_local_max_size,
+            local_ttl=settings.cache_local_ttl_seconds
+        )
+    return _redis_backend
+
+
+def create_cache(namespace: str, ttl: float, max_size: int, max_bytes: int = 0) -> Cache:
+    """
+    A cache region on the configured backend: its own LRU when CACHE_BACKEND is
+    local (max_size/max_bytes bound it), otherwise the shared Redis backend.
+    """
+    backend = shared_backend() or LocalCacheBackend(max_size=max_size, max_bytes=max_bytes)
+    return Cache(backend, namespace, ttl)
+
+
+async def start_caches() -> None:
+    """Subscribe to invalidation broadcasts (no-op for the local backend)"""
+    backend = shared_backend()
+    if backend is not None:
+        await backend.start()
+
+
+async def close_caches() -> None:
+    backend = shared_backend()
+    if backend is not None:
+        await backend.close()
+
+
+def cache_backend_stats() -> Optional[Dict[str, Any]]:
+    backend = shared_backend()
+    return backend.stats() if backend is not None else None
+
+
+class TenantQueryCache:
+    """
+    Read-through cache for list query results, scoped per tenant.
+
+    Each tenant has a version counter that is part of every key. Mutating
+    handlers bump it after their write, so a result cached before the write can
+    never be served again; the orphaned entries simply expire. With the Redis
+    backend the counter is shared, so a write in one worker invalidates the
+    results cached by all of them.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+
+    async def bump(self, tenant_id: Any) -> None:
+        """Invalidate every cached result of the tenant (call after each write)"""
+        await self.cache.bump(tenant_id)
+
+    async def get_or_load(
+        self,
+        tenant_id: Any,
+        query: str,
+        params: Dict[str, Any],
+        load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached result of query with params, calling load on a miss"""
+        # Read the version before loading: a write during the load bumps it, so
+        # the (possibly stale) result is stored under a key nobody asks for again
+        version = await self.cache.version(tenant_id)
+        if version is None:
+            return await load()
+        key = f"{tenant_id}:{version}:{query}?{_normalize(params)}"
+        result = await self.cache.get(key, MISSING)
+        if result is not MISSING:
+            return result
+        result = await load()
+        await self.cache.set(key, result)
+        return result
+
+    async def etag(self, tenant_id: Any, query: str, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Weak ETag for the result of query with params, derived from the tenant
+        version alone so it can be checked without running the query.
+
+        With the local backend, writes handled by other workers do not reach this
+        worker's counter, so the tag also rolls over every TTL period; that bounds
+        staleness the same way it is bounded for cached results.
+        """
+        version = await self.cache.version(tenant_id)
+        if version is None:
+            return None
+        tag = f"{version:x}"
+        if isinstance(self.cache.backend, LocalCacheBackend):
+            tag += f".{int(time.time() // max(self.cache.ttl, 1)):x}"
+        digest = hashlib.sha1(f"{tenant_id}:{query}?{_normalize(params)}".encode("utf-8")).hexdigest()[:16]
+        return f'W/"{tag}-{digest}"'
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def _normalize(params: Dict[str, Any]) -> str:
+    """Canonical query-string form of the parameters that determine a result"""
+    return "&".join(f"{name}={value}" for name, value in sorted(params.items()) if value is not None)
+
+
+# Results of the asset, employee and assignment list endpoints
+list_cache = TenantQueryCache(create_cache(
+    "list",
+    ttl=settings.list_cache_ttl_seconds,
+    max_size=settings.list_cache_max_size,
+    max_bytes=settings.list_cache_max_bytes
+))
@@ -0,0 +1,203 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.utils.pagination import Cursor, row_cursor
+import asyncio
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zlib
+
+Row = Dict[str, Any]
+
+# Rows fetched per database round trip while streaming an export
+EXPORT_PAGE_SIZE = 1000
+
+# Serialized rows are buffered up to this size before being sent (or compressed)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Values the csv module writes as they are
+PLAIN_TYPES = (str, int, float, bool, type(None))
+
+FetchPage = Callable[[Optional[Cursor], int], Awaitable[List[Row]]]
+
+
+async def paged_rows(fetch_page: FetchPage, page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[Row]:
+    """
+    Iterate over every row of a (created_at, id)-ordered listing, one keyset page at a time.
+
+    The first page is fetched before returning, so database errors surface while
+    an error status can still be sent rather than after the response has started.
+    """
+    first = await fetch_page(None, page_size)
+
+    async def rows() -> AsyncIterator[Row]:
+        page = first
+        while True:
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            page = await fetch_page(row_cursor(page[-1]), page_size)
+
+    return rows()
+
+
+def _json_default(value: Any) -> Any:
+    """
+    JSON form of the values json cannot encode itself.
+
+    Repository rows are already JSON-shaped (PostgREST returns JSON and the asyncpg
+    backend converts its values), so only stray dates, UUIDs or Decimals reach
+    this; it is much cheaper than running jsonable_encoder over every row.
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return jsonable_encoder(value)
+
+
+async def ndjson_lines(rows: AsyncIterator[Row], columns: Sequence[str]) -> AsyncIterator[str]:
+    async for row in rows:
+        record = {column: row.get(column) for column in columns}
+        yield json.dumps(record, separators=(",", ":"), default=_json_default) + "\n"
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def csv_lines(rows: AsyncIterator[Row], columns: Sequence[str]) -> AsyncIterator[str]:
+    """CSV with a header row; nested values (e.g. details) are written as JSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        values = [row.get(column) for column in columns]
+        writer.writerow([v if type(v) in PLAIN_TYPES else _csv_value(v) for v in values])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _chunks(lines: AsyncIterator[str], compress: bool) -> AsyncIterator[bytes]:
+    """Batch lines into chunks of about EXPORT_CHUNK_BYTES, gzipping them on the fly if asked"""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending: List[bytes] = []
+    size = 0
+    async for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = gzip.compress(chunk) if gzip else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(pending)
+    if gzip:
+        chunk = gzip.compress(chunk) + gzip.flush()
+    if chunk:
+        yield chunk
+
+
+def duckdb_literal(value: Any) -> str:
+    """Quote a value (e.g. a file path) as a DuckDB string literal (table functions take literal paths)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def duckdb_columns(columns: Dict[str, str]) -> str:
+    """Column name -> type mapping as the struct literal read_json expects"""
+    return "{" + ", ".join(f"{duckdb_literal(name)}: {duckdb_literal(kind)}" for name, kind in columns.items()) + "}"
+
+
+def _write_parquet(staging: Path, target: Path, columns: Dict[str, str]) -> None:
+    import duckdb
+    con = duckdb.connect()
+    try:
+        con.execute(
+            f"COPY (SELECT * FROM read_json({duckdb_literal(staging)}, format = 'newline_delimited', "
+            f"columns = {duckdb_columns(columns)})) "
+            f"TO {duckdb_literal(target)} (FORMAT PARQUET, COMPRESSION ZSTD)"
+        )
+    finally:
+        con.close()
+
+
+async def _parquet_chunks(rows: AsyncIterator[Row], columns: Dict[str, str]) -> AsyncIterator[bytes]:
+    """
+    Parquet keeps its metadata in a footer, so rows are staged on disk as NDJSON,
+    converted with DuckDB and the finished file is then streamed back; memory
+    stays flat, the first byte waits for the last row.
+    """
+    directory = Path(tempfile.mkdtemp(prefix="export-"))
+    try:
+        staging = directory / "rows.ndjson"
+        target = directory / "rows.parquet"
+        with open(staging, "w", encoding="utf-8") as f:
+            pending: List[str] = []
+            async for line in ndjson_lines(rows, list(columns)):
+                pending.append(line)
+                if len(pending) >= EXPORT_PAGE_SIZE:
+                    await asyncio.to_thread(f.writelines, pending)
+                    pending = []
+            f.writelines(pending)
+        await asyncio.to_thread(_write_parquet, staging, target, columns)
+        staging.unlink()
+        with open(target, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, EXPORT_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def export_response(
+    rows: AsyncIterator[Row],
+    format: str,
+    columns: Sequence[str],
+    filename: str,
+    compress: bool = True,
+    column_types: Optional[Dict[str, str]] = None
+) -> StreamingResponse:
+    """
+    Stream rows as NDJSON or CSV (optionally gzipped) or Parquet as a file download.
+
+    Parquet files are zstd-compressed internally, so compress does not apply to
+    them; column_types gives their DuckDB column types (VARCHAR by default).
+    """
+    if format == "parquet":
+        types = {column: (column_types or {}).get(column, "VARCHAR") for column in columns}
+        return StreamingResponse(
+            _parquet_chunks(rows, types),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}.parquet"'}
+        )
+    lines = csv_lines(rows, columns) if format == "csv" else ndjson_lines(rows, columns)
+    filename = f"{filename}.{format}" + (".gz" if compress else "")
+    return StreamingResponse(
+        _chunks(lines, compress),
+        media_type="application/gzip" if compress else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,374 @@
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type
+from datetime import date, datetime, timezone
+from itertools import islice
+from pathlib import Path
+from uuid import UUID, uuid4
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+from pydantic import BaseModel, ValidationError
+from app.config import settings
+from app.models.imports import ImportJob
+from app.utils.bulk import validation_message
+from app.utils.cache import create_cache, list_cache
+import asyncio
+import csv
+import io
+import time
+
+Row = Dict[str, Any]
+Upsert = Callable[[UUID, List[Row]], Awaitable[List[Row]]]
+
+IMPORT_FORMATS = {".csv": "csv", ".xlsx": "xlsx"}
+
+ERROR_REPORT_COLUMNS = ["row", "key", "error"]
+
+# The upload is read from the raw request stream, so the form is only described for the docs
+IMPORT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+            }
+        },
+    }
+}
+
+
+class _UploadPart:
+    """python-multipart callbacks that collect the data of the first file part and skip the rest"""
+
+    def __init__(self):
+        self.filename: Optional[str] = None
+        self.data: List[bytes] = []
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if self.filename is None and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.data.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+
+async def receive_upload(request: Request, target: Path, max_bytes: int) -> Optional[str]:
+    """
+    Stream the file of a multipart/form-data request to target; returns its file name.
+
+    The body is parsed chunk by chunk as it arrives and written straight to disk,
+    so memory use does not depend on the size of the upload. Returns None when
+    the request carried no file.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data file upload")
+
+    part = _UploadPart()
+    parser = MultipartParser(params[b"boundary"], part.callbacks())
+    received = 0
+    with open(target, "wb") as f:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+            try:
+                parser.write(chunk)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+            if part.data:
+                data = b"".join(part.data)
+                part.data.clear()
+                await asyncio.to_thread(f.write, data)
+        parser.finalize()
+    return part.filename
+
+
+def _column(name: Any) -> str:
+    """Header cell as a field name, e.g. "Asset Tag" -> asset_tag"""
+    return str(name).strip().lower().replace(" ", "_") if name is not None else ""
+
+
+def _cell(value: Any) -> Optional[str]:
+    """A cell as the text a CSV file would hold, so both formats validate the same way"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip() or None
+
+
+def _records(rows: Iterator[Tuple[Any, ...]], progress: Callable[[int], float]) -> Iterator[Tuple[int, Row, float]]:
+    """
+    (row number, record, progress) for each non-empty data row; the first row is the header.
+
+    Empty cells are left out of the record, so model defaults apply to them.
+    """
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [_column(name) for name in header]
+    for number, values in enumerate(rows, start=2):
+        record = {}
+        for column, value in zip(columns, values):
+            value = _cell(value)
+            if column and value is not None:
+                record[column] = value
+        if record:
+            yield number, record, progress(number)
+
+
+def _read_csv(path: Path) -> Iterator[Tuple[int, Row, float]]:
+    size = max(path.stat().st_size, 1)
+    with open(path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        yield from _records(iter(csv.reader(text)), lambda _: min(raw.tell() / size, 1.0))
+
+
+def _read_xlsx(path: Path) -> Iterator[Tuple[int, Row, float]]:
+    from openpyxl import load_workbook
+    # Opened as a file object: openpyxl would reject the staged upload's file name.
+    # Read-only mode streams rows from the sheet XML instead of loading the workbook.
+    with open(path, "rb") as f:
+        workbook = load_workbook(f, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = max(sheet.max_row or 0, 1)
+            yield from _records(sheet.iter_rows(values_only=True), lambda number: min(number / total, 1.0))
+        finally:
+            workbook.close()
+
+
+def _take(rows: Iterator, count: int) -> List:
+    return list(islice(rows, count))
+
+
+def _error_text(error: Exception) -> str:
+    # PostgREST errors carry the database message separately from their repr
+    return getattr(error, "message", None) or str(error) or type(error).__name__
+
+
+class ImportManager:
+    """
+    Spreadsheet (CSV/XLSX) imports run as background tasks.
+
+    The upload is streamed to IMPORT_DIR, then read back a batch of rows at a
+    time: each row is validated with the resource's create model and valid rows
+    are upserted one batch per statement. Rows that fail are written to a CSV
+    error report as the import goes. Job progress is published to the cache
+    backend after every batch, so any worker can report it when the cache is
+    shared.
+    """
+
+    def __init__(
+        self,
+        directory: str = "imports",
+        batch_size: int = 500,
+        max_upload_bytes: int = 200 * 1024 * 1024,
+        job_ttl_hours: float = 24.0
+    ):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.max_upload_bytes = max_upload_bytes
+        self.job_ttl_seconds = job_ttl_hours * 3600
+        self.jobs = create_cache("import", ttl=self.job_ttl_seconds, max_size=1000)
+        self._tasks: Dict[UUID, asyncio.Task] = {}
+
+    def error_report_path(self, job: ImportJob) -> Path:
+        return self.directory / f"{job.id}.errors.csv"
+
+    async def start_import(
+        self,
+        request: Request,
+        tenant_id: UUID,
+        resource: str,
+        model: Type[BaseModel],
+        key: str,
+        upsert: Upsert
+    ) -> ImportJob:
+        """Receive the uploaded file and start importing it; returns the pending job"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(self._remove_expired)
+        job_id = uuid4()
+        upload = self.directory / f"{job_id}.upload"
+        try:
+            filename = await receive_upload(request, upload, self.max_upload_bytes)
+            if filename is None:
+                raise HTTPException(status_code=400, detail="No file uploaded")
+            file_format = IMPORT_FORMATS.get(Path(filename).suffix.lower())
+            if file_format is None:
+                raise HTTPException(status_code=400, detail="Only .csv and .xlsx files can be imported")
+        except BaseException:
+            upload.unlink(missing_ok=True)
+            raise
+
+        job = ImportJob(
+            id=job_id,
+            tenant_id=tenant_id,
+            resource=resource,
+            filename=filename,
+            format=file_format,
+            started_at=datetime.now(timezone.utc)
+        )
+        await self._publish(job)
+        self._tasks[job_id] = asyncio.create_task(self._run(job, upload, model, key, upsert))
+        return job
+
+    async def get(self, tenant_id: UUID, resource: str, job_id: UUID) -> Optional[ImportJob]:
+        data = await self.jobs.get(str(job_id))
+        if data is None:
+            return None
+        job = ImportJob.model_validate(data)
+        if job.tenant_id != tenant_id or job.resource != resource:
+            return None
+        return job
+
+    async def stop(self) -> None:
+        """Cancel running imports (they are marked failed)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _publish(self, job: ImportJob) -> None:
+        await self.jobs.set(str(job.id), job.model_dump(mode="json"))
+
+    async def _run(self, job: ImportJob, upload: Path, model: Type[BaseModel], key: str, upsert: Upsert) -> None:
+        rows = _read_xlsx(upload) if job.format == "xlsx" else _read_csv(upload)
+        try:
+            with open(self.error_report_path(job), "w", newline="", encoding="utf-8") as report_file:
+                report = csv.writer(report_file)
+                report.writerow(ERROR_REPORT_COLUMNS)
+                job.status = "running"
+                await self._publish(job)
+
+                batch: List[Tuple[int, Row]] = []
+                keys: Set[str] = set()
+                while True:
+                    # Parsing is blocking work, so each batch of rows is read in a thread
+                    chunk = await asyncio.to_thread(_take, rows, self.batch_size)
+                    for number, record, progress in chunk:
+                        job.rows_processed += 1
+                        job.progress = progress
+                        try:
+                            row = model.model_validate(record).model_dump(mode="json", exclude_unset=True)
+                        except ValidationError as e:
+                            job.failed += 1
+                            report.writerow([number, record.get(key), validation_message(e)])
+                            continue
+                        if row[key] in keys:
+                            # The same key twice in one statement is ambiguous: let the later row win
+                            await self._flush(job, batch, key, upsert, report)
+                            batch, keys = [], set()
+                        batch.append((number, row))
+                        keys.add(row[key])
+                    if len(batch) >= self.batch_size or not chunk:
+                        await self._flush(job, batch, key, upsert, report)
+                        batch, keys = [], set()
+                        report_file.flush()
+                        await self._publish(job)
+                    if not chunk:
+                        break
+
+            job.status = "completed"
+            job.progress = 1.0
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Import interrupted by server shutdown"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = _error_text(e)
+        finally:
+            rows.close()
+            upload.unlink(missing_ok=True)
+            job.finished_at = datetime.now(timezone.utc)
+            self._tasks.pop(job.id, None)
+            await self._publish(job)
+
+    async def _flush(self, job: ImportJob, batch: List[Tuple[int, Row]], key: str, upsert: Upsert, report) -> None:
+        if not batch:
+            return
+        rejected: Set[str] = set()
+        try:
+            results = await upsert(job.tenant_id, [row for _, row in batch])
+        except Exception:
+            # One bad row fails the whole statement: retry the batch row by row to find it
+            results = []
+            for number, row in batch:
+                try:
+                    results += await upsert(job.tenant_id, [row])
+                except Exception as e:
+                    rejected.add(row[key])
+                    job.failed += 1
+                    report.writerow([number, row[key], _error_text(e)])
+
+        imported = {result[key]: result for result in results}
+        for number, row in batch:
+            result = imported.get(row[key])
+            if result is None:
+                if row[key] not in rejected:
+                    # Skipped by ON CONFLICT: a concurrent request inserted the same key
+                    job.failed += 1
+                    report.writerow([number, row[key], "Conflicts with a concurrent insert, import the row again"])
+            elif result["inserted"]:
+                job.created += 1
+            else:
+                job.updated += 1
+        if imported:
+            await list_cache.bump(job.tenant_id)
+
+    def _remove_expired(self) -> None:
+        """Delete error reports (and any orphaned uploads) older than the job TTL"""
+        cutoff = time.time() - self.job_ttl_seconds
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+
+import_manager = ImportManager(
+    directory=settings.import_dir,
+    batch_size=settings.import_batch_size,
+    max_upload_bytes=settings.import_max_upload_bytes,
+    job_ttl_hours=settings.import_job_ttl_hours
+)
@@ -1,115 +1,100 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-from typing import Callable
-from app.database import supabase
-from app.models.user import User
-from app.utils.auth import get_current_user
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import json
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.audit_writer import audit_writer
+from app.utils.audit_policy import audit_policy, match_route, route_resource, route_resource_id
+from app.utils.auth import get_request_user
+from datetime import datetime, timezone
 import time
 
-security = HTTPBearer(auto_error=False)
 
+class AuditLogMiddleware:
+    """
+    ASGI middleware to log API requests for audit purposes, filtered by the audit policy.
+
+    Status code and duration are taken from the messages the app sends, so the
+    response body streams straight through and the entry is queued once the
+    last body chunk has gone out.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class AuditLogMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all API requests for audit purposes"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.time()
-        path = str(request.url.path)
-        
-        # Skip audit logging for health checks, static files, and public auth endpoints
-        if path in ["/health", "/", "/docs", "/openapi.json", "/redoc"] or path.startswith("/api/auth/"):
-            return await call_next(request)
-        
-        # Get user info if authenticated
-        user_id = None
-        tenant_id = None
-        try:
-            authorization = request.headers.get("Authorization")
-            if authorization and authorization.startswith("Bearer "):
-                token = authorization.split(" ")[1]
-                credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
-                user = await get_current_user(credentials)
-                user_id = str(user.id)
-                tenant_id = str(user.tenant_id) if user.tenant_id else None
-        except Exception:
-            # Not authenticated or error getting user - continue without audit log
-            pass
-        
-        # Process request
-        response = await call_next(request)
-        
+        path = scope["path"]
+
+        # Skip audit logging for health checks, static files, public auth endpoints and other excluded paths
+        if audit_policy.is_excluded(path):
+            await self.app(scope, receive, send)
+            return
+
+        # Resource type and id come from the route that will handle the request
+        route, path_params = match_route(scope["app"].router.routes, scope)
+        route_path = getattr(route, "path", None)
+        resource_type = route_resource(route_path) if route_path else None
+
+        # Decide up front so unsampled reads skip the audit work entirely
+        method = scope["method"]
+        sample_rate = audit_policy.sample_rate(method, route_path, resource_type)
+        if not audit_policy.sampled(sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        # Get user info if authenticated (resolved once per request and shared via request state)
+        request = Request(scope)
+        user = await get_request_user(request)
+        if not user:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        duration_ms = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, duration_ms
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                duration_ms = round((time.time() - start_time) * 1000, 2)
+            await send(message)
+
+        # Process request (an exception propagates without an audit entry, like any server error)
+        await self.app(scope, receive, send_wrapper)
+
         # Log audit entry for authenticated users
-        if user_id and response.status_code < 500:  # Don't log server errors
+        if status_code < 500:  # Don't log server errors
             try:
-                # Determine action and resource from request
-                action = request.method.lower()
-                resource_type = request.url.path.split("/")[-1] if request.url.path else None
-                
-                # Extract resource ID if present in path
-                resource_id = None
-                path_parts = [p for p in request.url.path.split("/") if p]
-                if len(path_parts) >= 2:
-                    try:
-                        from uuid import UUID
-                        resource_id = str(UUID(path_parts[-1]))
-                    except (ValueError, IndexError):
-                        pass
-                
+                details = {
+                    "path": path,
+                    "route": route_path,
+                    "method": method,
+                    "status_code": status_code,
+                    "duration_ms": duration_ms
+                }
+                if sample_rate < 1.0:
+                    # Lets reports scale sampled reads back up (each row stands for 1/rate requests)
+                    details["sample_rate"] = sample_rate
+
                 # Prepare audit log entry
                 audit_data = {
-                    "tenant_id": tenant_id,
-                    "user_id": user_id,
-                    "action": action,
+                    "tenant_id": str(user.tenant_id) if user.tenant_id else None,
+                    "user_id": str(user.id),
+                    "action": method.lower(),
                     "resource_type": resource_type,
-                    "resource_id": resource_id,
-                    "details": {
-                        "path": request.url.path,
-                        "method": request.method,
-                        "status_code": response.status_code,
-                        "duration_ms": round((time.time() - start_time) * 1000, 2)
-                    },
+                    "resource_id": route_resource_id(path_params),
+                    "details": details,
                     "ip_address": request.client.host if request.client else None,
-                    "user_agent": request.headers.get("user-agent")
+                    "user_agent": request.headers.get("user-agent"),
+                    # Stamp the request time; the row is written later in a batch
+                    "created_at": datetime.now(timezone.utc)
                 }
-                
-                # Insert audit log (non-blocking - don't fail request if logging fails)
-                try:
-                    supabase.table("audit_logs").insert(audit_data).execute()
-                except Exception:
-                    # Silently fail audit logging to not break the request
-                    pass
+
+                # Hand off to the background writer (never blocks or fails the request)
+                audit_writer.submit(audit_data)
             except Exception:
                 # Silently fail audit logging
                 pass
-        
-        return response
-
-
-class TenantContextMiddleware(BaseHTTPMiddleware):
-    """Middleware to inject tenant context into request state"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip tenant context for public auth endpoints
-        path = str(request.url.path)
-        if path.startswith("/api/auth/"):
-            return await call_next(request)
-        
-        # Get tenant from user if authenticated
-        try:
-            authorization = request.headers.get("Authorization")
-            if authorization and authorization.startswith("Bearer "):
-                token = authorization.split(" ")[1]
-                credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
-                user = await get_current_user(credentials)
-                if user.tenant_id:
-                    request.state.tenant_id = user.tenant_id
-                    request.state.user_role = user.role
-        except Exception:
-            # Not authenticated - continue without tenant context
-            pass
-        
-        return await call_next(request)
-
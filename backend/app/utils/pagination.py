@@ -0,0 +1,45 @@
+from fastapi import HTTPException, Response
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+import base64
+import json
+
+# Position of the last row of a page in (created_at, id) order
+Cursor = Tuple[datetime, UUID]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def row_cursor(row: Dict[str, Any]) -> Cursor:
+    """Cursor pointing just past row, for paging through rows server-side"""
+    return datetime.fromisoformat(str(row["created_at"])), UUID(str(row["id"]))
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Build an opaque cursor token pointing just past row"""
+    payload = json.dumps([str(row["created_at"]), str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Parse a cursor token from a query parameter, or None if no cursor was given"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, rows: List[Dict[str, Any]], limit: int) -> None:
+    """
+    Expose the cursor for the following page in the X-Next-Cursor header.
+
+    The header is omitted when the page came back short, i.e. there are no more rows.
+    List bodies stay plain arrays so existing clients are unaffected.
+    """
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1])
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
 from enum import Enum
 
 
@@ -70,6 +70,80 @@ DEFAULT_PERMISSIONS = {
 }
 
 
+# Each (resource, action) pair is one bit of a role's permission mask
+_RESOURCES = list(Resource)
+_ACTIONS = list(Action)
+
+
+def permission_bit(resource: Resource, action: Action) -> int:
+    return 1 << (_RESOURCES.index(resource) * len(_ACTIONS) + _ACTIONS.index(action))
+
+
+_BITS = {
+    (resource.value, action.value): permission_bit(resource, action)
+    for resource in Resource for action in Action
+}
+_RESOURCE_BITS = {
+    resource.value: sum(permission_bit(resource, action) for action in Action)
+    for resource in Resource
+}
+ALL_PERMISSIONS = sum(_RESOURCE_BITS.values())
+
+
+def compile_permissions(permissions: Dict[Any, Any]) -> int:
+    """
+    Compile a permission matrix ({resource: [actions]}, as in DEFAULT_PERMISSIONS
+    or roles.permissions) into a bitmask. MANAGE grants every action on its
+    resource; unknown resources and actions are ignored.
+    """
+    mask = 0
+    for resource, actions in (permissions or {}).items():
+        resource = getattr(resource, "value", resource)
+        if not isinstance(actions, list):
+            continue
+        for action in actions:
+            action = getattr(action, "value", action)
+            if action == Action.MANAGE.value:
+                mask |= _RESOURCE_BITS.get(resource, 0)
+            else:
+                mask |= _BITS.get((resource, action), 0)
+    return mask
+
+
+DEFAULT_MASKS = {role: compile_permissions(perms) for role, perms in DEFAULT_PERMISSIONS.items()}
+DEFAULT_MASKS["super_admin"] = ALL_PERMISSIONS
+
+# Tenant-defined roles can never grant more than a tenant admin has
+TENANT_ROLE_CEILING = DEFAULT_MASKS["tenant_admin"]
+
+
+def role_code(name: str) -> str:
+    """Map a roles.name such as "Tenant Admin" to the users.role code it applies to ("tenant_admin")"""
+    return "_".join(name.lower().replace("-", " ").split())
+
+
+def compile_tenant_roles(roles: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Compile a tenant's roles rows into masks keyed by role code.
+
+    A role applies to the users whose role code matches its name; where a custom
+    role and a system role share a code, the custom one wins.
+    """
+    masks: Dict[str, int] = {}
+    for role in sorted(roles, key=lambda r: not r.get("is_system_role")):
+        masks[role_code(role["name"])] = compile_permissions(role.get("permissions")) & TENANT_ROLE_CEILING
+    return masks
+
+
+def role_mask(role: str, tenant_masks: Optional[Dict[str, int]] = None) -> int:
+    """Permission mask for a role code, preferring the tenant's own definition of the role"""
+    if role == "super_admin":
+        return ALL_PERMISSIONS
+    if tenant_masks and role in tenant_masks:
+        return tenant_masks[role]
+    return DEFAULT_MASKS.get(role, 0)
+
+
 def has_permission(role: str, resource: Resource, action: Action, custom_permissions: Dict[str, Any] = None) -> bool:
     """
     Check if a role has permission for a resource and action.
@@ -83,26 +157,11 @@ def has_permission(role: str, resource: Resource, action: Action, custom_permiss
     Returns:
         True if permission exists, False otherwise
     """
-    # Super admin has all permissions
-    if role == "super_admin":
-        return True
-    
-    # Check custom permissions first if provided
-    if custom_permissions:
-        resource_perms = custom_permissions.get(resource.value, [])
-        if isinstance(resource_perms, list):
-            return action.value in resource_perms or Action.MANAGE.value in resource_perms
-        return False
-    
-    # Check default permissions
-    role_perms = DEFAULT_PERMISSIONS.get(role, {})
-    resource_perms = role_perms.get(resource, [])
-    
-    # If MANAGE is in permissions, user has all actions
-    if Action.MANAGE in resource_perms:
-        return True
-    
-    return action in resource_perms
+    if custom_permissions and role != "super_admin":
+        mask = compile_permissions(custom_permissions)
+    else:
+        mask = role_mask(role)
+    return bool(mask & permission_bit(resource, action))
 
 
 def get_role_permissions(role: str) -> Dict[str, List[str]]:
@@ -0,0 +1,120 @@
+"""
+Shared setup for the benchmarks: the real app, in process, on a stubbed repository
+layer or a local stand-in for PostgREST.
+
+Run them from the backend directory, e.g. python -m benchmarks.concurrency
+"""
+import os
+
+# Settings are read when app.config is imported; nothing here talks to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.anon.key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench.service.key")
+# Every request should reach the (stubbed) database, and audit entries stay in memory
+os.environ.setdefault("LIST_CACHE_MAX_SIZE", "0")
+os.environ.setdefault("AUDIT_SPOOL_DIR", "")
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+from uuid import UUID, uuid4
+from jose import jwt
+import httpx
+import json
+import threading
+import time
+
+USER_ID = str(uuid4())
+TENANT_ID = str(uuid4())
+PROFILE = {"id": USER_ID, "email": "bench@example.com", "tenant_id": TENANT_ID, "role": "tenant_admin", "status": "active"}
+HEADERS = {"Authorization": f"Bearer {jwt.encode({'sub': USER_ID, 'email': PROFILE['email']}, 'bench', algorithm='HS256')}"}
+
+_CREATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def asset_row(i: int) -> Dict[str, Any]:
+    """A realistic assets row; the id encodes i so cursors can be turned back into offsets"""
+    created = (_CREATED + timedelta(seconds=i)).isoformat()
+    return {
+        "id": str(UUID(int=i)),
+        "tenant_id": TENANT_ID,
+        "asset_tag": f"LAP-{i:07d}",
+        "name": f"Laptop {i}",
+        "category": "laptop",
+        "brand": "Dell",
+        "model": "XPS 13",
+        "serial_number": f"SN{i:09d}",
+        "purchase_date": "2024-01-02",
+        "purchase_price": 1234.5,
+        "status": "available",
+        "notes": None,
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+def stub_repos(page_size: int = 20) -> None:
+    """Replace the repositories used by GET /api/assets with in-memory stubs"""
+    from app.repositories import repos
+    from app.utils.audit_writer import audit_writer
+    rows = [asset_row(i) for i in range(1, page_size + 1)]
+
+    async def get_profile(user_id):
+        return PROFILE
+
+    async def list_roles(tenant_id):
+        return []
+
+    async def list_assets(tenant_id, **filters) -> List[Dict[str, Any]]:
+        return rows
+
+    repos.users.get_profile = get_profile
+    repos.roles.list = list_roles
+    repos.assets.list = list_assets
+    audit_writer.submit = lambda entry: True
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pools are reused
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        # The postgrest client sends a JSON body even with GET: drain it off the kept-alive connection
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def postgrest_server(latency: float = 0.0, page_size: int = 20) -> Iterator[str]:
+    """
+    A local HTTP server standing in for PostgREST; yields its base URL.
+
+    Every GET waits latency seconds, like a database round-trip, and answers
+    with page_size asset rows. Each connection is served by its own thread, so
+    concurrent requests are only serialized by the client.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgrestHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.body = json.dumps([asset_row(i) for i in range(1, page_size + 1)]).encode()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def client(app) -> httpx.AsyncClient:
+    """HTTP client calling the ASGI app directly (no sockets, no server)"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
@@ -0,0 +1,86 @@
+"""
+Throughput of GET /api/assets on one event loop as concurrency grows.
+
+The asset list goes over HTTP to a local stand-in for PostgREST that waits
+LATENCY per request, like a database round-trip. The "async" rows use the
+real PostgREST repository on a PooledPostgrestClient, as the routes do; the
+"sync" rows make the same query with the synchronous postgrest client inside
+the async route, as the routes did with the supabase client. Only the async
+variant should scale with concurrency (up to DB_POOL_MAX_CONNECTIONS).
+
+    python -m benchmarks.concurrency [--latency 0.02] [--requests 400]
+"""
+from benchmarks.common import HEADERS, client, postgrest_server, stub_repos
+import argparse
+import asyncio
+import time
+
+VARIANTS = ("sync", "async")
+
+
+def use_client(url: str, variant: str):
+    """Point the asset repository at url through the variant's client; returns the client to close"""
+    from postgrest import SyncPostgrestClient
+    from app.config import settings
+    from app.database import PooledPostgrestClient
+    from app.repositories import repos, postgrest
+
+    if variant == "async":
+        postgrest.db = PooledPostgrestClient(f"{url}/rest/v1", timeout=settings.db_timeout_seconds)
+        repos.assets = postgrest.PostgrestAssetRepo()
+        return postgrest.db
+
+    sync_db = SyncPostgrestClient(f"{url}/rest/v1", timeout=settings.db_timeout_seconds)
+
+    async def list_assets(tenant_id, skip=0, limit=100, **filters):
+        # Blocks the event loop for the whole round-trip
+        query = sync_db.table("assets").select("*").eq("tenant_id", str(tenant_id))
+        return query.order("created_at", desc=True).limit(limit).offset(skip).execute().data
+
+    repos.assets.list = list_assets
+    return sync_db
+
+
+async def measure(app, url: str, variant: str, requests: int, concurrency: int) -> float:
+    """Requests per second for requests calls spread over concurrency tasks"""
+    # Created inside the event loop: an async connection pool can't outlive its loop
+    db = use_client(url, variant)
+    try:
+        async with client(app) as http:
+            await http.get("/api/assets", headers=HEADERS)  # warm up
+            remaining = iter(range(requests))
+
+            async def worker():
+                for _ in remaining:
+                    response = await http.get("/api/assets", headers=HEADERS)
+                    assert response.status_code == 200, response.text
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return requests / (time.perf_counter() - started)
+    finally:
+        if variant == "async":
+            await db.aclose()
+        else:
+            db.session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated round-trip in seconds")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    from app.main import app
+    stub_repos()
+    print(f"GET /api/assets, {args.latency * 1000:.0f} ms simulated round-trip, {args.requests} requests")
+    with postgrest_server(latency=args.latency) as url:
+        for variant in VARIANTS:
+            for concurrency in args.concurrency:
+                rate = asyncio.run(measure(app, url, variant, args.requests, concurrency))
+                print(f"  {variant:<5} concurrency {concurrency:>3}: {rate:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Throughput and memory of streaming a large asset export.
+
+Rows come from an in-memory keyset listing, so this measures the export
+pipeline itself: paging, serialization, compression and (for Parquet) the
+DuckDB writer. Peak RSS should stay flat as --rows grows, since no format
+holds the whole listing in memory.
+
+    python -m benchmarks.export [--rows 1000000] [--formats csv ndjson parquet]
+"""
+from benchmarks.common import asset_row
+from app.routes.assets import EXPORT_COLUMNS
+from app.utils.export import export_response, paged_rows
+import argparse
+import asyncio
+import resource
+import time
+
+
+async def measure(rows: int, format: str, compress: bool) -> str:
+    async def fetch_page(after, limit):
+        # The cursor id is UUID(int=i), so it carries the offset of the last row
+        start = 0 if after is None else after[1].int
+        return [asset_row(i) for i in range(start + 1, min(start + limit, rows) + 1)]
+
+    response = export_response(
+        await paged_rows(fetch_page), format, list(EXPORT_COLUMNS), "assets",
+        compress=compress, column_types=EXPORT_COLUMNS
+    )
+    started = time.perf_counter()
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return f"{elapsed:6.1f} s {rows / elapsed:10,.0f} rows/s {size / 1e6:7.1f} MB out, peak RSS {peak:.0f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "ndjson", "parquet"])
+    parser.add_argument("--no-gzip", action="store_true", help="stream CSV and NDJSON uncompressed")
+    args = parser.parse_args()
+
+    print(f"Export of {args.rows:,} assets")
+    for format in args.formats:
+        compress = not args.no_gzip and format != "parquet"
+        label = f"{format}{'.gz' if compress else ''}"
+        print(f"  {label:<10} {asyncio.run(measure(args.rows, format, compress))}")
+
+
+if __name__ == "__main__":
+    main()
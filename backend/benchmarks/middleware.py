@@ -0,0 +1,73 @@
+"""
+Per-request cost of the custom middleware on /health and /api/assets.
+
+Three middleware stacks are timed on the same app and stubbed repositories:
+- none: the custom middleware removed (CORS only)
+- asgi: the app as configured (pure ASGI AuditLogMiddleware)
+- base_http: the app plus two pass-through BaseHTTPMiddleware layers, the
+  wrapping the audit and tenant middleware used to add before they were
+  rewritten as plain ASGI
+
+    python -m benchmarks.middleware [--requests 2000] [--read-sample-rate 1.0]
+"""
+from benchmarks.common import HEADERS, client, stub_repos
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+import argparse
+import asyncio
+import time
+
+PATHS = ("/health", "/api/assets")
+STACKS = ("none", "asgi", "base_http")
+
+
+class PassThrough(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def use_stack(app, configured, name: str) -> None:
+    """Rebuild the app's middleware stack as one of STACKS"""
+    from app.utils.middleware import AuditLogMiddleware
+    if name == "none":
+        app.user_middleware = [m for m in configured if m.cls is not AuditLogMiddleware]
+    elif name == "base_http":
+        app.user_middleware = [Middleware(PassThrough), Middleware(PassThrough), *configured]
+    else:
+        app.user_middleware = list(configured)
+    app.middleware_stack = None
+
+
+async def measure(app, path: str, requests: int) -> float:
+    """Mean microseconds per sequential request"""
+    async with client(app) as http:
+        for _ in range(100):  # warm up
+            await http.get(path, headers=HEADERS)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await http.get(path, headers=HEADERS)
+            assert response.status_code == 200, response.text
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--read-sample-rate", type=float, default=1.0, help="audit every read by default (worst case)")
+    args = parser.parse_args()
+
+    from app.main import app
+    from app.utils.audit_policy import audit_policy
+    stub_repos()
+    audit_policy.default_read_rate = args.read_sample_rate
+    configured = list(app.user_middleware)
+
+    print(f"{args.requests} sequential requests, read sample rate {args.read_sample_rate}")
+    for path in PATHS:
+        for stack in STACKS:
+            use_stack(app, configured, stack)
+            print(f"  {path:<12} {stack:<10} {asyncio.run(measure(app, path, args.requests)):8.0f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+
+# Settings are read when app.config is imported; the tests never talk to Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.anon.key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test.service.key")
+
+from uuid import uuid4
+from jose import jwt
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def make_token(user_id: str, email: str = "user@example.com") -> str:
+    """Unsigned-looking bearer token; without JWT_CLAIMS_AUTH only its claims are read"""
+    return jwt.encode({"sub": user_id, "email": email}, "test-secret", algorithm="HS256")
+
+
+@pytest.fixture
+def tenant_admin():
+    """A tenant admin profile row and the Authorization header for it"""
+    user_id, tenant_id = str(uuid4()), str(uuid4())
+    profile = {"id": user_id, "email": "admin@example.com", "tenant_id": tenant_id, "role": "tenant_admin", "status": "active"}
+    return profile, {"Authorization": f"Bearer {make_token(user_id, profile['email'])}"}
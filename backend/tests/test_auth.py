@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+from jose import jwt
+from pydantic import ValidationError
+from app.config import Settings, settings
+from app.main import app
+from app.repositories import repos
+from app.utils import auth
+from app.utils.audit_policy import audit_policy
+from app.utils.audit_writer import audit_writer
+from app.utils.cache import Cache, LocalCacheBackend
+import pytest
+
+
+@pytest.fixture
+def profile_lookups(monkeypatch, tenant_admin):
+    """Count users lookups, with the profile cache disabled so every resolution reaches the repo"""
+    profile, _ = tenant_admin
+    calls = []
+
+    async def get_profile(user_id):
+        calls.append(user_id)
+        return profile
+
+    async def list_roles(tenant_id):
+        return []
+
+    async def list_assets(tenant_id, **filters):
+        return []
+
+    monkeypatch.setattr(auth, "user_cache", Cache(LocalCacheBackend(max_size=0), "user"))
+    monkeypatch.setattr(repos.users, "get_profile", get_profile)
+    monkeypatch.setattr(repos.roles, "list", list_roles)
+    monkeypatch.setattr(repos.assets, "list", list_assets)
+    # Audit every request so AuditLogMiddleware resolves the user too
+    monkeypatch.setattr(audit_policy, "default_read_rate", 1.0)
+    monkeypatch.setattr(audit_writer, "submit", lambda entry: True)
+    return calls
+
+
+def test_one_users_lookup_per_request(profile_lookups, tenant_admin):
+    _, headers = tenant_admin
+    client = TestClient(app)
+
+    for expected in (1, 2, 3):
+        # The audit middleware, require_permission and get_tenant all need the user
+        response = client.get("/api/assets", headers=headers)
+        assert response.status_code == 200
+        assert len(profile_lookups) == expected
+
+
+def test_invalid_token_is_rejected_without_lookup(profile_lookups):
+    client = TestClient(app)
+
+    response = client.get("/api/assets", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+    assert profile_lookups == []
+
+
+def test_unsampled_request_skips_lookup(profile_lookups, tenant_admin, monkeypatch):
+    _, headers = tenant_admin
+    monkeypatch.setattr(audit_policy, "default_read_rate", 0.0)
+    client = TestClient(app)
+
+    # No route dependency needs the user and the read is not audited
+    response = client.get("/api/no-such-route", headers=headers)
+    assert response.status_code == 404
+    assert profile_lookups == []
+
+
+def test_claims_auth_requires_jwt_secret():
+    with pytest.raises(ValidationError, match="SUPABASE_JWT_SECRET"):
+        Settings(jwt_claims_auth=True, supabase_jwt_secret=None)
+
+
+def test_claims_auth_rejects_forged_token(monkeypatch, tenant_admin):
+    profile, _ = tenant_admin
+    monkeypatch.setattr(settings, "jwt_claims_auth", True)
+    monkeypatch.setattr(settings, "supabase_jwt_secret", "server-secret")
+    claims = {"sub": profile["id"], "app_metadata": {"tenant_id": profile["tenant_id"], "role": "super_admin"}}
+    client = TestClient(app)
+
+    forged = jwt.encode(claims, "attacker-secret", algorithm="HS256")
+    assert client.get("/api/assets", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
@@ -0,0 +1,157 @@
+from app.utils.cache import MISSING, Cache, LocalCacheBackend, RedisCacheBackend, TenantQueryCache, TTLCache
+import asyncio
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def redis_backend(server: fakeredis.FakeServer, **options) -> RedisCacheBackend:
+    """A backend on an in-memory Redis; backends built on the same server act like separate workers"""
+    backend = RedisCacheBackend("redis://fake", local_ttl=60.0, **options)
+    backend._client = fakeredis.aioredis.FakeRedis(server=server)
+    return backend
+
+
+async def eventually(check, timeout: float = 2.0) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await check():
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+async def workers():
+    """Two subscribed backends sharing one Redis"""
+    server = fakeredis.FakeServer()
+    a, b = redis_backend(server), redis_backend(server)
+    await a.start()
+    await b.start()
+
+    async def subscribed():
+        (_, count), = await a.client.pubsub_numsub(a.channel)
+        return count == 2
+
+    assert await eventually(subscribed)
+    yield a, b
+    await a.close()
+    await b.close()
+
+
+async def test_delete_reaches_other_workers_local_copies(workers):
+    a, b = workers
+    await a.set("user:1", {"role": "admin"}, ttl=60)
+    assert await b.get("user:1") == {"role": "admin"}  # now held in b's local LRU too
+
+    await a.delete("user:1")
+
+    async def dropped():
+        return await b.get("user:1") is MISSING
+
+    assert await eventually(dropped)
+
+
+async def test_list_results_invalidated_across_workers(workers):
+    a, b = workers
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return [{"id": len(loads)}]
+
+    list_a = TenantQueryCache(Cache(a, "list", ttl=60))
+    list_b = TenantQueryCache(Cache(b, "list", ttl=60))
+    assert await list_b.get_or_load("t1", "assets", {}, load) == [{"id": 1}]
+    assert await list_b.get_or_load("t1", "assets", {}, load) == [{"id": 1}]
+    etag = await list_b.etag("t1", "assets", {})
+
+    await list_a.bump("t1")
+
+    assert await list_b.get_or_load("t1", "assets", {}, load) == [{"id": 2}]
+    assert await list_b.etag("t1", "assets", {}) != etag
+
+
+async def test_version_bumps_increase():
+    backend = redis_backend(fakeredis.FakeServer())
+    first = await backend.version("list:version:t1")
+    await backend.bump("list:version:t1")
+    await backend.bump("list:version:t1")
+    assert await backend.version("list:version:t1") == first + 2
+
+
+async def test_version_never_goes_backwards_after_eviction():
+    backend = redis_backend(fakeredis.FakeServer())
+    key = "list:version:t1"
+    await backend.bump(key)
+    before = await backend.version(key)
+
+    # Evicted, then bumped before anyone reads it: must not restart at 1
+    await backend.client.delete(backend.prefix + key)
+    await backend.bump(key)
+    after_bump = await backend.version(key)
+    assert after_bump > before
+
+    await backend.client.delete(backend.prefix + key)
+    assert await backend.version(key) > after_bump
+
+
+async def test_serializers_round_trip():
+    for serializer in ("orjson", "msgpack", "json"):
+        server = fakeredis.FakeServer()
+        writer, reader = redis_backend(server, serializer=serializer), redis_backend(server, serializer=serializer)
+        row = {"id": "a1", "price": 12.5, "tags": ["x"], "notes": None}
+        await writer.set("row", row, ttl=60)
+        assert await reader.get("row") == row
+
+
+async def test_unavailable_redis_falls_back_to_the_database():
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0")
+    try:
+        assert await backend.get("user:1") is MISSING
+        await backend.set("user:1", {"role": "admin"}, ttl=60)
+        await backend.delete("user:1")
+        await backend.bump("list:version:t1")
+        assert await backend.version("list:version:t1") is None
+        assert backend.errors >= 5
+        assert backend.stats()["last_error"] == "ConnectionError"
+
+        # Without a version the list cache neither caches nor issues ETags
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return []
+
+        list_cache = TenantQueryCache(Cache(backend, "list", ttl=60))
+        await list_cache.get_or_load("t1", "assets", {}, load)
+        await list_cache.get_or_load("t1", "assets", {}, load)
+        assert len(loads) == 2
+        assert await list_cache.etag("t1", "assets", {}) is None
+    finally:
+        await backend.close()
+
+
+def test_local_lru_byte_cap():
+    cache = TTLCache(max_size=100, ttl=60, max_bytes=100)
+    cache.set("a", "A", size=40)
+    cache.set("b", "B", size=40)
+    assert cache.get("a") == "A"  # a is now the most recently used
+    cache.set("c", "C", size=40)
+
+    assert cache.get("b") is None  # least recently used went first
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["bytes"] == 80 and cache.stats()["evictions"] == 1
+
+    cache.set("huge", "X", size=101)  # larger than the whole cap: never stored
+    assert cache.get("huge") is None and cache.get("a") == "A"
+
+
+async def test_local_backend_sizes_values_for_byte_cap():
+    backend = LocalCacheBackend(max_size=100, max_bytes=64)
+    await backend.set("small", {"id": 1}, ttl=60)
+    await backend.set("big", {"notes": "x" * 100}, ttl=60)
+    assert await backend.get("small") == {"id": 1}
+    assert await backend.get("big") is MISSING
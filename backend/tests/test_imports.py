@@ -0,0 +1,47 @@
+import csv
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.models.asset import AssetImport
+from app.models.imports import ImportJob
+from app.utils.imports import ImportManager
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_asset_import_rejects_assigned_status(tmp_path):
+    manager = ImportManager(directory=str(tmp_path))
+    job = ImportJob(
+        id=uuid4(),
+        tenant_id=uuid4(),
+        resource="assets",
+        filename="assets.csv",
+        format="csv",
+        started_at=datetime.now(timezone.utc)
+    )
+    upload = tmp_path / f"{job.id}.upload"
+    upload.write_text(
+        "asset_tag,name,category,status\n"
+        "LAP-001,Laptop,laptop,assigned\n"
+        "LAP-002,Laptop,laptop,maintenance\n"
+        "LAP-003,Laptop,laptop,\n",
+        encoding="utf-8"
+    )
+    upserted = []
+
+    async def upsert(tenant_id, rows):
+        upserted.extend(rows)
+        return [{"asset_tag": row["asset_tag"], "inserted": True} for row in rows]
+
+    await manager._run(job, upload, AssetImport, "asset_tag", upsert)
+
+    assert job.status == "completed"
+    assert (job.created, job.failed) == (2, 1)
+    assert [row["asset_tag"] for row in upserted] == ["LAP-002", "LAP-003"]
+    assert "status" not in upserted[1]
+    with open(manager.error_report_path(job), newline="", encoding="utf-8") as f:
+        report = list(csv.reader(f))
+    assert report[1][:2] == ["2", "LAP-001"]
+    assert "status" in report[1][2]
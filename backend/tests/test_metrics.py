@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.repositories import repos
+from app.utils import auth
+from app.utils.cache import Cache, LocalCacheBackend, RedisCacheBackend
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch, tenant_admin):
+    profile, _ = tenant_admin
+
+    async def get_profile(user_id):
+        return profile
+
+    monkeypatch.setattr(auth, "user_cache", Cache(LocalCacheBackend(max_size=0), "user"))
+    monkeypatch.setattr(repos.users, "get_profile", get_profile)
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    return TestClient(app)
+
+
+def test_metrics_requires_authentication(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_metrics_rejects_tenant_users(client, tenant_admin):
+    _, headers = tenant_admin
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+
+def test_metrics_accepts_token(client):
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "audit_writer" in response.json()
+
+
+def test_metrics_accepts_super_admin(client, tenant_admin):
+    profile, headers = tenant_admin
+    profile["role"] = "super_admin"
+    assert client.get("/metrics", headers=headers).status_code == 200
+
+
+def test_stats_report_error_type_only():
+    backend = RedisCacheBackend("redis://cache.internal.example:6379/0")
+    backend._error(ConnectionError("Error 111 connecting to cache.internal.example:6379"))
+    assert backend.stats()["last_error"] == "ConnectionError"
@@ -0,0 +1,325 @@
+"""
+Repository backends.
+
+The PostgREST tests check the requests sent over a mocked HTTP transport. The
+asyncpg tests check the generated SQL against a fake pool, and the tests marked
+postgres run against DATABASE_URL, a database with database/schema.sql and
+database/schema_multi_tenant.sql applied (skipped when it is not set).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+from uuid import UUID, uuid4
+from postgrest import AsyncPostgrestClient
+from app.config import settings
+from app.repositories import RepositoryError, UniqueViolation, ForeignKeyViolation
+from app.repositories import postgres, postgrest
+import app.database
+import asyncpg
+import httpx
+import json
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+CURSOR = (datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), UUID("00000000-0000-0000-0000-00000000002a"))
+
+
+class FakePostgrest:
+    """Records PostgREST requests and answers each with the next queued (status, body)"""
+
+    def __init__(self):
+        self.requests: List[httpx.Request] = []
+        self.responses: List[tuple] = []
+
+    def reply(self, status: int, body: Any) -> None:
+        self.responses.append((status, body))
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, body = self.responses.pop(0) if self.responses else (200, [])
+        return httpx.Response(status, json=body)
+
+    def params(self, i: int = -1) -> Dict[str, List[str]]:
+        return parse_qs(self.requests[i].url.query.decode())
+
+
+@pytest.fixture
+def rest(monkeypatch):
+    fake = FakePostgrest()
+    client = AsyncPostgrestClient("http://postgrest.test/rest/v1")
+    client.session = httpx.AsyncClient(
+        base_url="http://postgrest.test/rest/v1", transport=httpx.MockTransport(fake.handle)
+    )
+    monkeypatch.setattr(postgrest, "db", client)
+    return fake
+
+
+class FakePool:
+    """Stands in for the asyncpg pool: records statements, raises a queued error if any"""
+
+    def __init__(self):
+        self.statements: List[tuple] = []
+        self.error = None
+        self.rows: List[Dict[str, Any]] = []
+
+    async def _run(self, sql, *args):
+        self.statements.append((" ".join(sql.split()), args))
+        if self.error is not None:
+            raise self.error
+
+    async def fetch(self, sql, *args):
+        await self._run(sql, *args)
+        return self.rows
+
+    async def execute(self, sql, *args):
+        await self._run(sql, *args)
+        return "INSERT 0 1"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePool()
+
+    async def get_pool():
+        return fake
+
+    monkeypatch.setattr(postgres, "get_pg_pool", get_pool)
+    return fake
+
+
+def pg_error(cls, constraint: str):
+    return cls.new({"C": cls.sqlstate, "M": f'violates constraint "{constraint}"', "n": constraint})
+
+
+# --- PostgREST backend ---
+
+async def test_postgrest_offset_page(rest):
+    await postgrest.PostgrestAssetRepo().list(uuid4(), skip=40, limit=20)
+    params = rest.params()
+    assert params["order"] == ["created_at.desc,id.desc"]
+    assert params["limit"] == ["20"] and params["offset"] == ["40"]
+    assert "or" not in params
+
+
+async def test_postgrest_keyset_page(rest):
+    await postgrest.PostgrestAssetRepo().list(uuid4(), skip=40, limit=20, after=CURSOR)
+    params = rest.params()
+    timestamp = '"2024-05-01T12:30:00+00:00"'
+    assert params["order"] == ["created_at.desc,id.desc"]
+    assert params["or"] == [f"(created_at.lt.{timestamp},and(created_at.eq.{timestamp},id.lt.{CURSOR[1]}))"]
+    # The cursor replaces the offset
+    assert params["limit"] == ["20"] and "offset" not in params
+
+
+async def test_postgrest_unique_violation(rest):
+    rest.reply(409, {
+        "code": "23505",
+        "message": 'duplicate key value violates unique constraint "idx_assets_tenant_tag"',
+        "details": None,
+        "hint": None,
+    })
+    with pytest.raises(UniqueViolation) as error:
+        await postgrest.PostgrestAssetRepo().create({"tenant_id": uuid4(), "asset_tag": "LAP-1"})
+    assert error.value.detail == "idx_assets_tenant_tag"
+
+
+async def test_postgrest_foreign_key_violation(rest):
+    rest.reply(409, {
+        "code": "23503",
+        "message": 'update or delete on table "assets" violates foreign key constraint "assignments_asset_id_fkey"',
+        "details": None,
+        "hint": None,
+    })
+    with pytest.raises(ForeignKeyViolation) as error:
+        await postgrest.PostgrestAssetRepo().delete(uuid4(), uuid4())
+    assert error.value.detail == "assignments_asset_id_fkey"
+
+
+async def test_postgrest_stored_procedure_error(rest):
+    rest.reply(400, {"code": "P0001", "message": "asset_unavailable", "details": "retired", "hint": None})
+    with pytest.raises(RepositoryError) as error:
+        await postgrest.PostgrestAssignmentRepo().assign(uuid4(), uuid4(), uuid4(), uuid4(), "2024-05-01")
+    assert (error.value.code, error.value.detail) == ("asset_unavailable", "retired")
+
+
+async def test_postgrest_audit_insert_many_ignores_duplicates(rest):
+    rest.reply(201, [])
+    entries = [{"id": str(uuid4()), "action": "get", "created_at": CURSOR[0]}]
+    await postgrest.PostgrestAuditRepo().insert_many(entries)
+    request = rest.requests[-1]
+    assert request.method == "POST"
+    assert rest.params()["on_conflict"] == ["id,created_at"]
+    assert "resolution=ignore-duplicates" in request.headers["prefer"]
+    assert "return=minimal" in request.headers["prefer"]
+    assert json.loads(request.content)[0]["created_at"] == "2024-05-01T12:30:00+00:00"
+
+
+async def test_postgrest_role_update_is_tenant_scoped(rest):
+    tenant_id, role_id = uuid4(), uuid4()
+    rest.reply(200, [])
+    assert await postgrest.PostgrestRoleRepo().update(tenant_id, role_id, {"name": "Auditor"}) is None
+    request = rest.requests[-1]
+    assert request.method == "PATCH"
+    assert rest.params()["id"] == [f"eq.{role_id}"] and rest.params()["tenant_id"] == [f"eq.{tenant_id}"]
+
+
+async def test_postgrest_tenants_offset_page(rest):
+    await postgrest.PostgrestTenantRepo().list(skip=40, limit=20)
+    params = rest.params()
+    assert params["order"] == ["created_at"]
+    assert params["limit"] == ["20"] and params["offset"] == ["40"]
+    assert "range" not in rest.requests[-1].headers
+
+
+async def test_postgrest_invoices_offset_page(rest):
+    await postgrest.PostgrestSubscriptionRepo().list_invoices(uuid4(), skip=40, limit=20)
+    params = rest.params()
+    assert params["order"] == ["created_at.desc"]
+    assert params["limit"] == ["20"] and params["offset"] == ["40"]
+    assert "range" not in rest.requests[-1].headers
+
+
+# --- asyncpg backend (generated SQL) ---
+
+async def test_postgres_offset_page(pool):
+    tenant_id = uuid4()
+    await postgres.PostgresAssetRepo().list(tenant_id, status="available", skip=40, limit=20)
+    sql, args = pool.statements[-1]
+    assert sql == (
+        "SELECT * FROM assets WHERE tenant_id = $1 AND status = $2 "
+        "ORDER BY created_at DESC, id DESC OFFSET $3 LIMIT $4"
+    )
+    assert args == (tenant_id, "available", 40, 20)
+
+
+async def test_postgres_keyset_page(pool):
+    tenant_id = uuid4()
+    await postgres.PostgresAssignmentRepo().list(tenant_id, skip=40, limit=20, after=CURSOR)
+    sql, args = pool.statements[-1]
+    assert sql.endswith(
+        "WHERE a.tenant_id = $1 AND (a.created_at, a.id) < ($2, $3) "
+        "ORDER BY a.created_at DESC, a.id DESC OFFSET $4 LIMIT $5"
+    )
+    # The cursor replaces the offset
+    assert args == (tenant_id, CURSOR[0], CURSOR[1], 0, 20)
+
+
+async def test_postgres_unique_violation(pool):
+    pool.error = pg_error(asyncpg.exceptions.UniqueViolationError, "idx_assets_tenant_tag")
+    with pytest.raises(UniqueViolation) as error:
+        await postgres.PostgresAssetRepo().create({"tenant_id": uuid4(), "asset_tag": "LAP-1"})
+    assert error.value.detail == "idx_assets_tenant_tag"
+
+
+async def test_postgres_foreign_key_violation(pool):
+    pool.error = pg_error(asyncpg.exceptions.ForeignKeyViolationError, "assignments_asset_id_fkey")
+    with pytest.raises(ForeignKeyViolation) as error:
+        await postgres.PostgresAssetRepo().delete(uuid4(), uuid4())
+    assert error.value.detail == "assignments_asset_id_fkey"
+
+
+async def test_postgres_role_update_is_tenant_scoped(pool):
+    tenant_id, role_id = uuid4(), uuid4()
+    assert await postgres.PostgresRoleRepo().update(tenant_id, role_id, {"name": "Auditor"}) is None
+    sql, args = pool.statements[-1]
+    assert sql == 'UPDATE roles SET "name" = $1 WHERE id = $2 AND tenant_id = $3 RETURNING *'
+    assert args == ("Auditor", role_id, tenant_id)
+
+
+async def test_postgres_subscription_update_is_tenant_scoped(pool):
+    tenant_id = uuid4()
+    await postgres.PostgresSubscriptionRepo().update(tenant_id, {"cancel_at_period_end": True})
+    sql, args = pool.statements[-1]
+    assert sql == 'UPDATE subscriptions SET "cancel_at_period_end" = $1 WHERE tenant_id = $2 RETURNING *'
+    assert args == (True, tenant_id)
+
+
+async def test_postgres_audit_insert_many_ignores_duplicates(pool):
+    entries = [{"id": uuid4(), "action": "get"}, {"id": uuid4(), "action": "post"}]
+    await postgres.PostgresAuditRepo().insert_many(entries)
+    sql, args = pool.statements[-1]
+    assert sql == (
+        'INSERT INTO audit_logs ("id", "action") VALUES ($1, $2), ($3, $4) '
+        "ON CONFLICT (id, created_at) DO NOTHING"
+    )
+    assert args == (entries[0]["id"], "get", entries[1]["id"], "post")
+
+
+# --- asyncpg backend against a real database ---
+
+requires_postgres = pytest.mark.skipif(not settings.database_url, reason="DATABASE_URL is not set")
+
+
+@pytest.fixture
+async def tenant_id():
+    """A throwaway tenant (its rows cascade away with it); the pool is closed with the test's event loop"""
+    repo = postgres.PostgresRepo()
+    row = await repo._fetchrow(
+        "INSERT INTO tenants (name, slug) VALUES ($1, $2) RETURNING id", "Repo tests", f"repo-tests-{uuid4().hex}"
+    )
+    yield row["id"]
+    await repo._fetch("DELETE FROM assignments WHERE tenant_id = $1", row["id"])
+    await repo._fetch("DELETE FROM tenants WHERE id = $1", row["id"])
+    if app.database._pg_pool is not None:
+        await app.database._pg_pool.close()
+        app.database._pg_pool = None
+
+
+def asset(tenant_id, tag: str) -> Dict[str, Any]:
+    return {"tenant_id": UUID(tenant_id), "asset_tag": tag, "name": tag, "category": "laptop", "status": "available"}
+
+
+@requires_postgres
+async def test_postgres_db_keyset_pages_are_disjoint(tenant_id):
+    repo = postgres.PostgresAssetRepo()
+    await repo.create_many([asset(tenant_id, f"LAP-{i}") for i in range(5)])
+    first = await repo.list(UUID(tenant_id), limit=3)
+    last = first[-1]
+    second = await repo.list(
+        UUID(tenant_id), limit=3, after=(datetime.fromisoformat(last["created_at"]), UUID(last["id"]))
+    )
+    assert len(first) == 3 and len(second) == 2
+    assert {r["id"] for r in first}.isdisjoint(r["id"] for r in second)
+
+
+@requires_postgres
+async def test_postgres_db_constraint_errors(tenant_id):
+    assets = postgres.PostgresAssetRepo()
+    created = await assets.create(asset(tenant_id, "LAP-1"))
+    with pytest.raises(UniqueViolation):
+        await assets.create(asset(tenant_id, "LAP-1"))
+
+    employee = await postgres.PostgresEmployeeRepo().create(
+        {"tenant_id": UUID(tenant_id), "name": "Repo Test", "email": f"{uuid4().hex}@example.com"}
+    )
+    await postgres.PostgresAssignmentRepo().create({
+        "tenant_id": UUID(tenant_id),
+        "asset_id": UUID(created["id"]),
+        "employee_id": UUID(employee["id"]),
+        "assigned_by": uuid4(),
+        "assigned_date": datetime.now(timezone.utc).date(),
+    })
+    with pytest.raises(ForeignKeyViolation):
+        await assets.delete(UUID(tenant_id), UUID(created["id"]))
+
+
+@requires_postgres
+async def test_postgres_db_audit_insert_many_ignores_duplicates(tenant_id):
+    audit = postgres.PostgresAuditRepo()
+    user = await audit._fetchrow("SELECT id FROM users LIMIT 1")
+    if user is None:
+        pytest.skip("needs a row in users (audit_logs.user_id references it)")
+    await audit.ensure_partitions(1)
+
+    entry = {
+        "id": uuid4(),
+        "tenant_id": UUID(tenant_id),
+        "user_id": UUID(user["id"]),
+        "action": "get",
+        "created_at": datetime.now(timezone.utc),
+    }
+    await audit.insert_many([entry])
+    await audit.insert_many([entry])
+    assert await audit._fetchval("SELECT COUNT(*) FROM audit_logs WHERE id = $1", entry["id"]) == 1
+    await audit._fetch("DELETE FROM audit_logs WHERE id = $1", entry["id"])
@@ -0,0 +1,90 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from app.main import app
+from app.repositories import repos, UniqueViolation
+import pytest
+
+
+@pytest.fixture
+def roles(monkeypatch, tenant_admin):
+    """In-memory roles repo holding one custom and one system role of the admin's tenant"""
+    profile, _ = tenant_admin
+    tenant_id = profile["tenant_id"]
+    rows = {}
+    for name, system in (("Auditor", False), ("Tenant Admin", True)):
+        role_id = str(uuid4())
+        rows[role_id] = {
+            "id": role_id,
+            "tenant_id": tenant_id,
+            "name": name,
+            "permissions": {},
+            "is_system_role": system,
+            "created_at": "2024-01-01T00:00:00+00:00",
+            "updated_at": "2024-01-01T00:00:00+00:00"
+        }
+
+    async def get_profile(user_id):
+        return profile
+
+    async def list_roles(tid):
+        # No tenant overrides: permissions come from the built-in role matrix
+        return []
+
+    async def get(tid, role_id):
+        row = rows.get(str(role_id))
+        return row if row and row["tenant_id"] == str(tid) else None
+
+    async def create(data):
+        if any(row["name"] == data["name"] for row in rows.values()):
+            raise UniqueViolation("roles_tenant_id_name_key")
+        row = {**next(iter(rows.values())), **data, "id": str(uuid4()), "tenant_id": str(data["tenant_id"])}
+        rows[row["id"]] = row
+        return row
+
+    async def update(tid, role_id, data):
+        row = await get(tid, role_id)
+        if row:
+            row.update(data)
+        return row
+
+    async def delete(tid, role_id):
+        row = await get(tid, role_id)
+        return rows.pop(str(role_id)) if row else None
+
+    monkeypatch.setattr(repos.users, "get_profile", get_profile)
+    for name, function in (("list", list_roles), ("get", get), ("create", create), ("update", update), ("delete", delete)):
+        monkeypatch.setattr(repos.roles, name, function)
+    return rows
+
+
+def role_id(rows, name):
+    return next(row["id"] for row in rows.values() if row["name"] == name)
+
+
+def test_role_crud_goes_through_the_repository(roles, tenant_admin):
+    profile, headers = tenant_admin
+    client = TestClient(app)
+    auditor = role_id(roles, "Auditor")
+
+    assert client.get(f"/api/roles/{auditor}", headers=headers).json()["name"] == "Auditor"
+
+    response = client.put(f"/api/roles/{auditor}", json={"name": "Reviewer"}, headers=headers)
+    assert response.status_code == 200 and response.json()["name"] == "Reviewer"
+
+    body = {"name": "Reviewer", "tenant_id": profile["tenant_id"]}
+    assert client.post("/api/roles", json=body, headers=headers).status_code == 400
+
+    assert client.delete(f"/api/roles/{auditor}", headers=headers).status_code == 200
+    assert client.get(f"/api/roles/{auditor}", headers=headers).status_code == 404
+
+
+def test_system_roles_and_other_tenants_are_protected(roles, tenant_admin):
+    _, headers = tenant_admin
+    client = TestClient(app)
+
+    system = role_id(roles, "Tenant Admin")
+    assert client.delete(f"/api/roles/{system}", headers=headers).status_code == 403
+    assert client.put(f"/api/roles/{system}", json={"name": "Owner"}, headers=headers).status_code == 403
+
+    roles[role_id(roles, "Auditor")]["tenant_id"] = str(uuid4())
+    assert client.delete(f"/api/roles/{role_id(roles, 'Auditor')}", headers=headers).status_code == 404
@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.repositories import repos
+import pytest
+
+
+@pytest.fixture
+def subscriptions(monkeypatch, tenant_admin):
+    """In-memory subscriptions repo (one row per tenant), starting empty"""
+    profile, _ = tenant_admin
+    rows = {}
+
+    async def get_profile(user_id):
+        return profile
+
+    async def get(tenant_id):
+        return rows.get(str(tenant_id))
+
+    async def create(data):
+        row = {
+            **data,
+            "id": "00000000-0000-0000-0000-000000000001",
+            "tenant_id": str(data["tenant_id"]),
+            "created_at": "2024-01-01T00:00:00+00:00",
+            "updated_at": "2024-01-01T00:00:00+00:00"
+        }
+        rows[row["tenant_id"]] = row
+        return row
+
+    async def update(tenant_id, data):
+        row = rows.get(str(tenant_id))
+        if row:
+            row.update(data)
+        return row
+
+    async def update_tenant(tenant_id, data):
+        return {"id": str(tenant_id), **data}
+
+    monkeypatch.setattr(repos.users, "get_profile", get_profile)
+    monkeypatch.setattr(repos.subscriptions, "get", get)
+    monkeypatch.setattr(repos.subscriptions, "create", create)
+    monkeypatch.setattr(repos.subscriptions, "update", update)
+    monkeypatch.setattr(repos.tenants, "update", update_tenant)
+    return rows
+
+
+def test_subscription_lifecycle_goes_through_the_repository(subscriptions, tenant_admin):
+    profile, headers = tenant_admin
+    client = TestClient(app)
+
+    assert client.post("/api/subscription/cancel", headers=headers).status_code == 404
+
+    # A tenant without a subscription gets the default free plan
+    response = client.get("/api/subscription", headers=headers)
+    assert response.status_code == 200 and response.json()["plan"] == "free"
+    assert list(subscriptions) == [profile["tenant_id"]]
+
+    response = client.post("/api/subscription/upgrade", params={"plan": "premium"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["subscription"]["plan"] == "premium"
+
+    assert client.post("/api/subscription/cancel", headers=headers).status_code == 200
+    assert subscriptions[profile["tenant_id"]]["cancel_at_period_end"] is True
@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.repositories import repos
+from app.routes import tenants
+from app.utils.cache import Cache, LocalCacheBackend
+import pytest
+
+
+@pytest.fixture
+def tenant_lookups(monkeypatch, tenant_admin):
+    """Serve the admin's tenant from a stubbed repo, with an empty tenant cache"""
+    profile, _ = tenant_admin
+    row = {
+        "id": profile["tenant_id"],
+        "name": "Acme",
+        "slug": "acme",
+        "status": "active",
+        "subscription_plan": "free",
+        "subscription_status": "active",
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00"
+    }
+    calls = []
+
+    async def get_profile(user_id):
+        return profile
+
+    async def get_tenant(tenant_id):
+        calls.append(str(tenant_id))
+        return row if str(tenant_id) == profile["tenant_id"] else None
+
+    monkeypatch.setattr(tenants, "tenant_cache", Cache(LocalCacheBackend(), "tenant"))
+    monkeypatch.setattr(repos.users, "get_profile", get_profile)
+    monkeypatch.setattr(repos.tenants, "get", get_tenant)
+    return calls
+
+
+@pytest.mark.parametrize("path", ["/api/tenants/{tenant_id}", "/api/tenants/current/info"])
+def test_tenant_is_loaded_once_then_cached(tenant_lookups, tenant_admin, path):
+    profile, headers = tenant_admin
+    client = TestClient(app)
+
+    for _ in range(2):
+        response = client.get(path.format(tenant_id=profile["tenant_id"]), headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["name"] == "Acme"
+    assert tenant_lookups == [profile["tenant_id"]]
+
+
+def test_missing_tenant_is_not_cached(tenant_lookups, tenant_admin, monkeypatch):
+    profile, headers = tenant_admin
+    monkeypatch.setitem(profile, "role", "super_admin")
+    other = "00000000-0000-0000-0000-000000000001"
+    client = TestClient(app)
+
+    for _ in range(2):
+        assert client.get(f"/api/tenants/{other}", headers=headers).status_code == 404
+    assert tenant_lookups == [other, other]
@@ -61,9 +61,32 @@ CREATE TABLE IF NOT EXISTS permissions (
     UNIQUE(resource, action)
 );
 
--- Audit logs table
+-- Audit logs table, range-partitioned by month on created_at (partitions are
+-- created by ensure_audit_log_partitions below). The primary key has to include
+-- the partition key, so entries are deduplicated on (id, created_at).
+
+-- Upgrade path: move an existing unpartitioned audit_logs aside; its rows are
+-- copied into the partitioned table at the end of this script
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = 'audit_logs' AND relkind = 'r' AND relnamespace = 'public'::regnamespace
+    ) THEN
+        ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned;
+        ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey;
+        DROP INDEX IF EXISTS idx_audit_logs_tenant_id;
+        DROP INDEX IF EXISTS idx_audit_logs_user_id;
+        DROP INDEX IF EXISTS idx_audit_logs_created_at;
+        DROP INDEX IF EXISTS idx_audit_logs_resource;
+        DROP INDEX IF EXISTS idx_audit_logs_tenant_created;
+        DROP INDEX IF EXISTS idx_audit_logs_created_id;
+    END IF;
+END;
+$$;
+
 CREATE TABLE IF NOT EXISTS audit_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     tenant_id UUID REFERENCES tenants(id) ON DELETE SET NULL,
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     action VARCHAR(100) NOT NULL,
@@ -72,8 +95,9 @@ CREATE TABLE IF NOT EXISTS audit_logs (
     details JSONB DEFAULT '{}'::jsonb,
     ip_address VARCHAR(45),
     user_agent TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 -- Subscriptions table
 CREATE TABLE IF NOT EXISTS subscriptions (
@@ -174,6 +198,16 @@ CREATE INDEX IF NOT EXISTS idx_assets_tenant_status ON assets(tenant_id, status)
 CREATE INDEX IF NOT EXISTS idx_assignments_tenant_id ON assignments(tenant_id);
 CREATE INDEX IF NOT EXISTS idx_assignments_tenant_status ON assignments(tenant_id, status);
 
+-- Keyset pagination indexes: list endpoints order by (created_at, id) and page
+-- with a (created_at, id) row comparison instead of OFFSET
+CREATE INDEX IF NOT EXISTS idx_assets_tenant_created ON assets(tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_employees_tenant_created ON employees(tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_assignments_tenant_created ON assignments(tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_users_tenant_created ON users(tenant_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_tenant_created ON audit_logs(tenant_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_created_id ON audit_logs(created_at DESC, id DESC);
+
 -- ============================================================================
 -- TRIGGERS FOR UPDATED_AT
 -- ============================================================================
@@ -423,3 +457,627 @@ INSERT INTO permissions (resource, action, description) VALUES
     ('audit_logs', 'read', 'View audit logs')
 ON CONFLICT (resource, action) DO NOTHING;
 
+
+-- ============================================================================
+-- STORED PROCEDURES
+-- ============================================================================
+-- Called through PostgREST RPC (or directly with the asyncpg backend).
+-- Business-rule failures are raised as P0001 with a short error code as the
+-- message (and context in DETAIL) so the API can map them to HTTP responses.
+
+-- At most one active assignment per asset
+CREATE UNIQUE INDEX IF NOT EXISTS idx_assignments_one_active_per_asset
+    ON assignments(asset_id) WHERE status = 'active';
+
+-- Assign an asset to an employee in one transaction
+CREATE OR REPLACE FUNCTION create_assignment(
+    p_tenant_id UUID,
+    p_asset_id UUID,
+    p_employee_id UUID,
+    p_assigned_by UUID,
+    p_assigned_date DATE,
+    p_notes TEXT DEFAULT NULL
+)
+RETURNS SETOF assignments
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_asset_status VARCHAR(50);
+    v_assignment assignments%ROWTYPE;
+BEGIN
+    -- Lock the asset row so concurrent assignments of the same asset serialize
+    SELECT status INTO v_asset_status
+    FROM assets
+    WHERE id = p_asset_id AND tenant_id = p_tenant_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'asset_not_found';
+    END IF;
+
+    IF v_asset_status NOT IN ('available', 'assigned') THEN
+        RAISE EXCEPTION 'asset_unavailable' USING DETAIL = v_asset_status;
+    END IF;
+
+    PERFORM 1 FROM employees WHERE id = p_employee_id AND tenant_id = p_tenant_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'employee_not_found';
+    END IF;
+
+    BEGIN
+        INSERT INTO assignments (tenant_id, asset_id, employee_id, assigned_by, assigned_date, notes, status)
+        VALUES (p_tenant_id, p_asset_id, p_employee_id, p_assigned_by, p_assigned_date, p_notes, 'active')
+        RETURNING * INTO v_assignment;
+    EXCEPTION WHEN unique_violation THEN
+        RAISE EXCEPTION 'asset_already_assigned';
+    END;
+
+    UPDATE assets SET status = 'assigned' WHERE id = p_asset_id;
+
+    RETURN NEXT v_assignment;
+END;
+$$;
+
+-- Return an assigned asset and free it in one transaction
+CREATE OR REPLACE FUNCTION return_assignment(
+    p_tenant_id UUID,
+    p_assignment_id UUID,
+    p_returned_date DATE,
+    p_notes TEXT DEFAULT NULL
+)
+RETURNS SETOF assignments
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_assignment assignments%ROWTYPE;
+BEGIN
+    UPDATE assignments
+    SET status = 'returned',
+        returned_date = p_returned_date,
+        notes = COALESCE(p_notes, notes)
+    WHERE id = p_assignment_id AND tenant_id = p_tenant_id AND status = 'active'
+    RETURNING * INTO v_assignment;
+
+    IF NOT FOUND THEN
+        IF EXISTS (SELECT 1 FROM assignments WHERE id = p_assignment_id AND tenant_id = p_tenant_id) THEN
+            RAISE EXCEPTION 'assignment_not_active';
+        END IF;
+        RAISE EXCEPTION 'assignment_not_found';
+    END IF;
+
+    UPDATE assets SET status = 'available' WHERE id = v_assignment.asset_id;
+
+    RETURN NEXT v_assignment;
+END;
+$$;
+
+-- Close every active assignment of an employee (offboarding) and free their assets
+CREATE OR REPLACE FUNCTION return_employee_assignments(
+    p_tenant_id UUID,
+    p_employee_id UUID,
+    p_returned_date DATE,
+    p_notes TEXT DEFAULT NULL
+)
+RETURNS SETOF assignments
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM 1 FROM employees WHERE id = p_employee_id AND tenant_id = p_tenant_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'employee_not_found';
+    END IF;
+
+    RETURN QUERY
+    WITH returned AS (
+        UPDATE assignments
+        SET status = 'returned',
+            returned_date = p_returned_date,
+            notes = COALESCE(p_notes, notes)
+        WHERE tenant_id = p_tenant_id AND employee_id = p_employee_id AND status = 'active'
+        RETURNING *
+    ), freed AS (
+        UPDATE assets
+        SET status = 'available'
+        WHERE tenant_id = p_tenant_id AND id IN (SELECT asset_id FROM returned)
+    )
+    SELECT * FROM returned;
+END;
+$$;
+
+-- Provision a new tenant for a freshly created auth user in one transaction:
+-- tenant (with a collision-free slug), tenant admin user, trial subscription
+-- and the default system roles.
+CREATE OR REPLACE FUNCTION signup_tenant(
+    p_user_id UUID,
+    p_email TEXT,
+    p_name TEXT,
+    p_organization_name TEXT,
+    p_slug TEXT DEFAULT NULL
+)
+RETURNS SETOF tenants
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_base_slug TEXT;
+    v_slug TEXT;
+    v_tenant tenants%ROWTYPE;
+BEGIN
+    -- URL-friendly slug from the organization name unless one was requested
+    v_base_slug := COALESCE(
+        NULLIF(p_slug, ''),
+        LEFT(TRIM(BOTH '-' FROM regexp_replace(LOWER(p_organization_name), '[^a-z0-9]+', '-', 'g')), 50)
+    );
+    IF v_base_slug = '' THEN
+        v_base_slug := 'org';
+    END IF;
+
+    -- Claim the slug through the unique constraint; on collision retry with a random suffix
+    v_slug := v_base_slug;
+    FOR i IN 1..5 LOOP
+        INSERT INTO tenants (name, slug, status, subscription_plan, subscription_status)
+        VALUES (p_organization_name, v_slug, 'active', 'trial', 'active')
+        ON CONFLICT (slug) DO NOTHING
+        RETURNING * INTO v_tenant;
+
+        EXIT WHEN FOUND;
+        v_slug := v_base_slug || '-' || LEFT(md5(random()::TEXT || clock_timestamp()::TEXT), 8);
+    END LOOP;
+
+    IF v_tenant.id IS NULL THEN
+        RAISE EXCEPTION 'slug_unavailable' USING DETAIL = v_base_slug;
+    END IF;
+
+    BEGIN
+        INSERT INTO users (id, tenant_id, name, email, role, status)
+        VALUES (p_user_id, v_tenant.id, p_name, p_email, 'tenant_admin', 'active');
+    EXCEPTION WHEN unique_violation THEN
+        RAISE EXCEPTION 'user_exists' USING DETAIL = p_email;
+    END;
+
+    INSERT INTO subscriptions (tenant_id, plan, status, current_period_start, current_period_end)
+    VALUES (v_tenant.id, 'trial', 'active', NOW(), NOW() + INTERVAL '14 days');
+
+    INSERT INTO roles (tenant_id, name, permissions, is_system_role) VALUES
+        (v_tenant.id, 'Tenant Admin', '{
+            "assets": ["create", "read", "update", "delete", "manage"],
+            "employees": ["create", "read", "update", "delete", "manage"],
+            "assignments": ["create", "read", "update", "delete", "manage"],
+            "users": ["create", "read", "update", "delete", "manage"],
+            "roles": ["create", "read", "update", "delete"],
+            "settings": ["read", "update"],
+            "audit_logs": ["read"]
+        }'::jsonb, TRUE),
+        (v_tenant.id, 'Manager', '{
+            "assets": ["create", "read", "update", "delete"],
+            "employees": ["create", "read", "update"],
+            "assignments": ["create", "read", "update", "delete"],
+            "users": ["read"],
+            "roles": ["read"],
+            "settings": ["read"],
+            "audit_logs": ["read"]
+        }'::jsonb, TRUE),
+        (v_tenant.id, 'Staff', '{
+            "assets": ["read", "update"],
+            "employees": ["read"],
+            "assignments": ["create", "read", "update"],
+            "users": ["read"],
+            "roles": ["read"],
+            "settings": ["read"]
+        }'::jsonb, TRUE),
+        (v_tenant.id, 'Viewer', '{
+            "assets": ["read"],
+            "employees": ["read"],
+            "assignments": ["read"],
+            "users": ["read"],
+            "roles": ["read"],
+            "settings": ["read"]
+        }'::jsonb, TRUE);
+
+    RETURN NEXT v_tenant;
+END;
+$$;
+
+
+-- ============================================================================
+-- AUDIT LOG PARTITIONS
+-- ============================================================================
+-- One partition per calendar month (UTC), named audit_logs_YYYY_MM. The API's
+-- maintenance task calls ensure_audit_log_partitions daily to stay a few months
+-- ahead; the retention job exports old partitions to Parquet and then drops them.
+
+-- Catch-all for rows outside the monthly partitions (e.g. the maintenance task was
+-- down over a month boundary), so audit inserts never fail; the next call to
+-- ensure_audit_log_partitions creates their month and moves them into it
+CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- Partitions are tables of their own that PostgREST would expose without the tenant
+-- policies of audit_logs: keep them closed to API clients (the RLS of audit_logs
+-- still applies to queries through the parent)
+ALTER TABLE audit_logs_default ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON audit_logs_default FROM anon, authenticated;
+
+-- Create any missing monthly partitions from p_from's month (or the oldest month
+-- held in audit_logs_default, if earlier) through p_months_ahead months from now
+CREATE OR REPLACE FUNCTION ensure_audit_log_partitions(
+    p_from DATE DEFAULT CURRENT_DATE,
+    p_months_ahead INTEGER DEFAULT 3
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+-- Runs as the table owner so the API role can manage partitions
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::DATE;
+    v_last DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::DATE;
+    v_name TEXT;
+    v_start TIMESTAMP WITH TIME ZONE;
+    v_end TIMESTAMP WITH TIME ZONE;
+    v_created INTEGER := 0;
+BEGIN
+    IF to_regclass('audit_logs_default') IS NOT NULL THEN
+        v_month := LEAST(
+            v_month,
+            (SELECT date_trunc('month', MIN(created_at) AT TIME ZONE 'UTC')::DATE FROM audit_logs_default)
+        );
+    END IF;
+
+    WHILE v_month <= v_last LOOP
+        v_name := 'audit_logs_' || to_char(v_month, 'YYYY_MM');
+        v_start := v_month::TIMESTAMP AT TIME ZONE 'UTC';
+        v_end := (v_month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC';
+        IF to_regclass(v_name) IS NULL THEN
+            IF to_regclass('audit_logs_default') IS NOT NULL AND EXISTS (
+                SELECT 1 FROM audit_logs_default WHERE created_at >= v_start AND created_at < v_end
+            ) THEN
+                -- The new partition cannot be created while the default one holds rows of
+                -- its range: detach it, create the month and move those rows over (the
+                -- detach locks audit_logs, so concurrent inserts wait for the commit)
+                ALTER TABLE audit_logs DETACH PARTITION audit_logs_default;
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)', v_name, v_start, v_end
+                );
+                INSERT INTO audit_logs
+                SELECT * FROM audit_logs_default WHERE created_at >= v_start AND created_at < v_end;
+                DELETE FROM audit_logs_default WHERE created_at >= v_start AND created_at < v_end;
+                ALTER TABLE audit_logs ATTACH PARTITION audit_logs_default DEFAULT;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)', v_name, v_start, v_end
+                );
+            END IF;
+            EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+            EXECUTE format('REVOKE ALL ON %I FROM anon, authenticated', v_name);
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN v_created;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION ensure_audit_log_partitions(DATE, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_audit_log_partitions(DATE, INTEGER) TO service_role;
+
+-- Monthly partitions of audit_logs, oldest first
+CREATE OR REPLACE FUNCTION audit_log_partitions()
+RETURNS TABLE (partition_name TEXT, month DATE)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.relname::TEXT, to_date(right(c.relname, 7), 'YYYY_MM')
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'audit_logs'::regclass
+      AND c.relname ~ '^audit_logs_[0-9]{4}_[0-9]{2}$'
+    ORDER BY 2;
+$$;
+
+-- Drop the partition holding p_month (called once the month has been archived)
+CREATE OR REPLACE FUNCTION drop_audit_log_partition(p_month DATE)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_name TEXT := 'audit_logs_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(v_name) IS NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('ALTER TABLE audit_logs DETACH PARTITION %I', v_name);
+    EXECUTE format('DROP TABLE %I', v_name);
+    RETURN TRUE;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION drop_audit_log_partition(DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION drop_audit_log_partition(DATE) TO service_role;
+
+-- Partitions for the current month and the next few, plus any months still held
+-- in a pre-partitioning audit_logs table, whose rows are then copied over
+DO $$
+DECLARE
+    v_oldest TIMESTAMP WITH TIME ZONE;
+BEGIN
+    IF to_regclass('audit_logs_unpartitioned') IS NOT NULL THEN
+        SELECT MIN(created_at) INTO v_oldest FROM audit_logs_unpartitioned;
+        PERFORM ensure_audit_log_partitions(COALESCE(v_oldest, NOW())::DATE);
+        INSERT INTO audit_logs
+        SELECT id, tenant_id, user_id, action, resource_type, resource_id, details,
+               ip_address, user_agent, COALESCE(created_at, NOW())
+        FROM audit_logs_unpartitioned;
+        DROP TABLE audit_logs_unpartitioned;
+    ELSE
+        PERFORM ensure_audit_log_partitions();
+    END IF;
+END;
+$$;
+
+-- Close monthly partitions created before they were locked down on creation
+DO $$
+DECLARE
+    v_partition RECORD;
+BEGIN
+    FOR v_partition IN SELECT partition_name FROM audit_log_partitions() LOOP
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_partition.partition_name);
+        EXECUTE format('REVOKE ALL ON %I FROM anon, authenticated', v_partition.partition_name);
+    END LOOP;
+END;
+$$;
+
+
+-- ============================================================================
+-- AUDIT LOG STATS
+-- ============================================================================
+-- Grouped request counts and latency percentiles over a time range. Grouping is
+-- chosen per call: p_group_by lists any of user_id, action, resource_type and
+-- p_bucket is an optional date_trunc unit (hour, day, week, month, in UTC).
+-- Sampled reads carry details.sample_rate, so estimated_requests weights each
+-- row by 1 / sample_rate. Inlined by the planner, so the tenant/created_at
+-- index and partition pruning apply to the range.
+CREATE OR REPLACE FUNCTION audit_log_stats(
+    p_start TIMESTAMP WITH TIME ZONE,
+    p_end TIMESTAMP WITH TIME ZONE,
+    p_tenant_id UUID DEFAULT NULL,
+    p_user_id UUID DEFAULT NULL,
+    p_action TEXT DEFAULT NULL,
+    p_resource_type TEXT DEFAULT NULL,
+    p_group_by TEXT[] DEFAULT ARRAY['action'],
+    p_bucket TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+    bucket TIMESTAMP WITH TIME ZONE,
+    user_id UUID,
+    action TEXT,
+    resource_type TEXT,
+    requests BIGINT,
+    estimated_requests DOUBLE PRECISION,
+    avg_ms DOUBLE PRECISION,
+    p50_ms DOUBLE PRECISION,
+    p95_ms DOUBLE PRECISION,
+    p99_ms DOUBLE PRECISION,
+    max_ms DOUBLE PRECISION
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        CASE WHEN p_bucket IS NOT NULL THEN date_trunc(p_bucket, l.created_at, 'UTC') END,
+        CASE WHEN 'user_id' = ANY(p_group_by) THEN l.user_id END,
+        CASE WHEN 'action' = ANY(p_group_by) THEN l.action::TEXT END,
+        CASE WHEN 'resource_type' = ANY(p_group_by) THEN l.resource_type::TEXT END,
+        COUNT(*),
+        SUM(1.0 / COALESCE(NULLIF(d.sample_rate, 0), 1)),
+        AVG(d.duration_ms),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY d.duration_ms),
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY d.duration_ms),
+        percentile_cont(0.99) WITHIN GROUP (ORDER BY d.duration_ms),
+        MAX(d.duration_ms)
+    FROM audit_logs l
+    CROSS JOIN LATERAL (
+        SELECT
+            CASE WHEN jsonb_typeof(l.details->'duration_ms') = 'number'
+                THEN (l.details->>'duration_ms')::DOUBLE PRECISION END AS duration_ms,
+            CASE WHEN jsonb_typeof(l.details->'sample_rate') = 'number'
+                THEN (l.details->>'sample_rate')::DOUBLE PRECISION END AS sample_rate
+    ) d
+    WHERE l.created_at >= p_start
+      AND l.created_at <= p_end
+      AND (p_tenant_id IS NULL OR l.tenant_id = p_tenant_id)
+      AND (p_user_id IS NULL OR l.user_id = p_user_id)
+      AND (p_action IS NULL OR l.action = p_action)
+      AND (p_resource_type IS NULL OR l.resource_type = p_resource_type)
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1 NULLS FIRST, 5 DESC
+    LIMIT p_limit;
+$$;
+
+-- ============================================================================
+-- SPREADSHEET IMPORTS
+-- ============================================================================
+-- Upsert one batch of imported rows (a JSON array of AssetCreate/EmployeeCreate
+-- objects) keyed on the tenant-scoped unique index. Rows that already exist are
+-- updated, keeping the current value wherever the file left a cell empty; the
+-- others are inserted. Returns one row per imported item, with inserted = false
+-- for updates. A row skipped by ON CONFLICT (a concurrent insert of the same
+-- key) is not returned.
+
+CREATE OR REPLACE FUNCTION import_assets(p_tenant_id UUID, p_rows JSONB)
+RETURNS TABLE (id UUID, asset_tag VARCHAR, inserted BOOLEAN)
+LANGUAGE sql
+AS $$
+    WITH r AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_rows) AS x(
+            asset_tag VARCHAR, name VARCHAR, category VARCHAR, brand VARCHAR, model VARCHAR,
+            serial_number VARCHAR, purchase_date DATE, purchase_price NUMERIC, status VARCHAR, notes TEXT
+        )
+    ), updated AS (
+        UPDATE assets a
+        SET name = r.name,
+            category = r.category,
+            brand = COALESCE(r.brand, a.brand),
+            model = COALESCE(r.model, a.model),
+            serial_number = COALESCE(r.serial_number, a.serial_number),
+            purchase_date = COALESCE(r.purchase_date, a.purchase_date),
+            purchase_price = COALESCE(r.purchase_price, a.purchase_price),
+            -- Assignments own the assigned status, so an import never sets or changes it
+            status = CASE WHEN a.status = 'assigned' OR r.status = 'assigned' THEN a.status
+                          ELSE COALESCE(r.status, a.status) END,
+            notes = COALESCE(r.notes, a.notes)
+        FROM r
+        WHERE a.tenant_id = p_tenant_id AND a.asset_tag = r.asset_tag
+        RETURNING a.id, a.asset_tag, FALSE
+    ), created AS (
+        INSERT INTO assets AS n (
+            tenant_id, asset_tag, name, category, brand, model, serial_number,
+            purchase_date, purchase_price, status, notes
+        )
+        SELECT p_tenant_id, r.asset_tag, r.name, r.category, r.brand, r.model, r.serial_number,
+               r.purchase_date, r.purchase_price,
+               CASE WHEN r.status = 'assigned' THEN 'available' ELSE COALESCE(r.status, 'available') END, r.notes
+        FROM r
+        WHERE NOT EXISTS (SELECT 1 FROM assets e WHERE e.tenant_id = p_tenant_id AND e.asset_tag = r.asset_tag)
+        ON CONFLICT (tenant_id, asset_tag) DO NOTHING
+        RETURNING n.id, n.asset_tag, TRUE
+    )
+    SELECT * FROM updated
+    UNION ALL
+    SELECT * FROM created;
+$$;
+
+CREATE OR REPLACE FUNCTION import_employees(p_tenant_id UUID, p_rows JSONB)
+RETURNS TABLE (id UUID, email VARCHAR, inserted BOOLEAN)
+LANGUAGE sql
+AS $$
+    WITH r AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_rows) AS x(name VARCHAR, email VARCHAR, department VARCHAR, "position" VARCHAR)
+    ), updated AS (
+        UPDATE employees e
+        SET name = r.name,
+            department = COALESCE(r.department, e.department),
+            "position" = COALESCE(r."position", e."position")
+        FROM r
+        WHERE e.tenant_id = p_tenant_id AND e.email = r.email
+        RETURNING e.id, e.email, FALSE
+    ), created AS (
+        INSERT INTO employees AS n (tenant_id, name, email, department, "position")
+        SELECT p_tenant_id, r.name, r.email, r.department, r."position"
+        FROM r
+        WHERE NOT EXISTS (SELECT 1 FROM employees e WHERE e.tenant_id = p_tenant_id AND e.email = r.email)
+        ON CONFLICT (tenant_id, email) WHERE email IS NOT NULL DO NOTHING
+        RETURNING n.id, n.email, TRUE
+    )
+    SELECT * FROM updated
+    UNION ALL
+    SELECT * FROM created;
+$$;
+
+-- ============================================================================
+-- BULK ASSIGNMENTS AND STATUS CHANGES
+-- ============================================================================
+
+-- Assign many assets at once (a JSON array of {idx, asset_id, employee_id,
+-- assigned_date, notes} with distinct asset_ids). Every requested asset is
+-- locked up front, all items are checked with one query, and the valid ones
+-- are inserted and their assets marked assigned in the same transaction.
+-- Returns one row per item: the new assignment id, or the create_assignment
+-- error code (with the asset status as detail for asset_unavailable).
+CREATE OR REPLACE FUNCTION bulk_create_assignments(
+    p_tenant_id UUID,
+    p_assigned_by UUID,
+    p_items JSONB
+)
+RETURNS TABLE (item_index INTEGER, assignment_id UUID, error_code TEXT, error_detail TEXT)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Lock in id order so concurrent bulk calls cannot deadlock
+    PERFORM 1
+    FROM assets
+    WHERE tenant_id = p_tenant_id
+      AND id IN (SELECT (x->>'asset_id')::UUID FROM jsonb_array_elements(p_items) AS x)
+    ORDER BY id
+    FOR UPDATE;
+
+    RETURN QUERY
+    WITH r AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_items) AS x(
+            idx INTEGER, asset_id UUID, employee_id UUID, assigned_date DATE, notes TEXT
+        )
+    ), checked AS (
+        SELECT r.*,
+               a.status AS asset_status,
+               CASE
+                   WHEN a.id IS NULL THEN 'asset_not_found'
+                   WHEN a.status NOT IN ('available', 'assigned') THEN 'asset_unavailable'
+                   WHEN e.id IS NULL THEN 'employee_not_found'
+                   WHEN EXISTS (
+                       SELECT 1 FROM assignments s WHERE s.asset_id = r.asset_id AND s.status = 'active'
+                   ) THEN 'asset_already_assigned'
+               END AS error
+        FROM r
+        LEFT JOIN assets a ON a.id = r.asset_id AND a.tenant_id = p_tenant_id
+        LEFT JOIN employees e ON e.id = r.employee_id AND e.tenant_id = p_tenant_id
+    ), created AS (
+        INSERT INTO assignments AS n (tenant_id, asset_id, employee_id, assigned_by, assigned_date, notes, status)
+        SELECT p_tenant_id, c.asset_id, c.employee_id, p_assigned_by, c.assigned_date, c.notes, 'active'
+        FROM checked c
+        WHERE c.error IS NULL
+        ON CONFLICT (asset_id) WHERE status = 'active' DO NOTHING
+        RETURNING n.id, n.asset_id
+    ), flipped AS (
+        UPDATE assets
+        SET status = 'assigned'
+        WHERE tenant_id = p_tenant_id AND id IN (SELECT created.asset_id FROM created)
+    )
+    SELECT c.idx,
+           n.id,
+           -- A row skipped by ON CONFLICT lost a race with a single assignment
+           CASE WHEN c.error IS NULL AND n.id IS NULL THEN 'asset_already_assigned' ELSE c.error END,
+           CASE WHEN c.error = 'asset_unavailable' THEN c.asset_status::TEXT END
+    FROM checked c
+    LEFT JOIN created n ON n.asset_id = c.asset_id
+    ORDER BY c.idx;
+END;
+$$;
+
+-- Move many assets to a new status in one statement. Assets with an active
+-- assignment (or still marked assigned) are left alone, since assignments own
+-- that status. Returns one row per distinct requested id with NULL error_code
+-- when it was updated, otherwise asset_not_found or asset_assigned.
+CREATE OR REPLACE FUNCTION bulk_set_asset_status(
+    p_tenant_id UUID,
+    p_asset_ids UUID[],
+    p_status VARCHAR
+)
+RETURNS TABLE (asset_id UUID, error_code TEXT)
+LANGUAGE sql
+AS $$
+    WITH requested AS (
+        SELECT DISTINCT unnest(p_asset_ids) AS id
+    ), updated AS (
+        UPDATE assets a
+        SET status = p_status
+        FROM requested r
+        WHERE a.id = r.id
+          AND a.tenant_id = p_tenant_id
+          AND a.status <> 'assigned'
+          AND NOT EXISTS (SELECT 1 FROM assignments s WHERE s.asset_id = a.id AND s.status = 'active')
+        RETURNING a.id
+    )
+    SELECT r.id,
+           CASE
+               WHEN u.id IS NOT NULL THEN NULL
+               WHEN EXISTS (SELECT 1 FROM assets a WHERE a.id = r.id AND a.tenant_id = p_tenant_id) THEN 'asset_assigned'
+               ELSE 'asset_not_found'
+           END
+    FROM requested r
+    LEFT JOIN updated u ON u.id = r.id;
+$$;